@@ -0,0 +1,9 @@
+"""
+config.py
+
+Settings shared by the services that keep data on local disk.
+"""
+
+import os
+
+DATA_DIR = os.getenv("CONGRESS_DATA_DIR", "data")
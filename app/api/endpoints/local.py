@@ -0,0 +1,178 @@
+import time
+from typing import List, Literal
+
+from fastapi import APIRouter, HTTPException, Query, Depends
+
+from app.api.endpoints.members import get_api_key
+from app.api.models.requests import (
+    AnalyticsResponse, BillFamilyResponse, BillPageResponse, BipartisanScoresResponse, CollaboratorsResponse, FacetSearchResponse,
+    StoredBillDetail, StoredBillsResponse,
+)
+from app.api.services.analytics import REPORTS, get_snapshot
+from app.api.services.bill_graph import bill_family
+from app.api.services.congress_store import find_bills, get_bills_by_id, get_stored_bill
+from app.api.services.cosponsor_graph import bipartisan_ranking, top_collaborators
+from app.api.services.facet_index import FACETS, search_facets
+from app.api.services.posting_index import committee_bills, member_bills
+
+router = APIRouter()
+
+@router.get("/local/bills/", response_model=StoredBillsResponse, summary="Query locally stored bills")
+def local_bills(
+    congress: int = Query(None, description="Only bills from this congress."),
+    bill_type: str = Query(None, description="Only bills of this type (e.g., hr, s, hjres, etc.)."),
+    sponsor: str = Query(None, description="Only bills sponsored by this bioguide ID."),
+    cosponsor: str = Query(None, description="Only bills cosponsored by this bioguide ID."),
+    committee: str = Query(None, description="Only bills referred to this committee system code (e.g., hsag00)."),
+    subject: str = Query(None, description="Only bills with this legislative subject."),
+    policy_area: str = Query(None, description="Only bills in this policy area."),
+    action_since: str = Query(None, description="Only bills with an action on or after this date (YYYY-MM-DD)."),
+    action_until: str = Query(None, description="Only bills with an action on or before this date (YYYY-MM-DD)."),
+    action_type: str = Query(None, description="Restrict the action date filters to this action type (e.g., Floor)."),
+    limit: int = Query(100, ge=1, le=1000, description="The maximum number of bills to return."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Find bills in the local store by sponsor, cosponsor, committee, subject or action dates.
+    Answers from data synced so far without calling Congress.gov.
+    """
+    start = time.perf_counter()
+    results = find_bills(
+        congress=congress, bill_type=bill_type, sponsor=sponsor, cosponsor=cosponsor, committee=committee,
+        subject=subject, policy_area=policy_area, action_since=action_since, action_until=action_until,
+        action_type=action_type, limit=limit,
+    )
+    return {"results": results, "took_ms": (time.perf_counter() - start) * 1000}
+
+@router.get("/local/bill-details/", response_model=StoredBillDetail, summary="Get a locally stored bill")
+def local_bill_details(
+    congress: int = Query(..., description="The congress number."),
+    bill_type: str = Query(..., description="The bill type (e.g., hr, s, hjres, etc.)."),
+    bill_number: int = Query(..., description="The bill's assigned number."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get a stored bill with its actions, cosponsors, committees and subjects.
+    """
+    bill = get_stored_bill(congress, bill_type, bill_number)
+    if bill is None:
+        raise HTTPException(status_code=404, detail="Bill has not been synced")
+    return bill
+
+@router.get("/local/analytics/{report}", response_model=AnalyticsResponse, summary="Aggregate reports over stored bills")
+def local_analytics(
+    report: Literal["committee-activity-per-week", "time-to-floor", "busiest-sponsors"],
+    congress: int = Query(None, description="Only count bills from this congress."),
+    limit: int = Query(10, ge=1, le=500, description="The maximum number of rows for ranked reports."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Compute a report over all synced bills: committee activity per week, days from introduction
+    to the first floor action, or the busiest sponsors.
+    """
+    start = time.perf_counter()
+    snapshot = get_snapshot()
+    if report == "time-to-floor":
+        result = REPORTS[report](snapshot, congress=congress)
+    else:
+        result = REPORTS[report](snapshot, congress=congress, limit=limit)
+    return {"report": report, "congress": congress, "result": result, "took_ms": (time.perf_counter() - start) * 1000}
+
+@router.get("/local/collaborators/", response_model=CollaboratorsResponse, summary="Top co-sponsorship collaborators")
+def local_collaborators(
+    member_id: str = Query(..., description="The bioguide ID of the member."),
+    limit: int = Query(10, ge=1, le=100, description="The number of collaborators to return."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Find the members who sponsor or cosponsor the most stored bills together with a member.
+    """
+    result = top_collaborators(member_id, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Member has no synced sponsorships")
+    return result
+
+@router.get("/local/bipartisan-scores/", response_model=BipartisanScoresResponse, summary="Rank members by bipartisanship")
+def local_bipartisan_scores(
+    party: str = Query(None, description="Only rank members of this party (e.g., D, R, I)."),
+    min_bills: int = Query(5, ge=1, description="Skip members on fewer stored bills than this."),
+    limit: int = Query(20, ge=1, le=600, description="The number of members to return."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Rank members by the share of their co-sponsorship links that cross party lines.
+    """
+    return {"results": bipartisan_ranking(party=party, min_bills=min_bills, limit=limit)}
+
+@router.get("/local/facets/", response_model=FacetSearchResponse, summary="Filter stored bills by facets")
+def local_facets(
+    congress: List[int] = Query(None, description="Congress numbers; bills of any of them match."),
+    origin_chamber: List[str] = Query(None, description="Origin chambers (House, Senate)."),
+    policy_area: List[str] = Query(None, description="Policy areas; bills in any of them match."),
+    subject: List[str] = Query(None, description="Legislative subjects."),
+    status: List[Literal["introduced", "reported", "passed", "vetoed", "enacted"]] = Query(
+        None, description="Statuses derived from the latest action."),
+    subject_match: Literal["any", "all"] = Query("any", description="Whether bills need any or all of the subjects."),
+    count: List[str] = Query(None, description=f"Facets to count among the matches; defaults to all of {', '.join(FACETS)}."),
+    limit: int = Query(100, ge=0, le=1000, description="The maximum number of bills to return."),
+    offset: int = Query(0, ge=0, description="The number of matching bills to skip."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Filter stored bills by congress, chamber, policy area, subject and status, and count the
+    matches for every value of each facet. Values within a facet are ORed and facets are ANDed.
+    """
+    unknown = set(count or ()) - set(FACETS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown facets: {', '.join(sorted(unknown))}")
+    start = time.perf_counter()
+    filters = {"congress": congress, "origin_chamber": origin_chamber, "policy_area": policy_area,
+               "subject": subject, "status": status}
+    result = search_facets(filters, match_all=("subject",) if subject_match == "all" else (),
+                           count_facets=count or FACETS, limit=limit, offset=offset)
+    took_ms = (time.perf_counter() - start) * 1000
+    return {"total": result["total"], "results": get_bills_by_id(result["ordinals"]), "counts": result["counts"],
+            "took_ms": took_ms}
+
+@router.get("/local/committee-bills/", response_model=BillPageResponse, summary="Bills referred to a committee")
+def local_committee_bills(
+    system_code: str = Query(..., description="The committee or subcommittee system code (e.g., hsag00)."),
+    cursor: int = Query(None, description="The next_cursor of the previous page."),
+    limit: int = Query(100, ge=1, le=1000, description="The page size."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Page through the stored bills referred to a committee or subcommittee.
+    """
+    total, ordinals, next_cursor = committee_bills(system_code, cursor, limit)
+    return {"total": total, "results": get_bills_by_id(ordinals), "next_cursor": next_cursor}
+
+@router.get("/local/member-bills/", response_model=BillPageResponse, summary="Bills sponsored or cosponsored by a member")
+def local_member_bills(
+    member_id: str = Query(..., description="The bioguide ID of the member."),
+    role: Literal["sponsor", "cosponsor", "any"] = Query("any", description="Which of the member's bills to list."),
+    cursor: int = Query(None, description="The next_cursor of the previous page."),
+    limit: int = Query(100, ge=1, le=1000, description="The page size."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Page through the stored bills a member sponsored, cosponsored, or either.
+    """
+    total, ordinals, next_cursor = member_bills(member_id, role, cursor, limit)
+    return {"total": total, "results": get_bills_by_id(ordinals), "next_cursor": next_cursor}
+
+@router.get("/local/bill-family/", response_model=BillFamilyResponse, summary="Get a bill's family of related bills")
+def local_bill_family(
+    congress: int = Query(..., description="The congress number."),
+    bill_type: str = Query(..., description="The bill type (e.g., hr, s, hjres, etc.)."),
+    bill_number: int = Query(..., description="The bill's assigned number."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get every bill transitively related to a bill (companions, identical bills, procedurally related
+    bills) with the relationship types linking them, from synced related-bills data.
+    """
+    family = bill_family(congress, bill_type, bill_number)
+    if family is None:
+        raise HTTPException(status_code=404, detail="No related bills have been synced for this bill")
+    return family
@@ -2,13 +2,14 @@ from fastapi import APIRouter, HTTPException, Query, Depends, Security
 from fastapi.exceptions import RequestValidationError
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from starlette.status import HTTP_403_FORBIDDEN
 
 
 
 from app.api.models.requests import (
     MemberSearchRequest, MemberDetailsRequest, ChatRequest, MembersResponse, 
-    MemberDetailsResponse, ChatResponse, BillRequest, BillActionResponse, 
+    MemberDetailsResponse, ChatResponse, BatchChatRequest, BatchChatResponse, BillChatRequest, BillRequest, BillActionResponse, 
     BillAmendmentResponse, CommitteeRequest, CommitteeResponse, 
     CommunicationRequest, CommunicationResponse, SenateCommunicationResponse, BillRelatedResponse,
     BillCosponsorResponse, BillSummaryResponse, BillTextResponse,
@@ -22,13 +23,22 @@ from app.api.services.congress_api import (
     get_bill_related_bills, get_bill_summaries, get_bill_text_versions, 
     get_bill_titles,get_committee_prints,get_committee_meetings,get_bill_subjects
 )
-from app.api.services.chunking import chunk_text
-from app.api.services.semantic_search import semantic_search
+from app.api.services.bill_search import index_bill_field
+from app.api.services.bill_text import get_bill_text_document
+from app.api.services.chat_stream import chat_events
+from app.api.services.congress_store import store_committee_details, store_member_details, sync_bill_resource
+from app.api.services.hybrid_search import hybrid_search
+from app.api.services.member_document import get_member_document
+from app.api.services.result_cache import member_source, result_cache
+from app.api.services.semantic_search import batch_semantic_search
 from dotenv import load_dotenv
+import logging
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 API_KEY = os.getenv("CONGRESS_GOV_API_KEY")
@@ -46,6 +56,37 @@ def get_api_key(api_key_header: str = Security(api_key_header)):
             status_code=HTTP_403_FORBIDDEN, detail="Could not validate credentials"
         )
 
+def sync_to_store(store, *args):
+    """
+    Mirror an upstream response into the local store.
+
+    The response is returned to the caller whatever happens here, so a failing
+    store or sync listener is logged rather than turned into a 500.
+    """
+    try:
+        store(*args)
+    except Exception:
+        logger.exception("Failed to sync %s%s into the local store", store.__name__, args[:-1])
+
+def sync_bill_page(resource, congress, bill_type, bill_number, response):
+    """
+    Mirror a bill resource into the local store if the response holds all of it.
+
+    Syncing replaces the bill's stored rows, so a first page with more pages
+    after it would truncate them; those resources are left to the crawler.
+    """
+    if response.get("pagination", {}).get("next"):
+        return
+    sync_to_store(sync_bill_resource, resource, congress, bill_type, bill_number, response)
+
+def index_bill_page(congress, bill_type, bill_number, field, response):
+    """
+    Add a bill field to the search index if the response holds all of it, logging any failure.
+    """
+    if response.get("pagination", {}).get("next"):
+        return
+    sync_to_store(index_bill_field, congress, bill_type, bill_number, field, response)
+
 @router.post("/search-members/", response_model=MembersResponse, summary="Search for members of Congress")
 def search_members_post(request: MemberSearchRequest, api_key: str = Depends(get_api_key)):
     """
@@ -72,24 +113,86 @@ def fetch_member_details(request: MemberDetailsRequest, api_key: str = Depends(g
 
     bioguide_id = members[0]['bioguideId']
     member_details_response = get_member_details(bioguide_id, API_KEY)
+    sync_to_store(store_member_details, member_details_response)
 
     member_data = member_details_response.get('member')
     if member_data is None:
         raise HTTPException(status_code=500, detail="Unexpected response format")
     return member_data
 
+def chat_response(chunks, ranked):
+    """
+    Build a chat response from ranked (chunk index, score) pairs.
+    """
+    passages = [{"index": i, "text": chunks[i], "score": score} for i, score in ranked]
+    if not passages:
+        return {"response": "", "score": 0.0, "passages": []}
+    return {"response": passages[0]["text"], "score": passages[0]["score"], "passages": passages}
+
 @router.post("/chat/", response_model=ChatResponse, summary="Chat about a member of Congress")
 def chat(request: ChatRequest, api_key: str = Depends(get_api_key)):
     """
     Chat about a member of Congress using their ID.
     Responds to questions about the specified member.
     """
-    member_details_response = get_member_details(request.member_id, API_KEY)
-    member_details = member_details_response['member']
-    member_text = f"Details of {member_details['invertedOrderName']}:\n{member_details['honorificName']} {member_details['firstName']} {member_details['lastName']}"
-    chunks = chunk_text(member_text)
-    relevant_chunk, score = semantic_search(request.question, chunks)
-    return {"response": relevant_chunk, "score": score}
+    source = member_source(request.member_id)
+    variant = (request.retrieval, request.top_k)
+    fingerprint = result_cache.fingerprint_for(source)
+    if fingerprint is not None:
+        cached = result_cache.get(request.question, fingerprint, variant)
+        if cached is not None:
+            return cached
+
+    document = get_member_document(request.member_id, API_KEY)
+    result_cache.bind(source, document.fingerprint)
+    cached = result_cache.get(request.question, document.fingerprint, variant)
+    if cached is not None:
+        return cached
+
+    if request.retrieval == "hybrid":
+        ranked, timings = hybrid_search(request.question, document.chunks, k=request.top_k)
+        response = {**chat_response(document.chunks, ranked), "timings": timings}
+    else:
+        ranked = document.index.search(request.question, k=request.top_k)
+        response = chat_response(document.chunks, ranked)
+    result_cache.put(request.question, document.fingerprint, response, variant)
+    return response
+
+@router.post("/chat/stream", summary="Chat about a member of Congress with streamed results")
+def chat_stream(request: ChatRequest, api_key: str = Depends(get_api_key)):
+    """
+    Chat about a member of Congress, streaming server-sent events.
+    Sends an acknowledgment at once, then ranked passages, then timings.
+    """
+    events = chat_events(
+        request.question, request.member_id, API_KEY, top_k=request.top_k, retrieval=request.retrieval
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post("/chat/batch", response_model=BatchChatResponse, summary="Ask several questions about a member of Congress")
+def chat_batch(request: BatchChatRequest, api_key: str = Depends(get_api_key)):
+    """
+    Answer several questions about one member of Congress in a single call.
+    The member is fetched once and all questions are scored together.
+    """
+    document = get_member_document(request.member_id, API_KEY)
+    ranked_per_question = batch_semantic_search(request.questions, document.chunks, k=request.top_k)
+    return {"results": [chat_response(document.chunks, ranked) for ranked in ranked_per_question]}
+
+@router.post("/bill-chat/", response_model=ChatResponse, summary="Chat about the full text of a bill")
+def bill_chat(request: BillChatRequest, api_key: str = Depends(get_api_key)):
+    """
+    Answer a question from the full text of a bill.
+    The text is downloaded and indexed on first use and cached per bill version.
+    """
+    document = get_bill_text_document(
+        request.congress, request.bill_type, request.bill_number, API_KEY, version=request.version
+    )
+    ranked = document.search(
+        request.question, k=request.top_k,
+        division=request.division, title=request.title, section=request.section
+    )
+    return chat_response(document.chunks, ranked)
 
 @router.get("/bill-details/", response_model=BillDetailResponse, summary="Get details of a specific bill")
 def bill_details(congress: int, bill_type: str, bill_number: int, api_key: str = Depends(get_api_key)):
@@ -98,6 +201,7 @@ def bill_details(congress: int, bill_type: str, bill_number: int, api_key: str =
     Returns details of the bill including the text, amendments, and actions.
     """
     details = get_bill_details(congress, bill_type, bill_number, API_KEY)
+    sync_bill_page("details", congress, bill_type, bill_number, details)
     return details
 
 @router.get("/bill-actions/", response_model=BillActionResponse, summary="Get actions related to a bill")
@@ -112,6 +216,8 @@ def bill_actions(
     Returns the actions taken on the bill.
     """
     response = get_bill_actions(congress, bill_type, bill_number, API_KEY)
+    index_bill_page(congress, bill_type, bill_number, "actions", response)
+    sync_bill_page("actions", congress, bill_type, bill_number, response)
     return response
 
 @router.get("/bill-amendments/", response_model=BillAmendmentResponse, summary="Get amendments related to a bill")
@@ -138,7 +244,9 @@ def bill_cosponsors(
     """
     Get the list of cosponsors of a specific bill.
     """
-    return get_bill_cosponsors(congress, bill_type, bill_number, API_KEY)
+    response = get_bill_cosponsors(congress, bill_type, bill_number, API_KEY)
+    sync_bill_page("cosponsors", congress, bill_type, bill_number, response)
+    return response
 
 @router.get("/bill-committees/", response_model=CommitteeResponseBill, summary="Get committees related to a bill")
 def bill_committees(
@@ -151,6 +259,7 @@ def bill_committees(
     Get the list of committees associated with a specific bill.
     """
     bill_committees_response = get_bill_committees(congress, bill_type, bill_number, API_KEY)
+    sync_bill_page("committees", congress, bill_type, bill_number, bill_committees_response)
     return bill_committees_response
 
 @router.get("/bill-related-bills/", response_model=BillRelatedResponse, summary="Get related bills")
@@ -163,7 +272,9 @@ def bill_related_bills(
     """
     Get the list of bills related to a specific bill.
     """
-    return get_bill_related_bills(congress, bill_type, bill_number, API_KEY)
+    response = get_bill_related_bills(congress, bill_type, bill_number, API_KEY)
+    sync_bill_page("related-bills", congress, bill_type, bill_number, response)
+    return response
 
 @router.get("/bill-summaries/", response_model=BillSummaryResponse, summary="Get bill summaries")
 def bill_summaries(
@@ -175,7 +286,9 @@ def bill_summaries(
     """
     Get summaries of a specific bill.
     """
-    return get_bill_summaries(congress, bill_type, bill_number, API_KEY)
+    response = get_bill_summaries(congress, bill_type, bill_number, API_KEY)
+    index_bill_page(congress, bill_type, bill_number, "summaries", response)
+    return response
 
 @router.get("/bill-text-versions/", response_model=BillTextResponse, summary="Get bill text versions")
 def bill_text_versions(
@@ -199,7 +312,9 @@ def bill_titles(
     """
     Get the list of titles for a specific bill.
     """
-    return get_bill_titles(congress, bill_type, bill_number, API_KEY)
+    response = get_bill_titles(congress, bill_type, bill_number, API_KEY)
+    index_bill_page(congress, bill_type, bill_number, "titles", response)
+    return response
 
 @router.get("/committee-details/", response_model=CommitteeResponse, summary="Get details about a specific committee")
 def committee_details(
@@ -211,6 +326,7 @@ def committee_details(
     Get detailed information about a specific committee.
     """
     comm_details = get_committee_details(chamber, committee_code, API_KEY)
+    sync_to_store(store_committee_details, chamber, comm_details)
     return comm_details
 
 @router.get("/house-communications/", response_model=CommunicationResponse, summary="Get House communications")
@@ -248,6 +364,7 @@ def bill_subjects(
     Returns the subjects and policy area associated with the bill.
     """
     response = get_bill_subjects(congress, bill_type, bill_number, API_KEY)
+    sync_bill_page("subjects", congress, bill_type, bill_number, response)
     subjects = response.get("subjects", {})
     return {
         "legislativeSubjects": subjects.get("legislativeSubjects", []),
@@ -0,0 +1,24 @@
+import time
+
+from fastapi import APIRouter, Query, Depends
+
+from app.api.endpoints.members import get_api_key
+from app.api.models.requests import BillSearchResponse
+from app.api.services.bill_search import search_bills
+
+router = APIRouter()
+
+@router.get("/bill-search/", response_model=BillSearchResponse, summary="Search locally synced bills")
+def bill_search(
+    query: str = Query(..., description="The words to search bill titles, summaries and actions for."),
+    congress: int = Query(None, description="Only search bills from this congress."),
+    limit: int = Query(10, ge=1, le=100, description="The maximum number of bills to return."),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Find bills whose titles, summaries or actions mention the query.
+    Answers from the local BM25 index, which covers every bill synced so far.
+    """
+    start = time.perf_counter()
+    results = search_bills(query, congress=congress, limit=limit)
+    return {"results": results, "took_ms": (time.perf_counter() - start) * 1000}
@@ -1,5 +1,16 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.api.endpoints import members
+from app.api.endpoints import local, members, search
+from app.api.services.bill_search import maybe_flush
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Persist anything indexed since the last periodic flush.
+    maybe_flush(force=True)
+
 
 app = FastAPI(
     title="Chat with Congress",
@@ -10,8 +21,11 @@ app = FastAPI(
             "url": "http://localhost:8000",
             "description": "Local server"
         }
-    ]
+    ],
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(members.router)
+app.include_router(search.router)
+app.include_router(local.router)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Union, Dict
+from typing import List, Optional, Union, Dict, Literal
 
 class Depiction(BaseModel):
     attribution: str = Field(..., description="The attribution for the member's image.")
@@ -251,6 +251,24 @@ class MemberDetailsRequest(BaseModel):
 class ChatRequest(BaseModel):
     question: str = Field(..., description="The question to ask about the member of Congress.")
     member_id: str = Field(..., description="The ID of the member of Congress to chat about.")
+    top_k: int = Field(3, ge=1, le=50, description="The maximum number of ranked passages to return.")
+    retrieval: Literal["tfidf", "hybrid"] = Field("tfidf", description="tfidf for cosine similarity, or hybrid to fuse BM25 and vector rankings.")
+
+class BatchChatRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=100, description="The questions to ask about the member of Congress.")
+    member_id: str = Field(..., description="The ID of the member of Congress to chat about.")
+    top_k: int = Field(3, ge=1, le=50, description="The maximum number of ranked passages to return per question.")
+
+class BillChatRequest(BaseModel):
+    question: str = Field(..., description="The question to ask about the bill's text.")
+    congress: int = Field(..., description="The congress number.")
+    bill_type: str = Field(..., description="The bill type (e.g., hr, s, hres, sres).")
+    bill_number: int = Field(..., description="The bill number.")
+    version: Optional[str] = Field(None, description="The text version type (e.g., Introduced in House); defaults to the latest version.")
+    top_k: int = Field(3, ge=1, le=50, description="The maximum number of ranked passages to return.")
+    division: Optional[str] = Field(None, description="Only search this division of the bill (e.g., A).")
+    title: Optional[str] = Field(None, description="Only search this title of the bill (e.g., IV).")
+    section: Optional[str] = Field(None, description="Only search this section of the bill (e.g., 101).")
 
 class BillRequest(BaseModel):
     congress: int = Field(..., description="The congress number.")
@@ -268,9 +286,129 @@ class CommunicationRequest(BaseModel):
     communication_number: int = Field(..., description="The communication’s assigned number.")
 
 
+class Passage(BaseModel):
+    index: int = Field(..., description="The position of the chunk within the searched corpus.")
+    text: str = Field(..., description="The text of the chunk.")
+    score: float = Field(..., description="The relevance score of the chunk (a fused rank score for hybrid retrieval).")
+
 class ChatResponse(BaseModel):
     response: str = Field(..., description="The response generated from the chat based on the member's information.")
     score: float = Field(..., description="The relevance score of the response based on the semantic search.")
+    passages: List[Passage] = Field(default_factory=list, description="The ranked passages that matched the question, best first.")
+    timings: Optional[Dict[str, float]] = Field(None, description="Per-stage retrieval latency in milliseconds, when reported.")
+
+class BillSearchHit(BaseModel):
+    congress: int = Field(..., description="The congress number.")
+    bill_type: str = Field(..., description="The bill type (e.g., hr, s, hjres, etc.).")
+    bill_number: int = Field(..., description="The bill's assigned number.")
+    field: str = Field(..., description="The best matching part of the bill (titles, summaries or actions).")
+    score: float = Field(..., description="The BM25 relevance score.")
+
+class BillSearchResponse(BaseModel):
+    results: List[BillSearchHit] = Field(..., description="The matching bills, best first.")
+    took_ms: float = Field(..., description="Time spent searching the index, in milliseconds.")
+
+class StoredBill(BaseModel):
+    congress: int = Field(..., description="The congress number.")
+    bill_type: str = Field(..., description="The bill type (e.g., hr, s, hjres, etc.).")
+    bill_number: int = Field(..., description="The bill's assigned number.")
+    title: Optional[str] = Field(None, description="The title of the bill.")
+    origin_chamber: Optional[str] = Field(None, description="The chamber where the bill originated.")
+    introduced_date: Optional[str] = Field(None, description="The date the bill was introduced.")
+    policy_area: Optional[str] = Field(None, description="The policy area of the bill.")
+    sponsor_bioguide_id: Optional[str] = Field(None, description="The bioguide ID of the sponsor.")
+    latest_action_date: Optional[str] = Field(None, description="The date of the latest action.")
+    latest_action_text: Optional[str] = Field(None, description="The text of the latest action.")
+
+class StoredBillsResponse(BaseModel):
+    results: List[StoredBill] = Field(..., description="The matching stored bills, most recently active first.")
+    took_ms: float = Field(..., description="Time spent querying the local store, in milliseconds.")
+
+class StoredAction(BaseModel):
+    action_date: str = Field(..., description="The date the action took place.")
+    action_code: Optional[str] = Field(None, description="Code representing the type of action.")
+    action_type: Optional[str] = Field(None, description="The type of action performed.")
+    text: Optional[str] = Field(None, description="Description of the action.")
+    source_system: Optional[str] = Field(None, description="The source system name.")
+
+class StoredCosponsor(BaseModel):
+    bioguide_id: str = Field(..., description="The bioguide ID of the cosponsor.")
+    full_name: Optional[str] = Field(None, description="The full name of the cosponsor.")
+    party: Optional[str] = Field(None, description="The political party of the cosponsor.")
+    state: Optional[str] = Field(None, description="The state the cosponsor represents.")
+    sponsorship_date: Optional[str] = Field(None, description="The date the cosponsor signed onto the bill.")
+    is_original: Optional[bool] = Field(None, description="Indicates if the cosponsor is an original cosponsor.")
+
+class StoredCommittee(BaseModel):
+    system_code: str = Field(..., description="The system code of the committee.")
+    name: Optional[str] = Field(None, description="The name of the committee.")
+    chamber: Optional[str] = Field(None, description="The chamber the committee belongs to.")
+
+class StoredBillDetail(StoredBill):
+    update_date: Optional[str] = Field(None, description="The date the bill was last updated upstream.")
+    actions: List[StoredAction] = Field(..., description="The bill's actions, newest first.")
+    cosponsors: List[StoredCosponsor] = Field(..., description="The bill's cosponsors.")
+    committees: List[StoredCommittee] = Field(..., description="The committees and subcommittees the bill was referred to.")
+    subjects: List[str] = Field(..., description="The bill's legislative subjects.")
+
+class AnalyticsResponse(BaseModel):
+    report: str = Field(..., description="The report that was computed.")
+    congress: Optional[int] = Field(None, description="The congress the report was restricted to, if any.")
+    result: Union[List[Dict], Dict] = Field(..., description="The report rows, or a summary for distribution reports.")
+    took_ms: float = Field(..., description="Time taken to compute the report, in milliseconds.")
+
+class Collaborator(BaseModel):
+    bioguide_id: str = Field(..., description="The collaborator's bioguide ID.")
+    party: Optional[str] = Field(None, description="The collaborator's party, if known.")
+    shared_bills: int = Field(..., description="The number of bills both members sponsored or cosponsored.")
+
+class CollaboratorsResponse(BaseModel):
+    bioguide_id: str = Field(..., description="The member's bioguide ID.")
+    party: Optional[str] = Field(None, description="The member's party, if known.")
+    bills: int = Field(..., description="The number of stored bills the member sponsored or cosponsored.")
+    bipartisan_score: Optional[float] = Field(None, description="The share of the member's co-sponsorship links with members of other parties.")
+    collaborators: List[Collaborator] = Field(..., description="The members sharing the most bills, most first.")
+
+class BipartisanScore(BaseModel):
+    bioguide_id: str = Field(..., description="The member's bioguide ID.")
+    party: Optional[str] = Field(None, description="The member's party.")
+    bills: int = Field(..., description="The number of stored bills the member sponsored or cosponsored.")
+    bipartisan_score: float = Field(..., description="The share of the member's co-sponsorship links with members of other parties.")
+
+class BipartisanScoresResponse(BaseModel):
+    results: List[BipartisanScore] = Field(..., description="Members ordered by descending bipartisan score.")
+
+class FacetSearchResponse(BaseModel):
+    total: int = Field(..., description="The number of stored bills matching the filters.")
+    results: List[StoredBill] = Field(..., description="A page of matching bills, in store order.")
+    counts: Dict[str, Dict[str, int]] = Field(..., description="For each facet, the number of matching bills per value.")
+    took_ms: float = Field(..., description="Time taken to filter and count, in milliseconds.")
+
+class BillPageResponse(BaseModel):
+    total: int = Field(..., description="The number of stored bills for the key.")
+    results: List[StoredBill] = Field(..., description="A page of bills, in store order.")
+    next_cursor: Optional[int] = Field(None, description="Pass as cursor to get the next page; absent on the last page.")
+
+class BillRef(BaseModel):
+    congress: int = Field(..., description="The congress number.")
+    bill_type: str = Field(..., description="The bill type (e.g., hr, s, hjres, etc.).")
+    bill_number: int = Field(..., description="The bill's assigned number.")
+
+class FamilyBill(BillRef):
+    title: Optional[str] = Field(None, description="The title of the bill, if it has been synced.")
+
+class BillRelation(BaseModel):
+    bill: BillRef = Field(..., description="The bill whose related-bills record lists the relation.")
+    related_bill: BillRef = Field(..., description="The related bill.")
+    relationship_type: Optional[str] = Field(None, description="The relationship (e.g., Identical bill, Related bill).")
+    identified_by: Optional[str] = Field(None, description="Who identified the relationship (e.g., CRS, House).")
+
+class BillFamilyResponse(BaseModel):
+    bills: List[FamilyBill] = Field(..., description="Every bill connected to the requested bill, including itself.")
+    relations: List[BillRelation] = Field(..., description="The relations among the family's bills.")
+
+class BatchChatResponse(BaseModel):
+    results: List[ChatResponse] = Field(..., description="One chat response per question, in the order the questions were asked.")
 
 
 
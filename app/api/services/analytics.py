@@ -0,0 +1,309 @@
+"""
+analytics.py
+
+This module contains a columnar in-memory snapshot of the local store and the
+aggregate reports computed over it.
+
+Bills, actions, committee activities and cosponsorships are loaded from
+SQLite once into NumPy arrays: dates become int32 days since 1970-01-01,
+categorical values (bill type, action type, committee, member, policy area)
+are dictionary-encoded as int32 codes into a list of interned strings, and
+every child row refers to its bill by row number in the bill arrays. Reports
+are then whole-array operations (bincount, minimum.at, histogram) rather than
+loops over dicts, so a full congress is aggregated in milliseconds.
+
+A sync only marks the snapshot out of date. It is rebuilt on the next request
+once it is also older than SNAPSHOT_REFRESH_INTERVAL, so a burst of syncs
+costs one rebuild rather than one per bill, and reports lag syncs by at most
+that interval. Syncs by the crawler's process are noticed by a ChangeWatch.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from app.api.services import congress_store
+from app.api.services.congress_store import ChangeWatch, get_connection, on_sync
+
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", 30))
+MISSING_DAY = np.iinfo(np.int32).min
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+class Dictionary:
+    """
+    Dictionary encoding for a categorical column: each distinct string gets an int code.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """
+        Return the code for a value, adding it if new. None is encoded as -1.
+        """
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def encode(self, values):
+        """
+        Encode a sequence of values as an int32 array.
+        """
+        return np.fromiter((self.code(value) for value in values), dtype=np.int32, count=len(values))
+
+    def decode(self, code):
+        return self.values[code] if code >= 0 else None
+
+
+def to_days(dates):
+    """
+    Convert ISO date strings (or datetimes) to int32 days since the epoch.
+
+    :param dates: A sequence of strings, which may be None.
+    :return: An int32 array, with MISSING_DAY where the date is missing.
+    """
+    parsed = np.array([date[:10] if date else "NaT" for date in dates], dtype="datetime64[D]")
+    days = parsed.astype(np.int64)
+    days[np.isnat(parsed)] = MISSING_DAY
+    return days.astype(np.int32)
+
+
+def day_to_date(day):
+    return str(np.datetime64(int(day), "D"))
+
+
+class Snapshot:
+    """
+    Column arrays for bills and their child rows, as of `built_at`.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: A connection to the local store.
+        """
+        self.watch = ChangeWatch()
+        self.synced = False
+        self.bill_types = Dictionary()
+        self.members = Dictionary()
+        self.policy_areas = Dictionary()
+        self.chambers = Dictionary()
+        self.action_types = Dictionary()
+        self.committees = Dictionary()
+        self.activities = Dictionary()
+        self.parties = Dictionary()
+
+        rows = connection.execute(
+            "SELECT id, congress, bill_type, bill_number, origin_chamber, introduced_date, policy_area, "
+            "sponsor_bioguide_id FROM bills ORDER BY id"
+        ).fetchall()
+        ids, congress, bill_type, number, chamber, introduced, policy_area, sponsor = _columns(rows, 8)
+        self.bill_ids = np.array(ids, dtype=np.int64)
+        self.congress = np.array(congress, dtype=np.int16)
+        self.bill_type = self.bill_types.encode(bill_type)
+        self.bill_number = np.array(number, dtype=np.int32)
+        self.origin_chamber = self.chambers.encode(chamber)
+        self.introduced = to_days(introduced)
+        self.policy_area = self.policy_areas.encode(policy_area)
+        self.sponsor = self.members.encode(sponsor)
+
+        rows = connection.execute("SELECT bill_id, action_date, action_type FROM actions").fetchall()
+        bill_id, date, action_type = _columns(rows, 3)
+        self.action_bill = self._bill_rows(bill_id)
+        self.action_day = to_days(date)
+        self.action_type = self.action_types.encode(action_type)
+
+        rows = connection.execute(
+            "SELECT bill_id, system_code, activity, activity_date FROM bill_committees WHERE activity != ''"
+        ).fetchall()
+        bill_id, code, activity, date = _columns(rows, 4)
+        self.activity_bill = self._bill_rows(bill_id)
+        self.activity_committee = self.committees.encode(code)
+        self.activity = self.activities.encode(activity)
+        self.activity_day = to_days(date)
+
+        rows = connection.execute(
+            "SELECT c.bill_id, c.bioguide_id, c.sponsorship_date, c.is_original FROM cosponsors c"
+        ).fetchall()
+        bill_id, member, date, original = _columns(rows, 4)
+        self.cosponsor_bill = self._bill_rows(bill_id)
+        self.cosponsor = self.members.encode(member)
+        self.cosponsor_day = to_days(date)
+        self.cosponsor_original = np.array(original, dtype=bool)
+
+        # Party per member code, for members seen as sponsors or cosponsors.
+        party = dict(connection.execute("SELECT bioguide_id, party FROM members").fetchall())
+        self.member_party = self.parties.encode([party.get(member) for member in self.members.values])
+        self.path = congress_store.DB_PATH
+        self.built_at = time.monotonic()
+
+    def _bill_rows(self, bill_ids):
+        """
+        Map store bill ids to row numbers in the bill arrays.
+        """
+        return np.searchsorted(self.bill_ids, np.array(bill_ids, dtype=np.int64)).astype(np.int32)
+
+    def bill_mask(self, congress=None):
+        """
+        Select bills, e.g. those of one congress.
+        """
+        if congress is None:
+            return np.ones(len(self.bill_ids), dtype=bool)
+        return self.congress == congress
+
+
+def _columns(rows, count):
+    """
+    Transpose query rows into one list per column.
+    """
+    if not rows:
+        return [[] for _ in range(count)]
+    return [list(column) for column in zip(*rows)]
+
+
+def get_snapshot(max_age=None):
+    """
+    Return the current snapshot, rebuilding it from the store when out of date.
+
+    :param max_age: How old an out-of-date snapshot may get before it is rebuilt, in seconds; defaults to
+        SNAPSHOT_REFRESH_INTERVAL.
+    :return: A Snapshot.
+    """
+    global _snapshot
+    max_age = SNAPSHOT_REFRESH_INTERVAL if max_age is None else max_age
+    with _snapshot_lock:
+        if (
+            _snapshot is None
+            or _snapshot.path != congress_store.DB_PATH
+            or (_snapshot.synced and time.monotonic() - _snapshot.built_at >= max_age)
+            or _snapshot.watch.changed()
+        ):
+            _snapshot = Snapshot(get_connection())
+        return _snapshot
+
+
+@on_sync
+def _mark_snapshot_synced(*synced):
+    with _snapshot_lock:
+        if _snapshot is not None:
+            _snapshot.synced = True
+
+
+def committee_activity_per_week(snapshot, congress=None, limit=10):
+    """
+    Count committee activities (referrals, markups, hearings) per ISO week per committee.
+
+    :param snapshot: A Snapshot.
+    :param congress: Only count bills from this congress.
+    :param limit: The number of busiest committees to report.
+    :return: A list of {"committee", "total", "weeks": {week start date: count}} rows.
+    """
+    keep = snapshot.bill_mask(congress)[snapshot.activity_bill] & (snapshot.activity_day != MISSING_DAY)
+    committees = snapshot.activity_committee[keep]
+    # 1970-01-01 was a Thursday; shift so weeks start on Monday.
+    weeks = (snapshot.activity_day[keep].astype(np.int64) + 3) // 7
+    if len(weeks) == 0:
+        return []
+
+    first_week = weeks.min()
+    n_weeks = int(weeks.max() - first_week + 1)
+    counts = np.bincount(committees * n_weeks + (weeks - first_week), minlength=len(snapshot.committees) * n_weeks)
+    counts = counts.reshape(len(snapshot.committees), n_weeks)
+    totals = counts.sum(axis=1)
+
+    rows = []
+    for code in np.argsort(-totals, kind="stable")[:limit]:
+        if totals[code] == 0:
+            break
+        active = np.flatnonzero(counts[code])
+        rows.append({
+            "committee": snapshot.committees.decode(code),
+            "total": int(totals[code]),
+            "weeks": {day_to_date((first_week + week) * 7 - 3): int(counts[code, week]) for week in active},
+        })
+    return rows
+
+
+def time_to_floor(snapshot, congress=None, bins=(0, 30, 90, 180, 365, 730)):
+    """
+    Measure the days from introduction to each bill's first floor action.
+
+    :param snapshot: A Snapshot.
+    :param congress: Only consider bills from this congress.
+    :param bins: Histogram bucket edges in days; the last bucket is open-ended.
+    :return: A dict with the number of bills reaching the floor, percentiles and a histogram.
+    """
+    floor = snapshot.action_types.codes.get("Floor", -2)
+    keep = (snapshot.action_type == floor) & (snapshot.action_day != MISSING_DAY)
+    first_floor = np.full(len(snapshot.bill_ids), np.iinfo(np.int32).max, dtype=np.int32)
+    np.minimum.at(first_floor, snapshot.action_bill[keep], snapshot.action_day[keep])
+
+    reached = (
+        snapshot.bill_mask(congress)
+        & (first_floor != np.iinfo(np.int32).max)
+        & (snapshot.introduced != MISSING_DAY)
+    )
+    days = (first_floor[reached] - snapshot.introduced[reached]).astype(np.int64)
+    if len(days) == 0:
+        return {"bills": 0, "median_days": None, "p90_days": None, "histogram": []}
+
+    edges = np.array(list(bins) + [max(int(days.max()), bins[-1]) + 1])
+    counts, _ = np.histogram(days, bins=edges)
+    return {
+        "bills": int(len(days)),
+        "median_days": float(np.median(days)),
+        "p90_days": float(np.percentile(days, 90)),
+        "histogram": [
+            {"from_days": int(low), "to_days": int(high) if i < len(bins) - 1 else None, "bills": int(count)}
+            for i, (low, high, count) in enumerate(zip(edges[:-1], edges[1:], counts))
+        ],
+    }
+
+
+def busiest_sponsors(snapshot, congress=None, limit=10):
+    """
+    Rank members by the number of bills they sponsored, with their cosponsorship counts.
+
+    :param snapshot: A Snapshot.
+    :param congress: Only count bills from this congress.
+    :param limit: The number of members to report.
+    :return: A list of {"bioguide_id", "party", "sponsored", "cosponsored"} rows.
+    """
+    bills = snapshot.bill_mask(congress)
+    sponsors = snapshot.sponsor[bills & (snapshot.sponsor >= 0)]
+    sponsored = np.bincount(sponsors, minlength=len(snapshot.members))
+    cosponsored = np.bincount(snapshot.cosponsor[bills[snapshot.cosponsor_bill]], minlength=len(snapshot.members))
+
+    order = np.lexsort((-cosponsored, -sponsored))[:limit]
+    return [
+        {
+            "bioguide_id": snapshot.members.decode(code),
+            "party": snapshot.parties.decode(snapshot.member_party[code]),
+            "sponsored": int(sponsored[code]),
+            "cosponsored": int(cosponsored[code]),
+        }
+        for code in order
+        if sponsored[code] or cosponsored[code]
+    ]
+
+
+REPORTS = {
+    "committee-activity-per-week": committee_activity_per_week,
+    "time-to-floor": time_to_floor,
+    "busiest-sponsors": busiest_sponsors,
+}
@@ -0,0 +1,268 @@
+"""
+ann_index.py
+
+This module contains an approximate nearest-neighbour index for chunk
+retrieval over large corpora.
+
+Chunks are embedded with LSA: TF-IDF followed by a truncated SVD down to a
+few hundred dimensions, then L2-normalised so the dot product is the cosine
+similarity. The embeddings are clustered IVF-style with k-means; a query is
+only compared against the chunks in its `n_probe` closest clusters, which
+trades a little recall for a large drop in latency. Raising `n_probe` moves
+the tradeoff back towards exact search. hybrid_search switches its vector
+pass to this index once a corpus reaches ANN_MIN_CHUNKS chunks.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.api.services.semantic_search import densify, top_k
+
+
+def _normalize_rows(vectors):
+    """
+    Scale each row to unit length, leaving all-zero rows untouched.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class LsaEmbedder:
+    """
+    Maps text to dense, L2-normalised LSA vectors.
+
+    The SVD keeps at most one dimension fewer than the corpus has chunks or
+    terms. A corpus of a single chunk or a single term cannot be reduced at
+    all and is embedded with its raw TF-IDF weights.
+    """
+
+    def __init__(self, vectorizer, components=None):
+        """
+        :param vectorizer: A fitted TfidfVectorizer.
+        :param components: The (dimensions x vocabulary) SVD basis, or None for no reduction.
+        """
+        self.vectorizer = vectorizer
+        self.components = components
+
+    @classmethod
+    def fit(cls, chunks, n_components=256, seed=0):
+        """
+        Fit TF-IDF weights and an SVD basis over a corpus.
+
+        :param chunks: The list of text chunks.
+        :param n_components: The target number of dimensions, lowered for small corpora.
+        :param seed: The random seed for the SVD.
+        :return: A tuple of (embedder, embedded chunks).
+        """
+        vectorizer = TfidfVectorizer(dtype=np.float32)
+        matrix = vectorizer.fit_transform(chunks)
+        # TruncatedSVD needs fewer components than features; the matrix stays sparse either way.
+        n_components = min(n_components, min(matrix.shape) - 1)
+        if n_components < 1:
+            return cls(vectorizer), _normalize_rows(densify(matrix))
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        reduced = svd.fit_transform(matrix)
+        return cls(vectorizer, svd.components_.astype(np.float32)), _normalize_rows(reduced)
+
+    @property
+    def dimensions(self):
+        if self.components is None:
+            return len(self.vectorizer.vocabulary_)
+        return self.components.shape[0]
+
+    def embed(self, texts):
+        """
+        Embed texts into the fitted space.
+
+        :param texts: A list of strings.
+        :return: A (len(texts) x dimensions) float32 array of unit vectors.
+        """
+        matrix = self.vectorizer.transform(texts)
+        if self.components is None:
+            return _normalize_rows(densify(matrix))
+        return _normalize_rows(matrix @ self.components.T)
+
+    def state(self):
+        """
+        Return the arrays needed to rebuild the embedder, for saving.
+        """
+        terms = sorted(self.vectorizer.vocabulary_, key=self.vectorizer.vocabulary_.get)
+        state = {"terms": np.array(terms), "idf": self.vectorizer.idf_.astype(np.float32)}
+        if self.components is not None:
+            state["components"] = self.components
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild an embedder from the arrays returned by `state`.
+        """
+        terms = [str(term) for term in state["terms"]]
+        vectorizer = TfidfVectorizer(dtype=np.float32, vocabulary={term: i for i, term in enumerate(terms)})
+        vectorizer.idf_ = state["idf"]
+        return cls(vectorizer, state.get("components"))
+
+
+class AnnIndex:
+    """
+    An IVF index over LSA chunk embeddings.
+
+    Vectors are stored grouped by cluster, so probing a cluster is a single
+    contiguous (members x dimensions) @ (dimensions,) product.
+    """
+
+    def __init__(self, embedder, centroids, list_offsets, ids, vectors, n_probe=8):
+        """
+        :param embedder: The LsaEmbedder used for chunks and queries.
+        :param centroids: The (clusters x dimensions) k-means centroids.
+        :param list_offsets: Start offset of each cluster in `ids` and `vectors`, plus the end.
+        :param ids: Chunk ids in cluster order.
+        :param vectors: Chunk embeddings in cluster order.
+        :param n_probe: The default number of clusters to scan per query.
+        """
+        self.embedder = embedder
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.n_probe = n_probe
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, chunks, n_components=256, n_lists=None, n_probe=8, seed=0):
+        """
+        Embed and cluster a corpus.
+
+        :param chunks: The list of text chunks; results refer to them by position.
+        :param n_components: The LSA dimensionality.
+        :param n_lists: The number of clusters; defaults to about sqrt(len(chunks)).
+        :param n_probe: The default number of clusters to scan per query.
+        :param seed: The random seed for the SVD and k-means.
+        :return: The built AnnIndex.
+        """
+        embedder, vectors = LsaEmbedder.fit(chunks, n_components=n_components, seed=seed)
+        return cls.from_embeddings(embedder, vectors, n_lists=n_lists, n_probe=n_probe, seed=seed)
+
+    @classmethod
+    def from_embeddings(cls, embedder, vectors, n_lists=None, n_probe=8, seed=0):
+        """
+        Cluster chunks already embedded by a fitted LsaEmbedder.
+
+        :param embedder: The LsaEmbedder that produced `vectors`.
+        :param vectors: The (chunks x dimensions) unit vectors, in chunk order.
+        :param n_lists: The number of clusters; defaults to about sqrt(len(vectors)).
+        :param n_probe: The default number of clusters to scan per query.
+        :param seed: The random seed for k-means.
+        :return: The built AnnIndex.
+        """
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(vectors)))
+        n_lists = max(1, min(n_lists, len(vectors)))
+
+        if n_lists == 1:
+            centroids = _normalize_rows(vectors.mean(axis=0, keepdims=True))
+            assignments = np.zeros(len(vectors), dtype=np.int64)
+        else:
+            kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3, batch_size=4096)
+            assignments = kmeans.fit_predict(vectors)
+            centroids = _normalize_rows(kmeans.cluster_centers_)
+
+        ids = np.argsort(assignments, kind="stable")
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+        return cls(embedder, centroids, list_offsets, ids, vectors[ids], n_probe=n_probe)
+
+    def search(self, query, k=10, n_probe=None, threshold=None):
+        """
+        Find approximately the k chunks most similar to a query.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param n_probe: The number of clusters to scan; defaults to the index setting.
+        :param threshold: If given, drop results scoring below it.
+        :return: A list of (chunk id, score) pairs ordered by descending score.
+        """
+        if n_probe is None:
+            n_probe = self.n_probe
+        query_vector = self.embedder.embed([query])[0]
+        n_lists = len(self.centroids)
+        probes = top_k(self.centroids @ query_vector, min(n_probe, n_lists))
+
+        candidate_ids = []
+        candidate_scores = []
+        for cluster, _ in probes:
+            start, end = self.list_offsets[cluster], self.list_offsets[cluster + 1]
+            candidate_ids.append(self.ids[start:end])
+            candidate_scores.append(self.vectors[start:end] @ query_vector)
+        if not candidate_ids:
+            return []
+
+        candidate_ids = np.concatenate(candidate_ids)
+        ranked = top_k(np.concatenate(candidate_scores), k, threshold)
+        return [(int(candidate_ids[i]), score) for i, score in ranked]
+
+    def exact_search(self, query, k=10, threshold=None):
+        """
+        Score every chunk; the reference the approximate search is measured against.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param threshold: If given, drop results scoring below it.
+        :return: A list of (chunk id, score) pairs ordered by descending score.
+        """
+        query_vector = self.embedder.embed([query])[0]
+        ranked = top_k(self.vectors @ query_vector, k, threshold)
+        return [(int(self.ids[i]), score) for i, score in ranked]
+
+    def save(self, path):
+        """
+        Write the index to a single .npz file, replacing it atomically.
+
+        :param path: The destination file path.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    centroids=self.centroids,
+                    list_offsets=self.list_offsets,
+                    ids=self.ids,
+                    vectors=self.vectors,
+                    n_probe=np.array(self.n_probe),
+                    **self.embedder.state(),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by `save`.
+
+        :param path: The .npz file path.
+        :return: The loaded AnnIndex.
+        """
+        with np.load(path) as data:
+            state = {name: data[name] for name in ("terms", "idf", "components") if name in data}
+            return cls(
+                LsaEmbedder.from_state(state),
+                data["centroids"],
+                data["list_offsets"],
+                data["ids"],
+                data["vectors"],
+                n_probe=int(data["n_probe"]),
+            )
@@ -0,0 +1,207 @@
+"""
+bill_graph.py
+
+This module contains the graph of related bills and its precomputed
+connected components ("bill families").
+
+Congress.gov lists only the direct relations of one bill at a time, so a
+family of companion, identical and procedurally related bills takes one
+upstream call per hop. Here every synced related-bills record is an edge
+between two bills. A union-find structure, with union by size and path
+halving, keeps each bill's family root, and each root keeps its member
+list. A family lookup is one find plus reading that list.
+
+Syncing new relations merges families in place. A re-sync that removes a
+relation cannot be undone in a union-find, so it marks the graph stale and
+the next lookup rebuilds it from the store. So do relations synced by the
+crawler, whose writes never reach this process's sync listeners.
+"""
+
+import threading
+
+from app.api.services import congress_store
+from app.api.services.congress_store import ChangeWatch, get_connection, on_sync
+
+RELATIONS_QUERY = """
+SELECT b.congress, b.bill_type, b.bill_number, r.related_congress, r.related_type, r.related_number,
+       r.relationship_type, r.identified_by
+FROM related_bills r JOIN bills b ON b.id = r.bill_id {where}
+"""
+
+# Bills per title query, keeping well under SQLite's limit on bound parameters.
+BATCH_SIZE = 300
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+class UnionFind:
+    """
+    Disjoint sets over integer nodes, growing as nodes are added.
+    """
+
+    def __init__(self):
+        self.parent = []
+        self.size = []
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        self.size.append(1)
+        return len(self.parent) - 1
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        """
+        Merge the sets of two nodes.
+
+        :return: A tuple of (surviving root, absorbed root), or None if they were already joined.
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return None
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a, b
+
+
+class BillGraph:
+    """
+    Bills linked by their related-bills records, grouped into families.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: A connection to the local store.
+        """
+        self.path = congress_store.DB_PATH
+        self.watch = ChangeWatch()
+        self.lock = threading.Lock()
+        self.stale = False
+        self.keys = []
+        self.nodes = {}
+        self.sets = UnionFind()
+        self.members = {}
+        self.edges = {}
+        self.bill_relations = {}
+
+        relations = {}
+        for row in connection.execute(RELATIONS_QUERY.format(where="")).fetchall():
+            relations.setdefault(tuple(row[:3]), set()).add(tuple(row[3:]))
+        for bill, bill_relations in relations.items():
+            self._add_relations(bill, bill_relations)
+
+    def _node(self, bill):
+        node = self.nodes.get(bill)
+        if node is None:
+            node = self.sets.add()
+            self.nodes[bill] = node
+            self.keys.append(bill)
+            self.members[node] = [node]
+        return node
+
+    def _add_relations(self, bill, relations):
+        source = self._node(bill)
+        for congress, bill_type, bill_number, relationship_type, identified_by in relations:
+            target = self._node((congress, bill_type, bill_number))
+            self.edges.setdefault(source, set()).add((target, relationship_type, identified_by))
+            merged = self.sets.union(source, target)
+            if merged is not None:
+                root, absorbed = merged
+                self.members[root].extend(self.members.pop(absorbed))
+        self.bill_relations[bill] = self.bill_relations.get(bill, set()) | set(relations)
+
+    def update_bill(self, connection, bill):
+        """
+        Apply a re-sync of one bill's related bills.
+        """
+        rows = connection.execute(
+            RELATIONS_QUERY.format(where="WHERE b.congress = ? AND b.bill_type = ? AND b.bill_number = ?"), bill
+        ).fetchall()
+        relations = {tuple(row[3:]) for row in rows}
+        with self.lock:
+            if self.bill_relations.get(bill, set()) - relations:
+                self.stale = True
+            else:
+                self._add_relations(bill, relations)
+
+    def family(self, bill):
+        """
+        Return the bills connected to a bill and the relations among them.
+
+        :param bill: A (congress, bill_type, bill_number) tuple.
+        :return: A tuple of (member bill tuples, relation dicts), or None if the bill has no relations.
+        """
+        with self.lock:
+            node = self.nodes.get(bill)
+            if node is None:
+                return None
+            members = sorted(self.members[self.sets.find(node)])
+            relations = [
+                {"bill": self.keys[source], "related_bill": self.keys[target],
+                 "relationship_type": relationship_type, "identified_by": identified_by}
+                for source in members
+                for target, relationship_type, identified_by in sorted(self.edges.get(source, ()), key=str)
+            ]
+            return [self.keys[member] for member in members], relations
+
+
+def get_bill_graph():
+    """
+    Return the related-bills graph, building or rebuilding it from the store when needed.
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None or _graph.stale or _graph.watch.changed():
+            _graph = BillGraph(get_connection())
+        return _graph
+
+
+@on_sync
+def _update_on_sync(resource, congress, bill_type, bill_number):
+    if resource == "related-bills" and _graph is not None and _graph.path == congress_store.DB_PATH:
+        _graph.update_bill(get_connection(), (congress, bill_type, bill_number))
+
+
+def bill_family(congress, bill_type, bill_number):
+    """
+    Look up the family of companion, identical and otherwise related bills of a bill.
+
+    :param congress: The congress number.
+    :param bill_type: The bill type (e.g., hr, s, hjres, etc.).
+    :param bill_number: The bill's assigned number.
+    :return: A dict with the family's bills (with stored titles) and relations, or None if the
+        bill has no synced relations.
+    """
+    family = get_bill_graph().family((int(congress), bill_type.lower(), int(bill_number)))
+    if family is None:
+        return None
+    members, relations = family
+    titles = {}
+    connection = get_connection()
+    for start in range(0, len(members), BATCH_SIZE):
+        batch = members[start:start + BATCH_SIZE]
+        rows = connection.execute(
+            "SELECT congress, bill_type, bill_number, title FROM bills "
+            f"WHERE (congress, bill_type, bill_number) IN (VALUES {','.join(['(?, ?, ?)'] * len(batch))})",
+            [part for member in batch for part in member],
+        ).fetchall()
+        titles.update({tuple(row[:3]): row["title"] for row in rows})
+
+    def describe(bill):
+        return {"congress": bill[0], "bill_type": bill[1], "bill_number": bill[2]}
+
+    return {
+        "bills": [{**describe(member), "title": titles.get(member)} for member in members],
+        "relations": [
+            {**relation, "bill": describe(relation["bill"]), "related_bill": describe(relation["related_bill"])}
+            for relation in relations
+        ],
+    }
@@ -0,0 +1,229 @@
+"""
+bill_search.py
+
+This module keeps a persistent BM25 index over locally synced bill titles,
+summaries and actions, so "which bills mention X" can be answered for a
+whole congress without calling Congress.gov once per bill.
+
+Each (bill, field) pair is one document in the index. Syncing a field again
+replaces its document, so the index can be fed incrementally whenever fresh
+data is fetched.
+
+Several processes feed the index: every API worker and the crawler. Each
+process saves its copy to its own shard file under BILL_INDEX_DIR, named by
+process ID, and merges the other shards in when they change, keeping the
+newest copy of every document. Shards of processes that have exited are
+deleted once their documents are saved in this process's shard.
+"""
+
+import glob
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+
+from app.api.config import DATA_DIR
+from app.api.services.bm25 import Bm25Index
+
+logger = logging.getLogger(__name__)
+
+BILL_INDEX_DIR = os.path.join(DATA_DIR, "bill_search")
+FLUSH_INTERVAL = 30.0
+# Compact the index before saving once this fraction of its documents are replaced versions.
+COMPACT_RATIO = 0.25
+FIELDS = ("titles", "summaries", "actions")
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+_index = None
+_index_lock = threading.Lock()
+_last_flush = 0.0
+_last_merge = 0.0
+_dirty = False
+# Shard path -> modification time when it was last merged.
+_merged_shards = {}
+
+
+def shard_path(pid=None):
+    """
+    Return the path of a process's shard of the index.
+
+    :param pid: The process ID; defaults to this process.
+    """
+    return os.path.join(BILL_INDEX_DIR, f"{os.getpid() if pid is None else pid}.npz")
+
+
+def get_bill_index():
+    """
+    Return the process-wide bill index, loading it from the shards on disk on first use
+    and merging in other processes' shards at most once per FLUSH_INTERVAL.
+
+    :return: The Bm25Index over bill fields.
+    """
+    global _index, _last_flush, _last_merge
+    with _index_lock:
+        if _index is None:
+            _index = Bm25Index()
+            _merged_shards.clear()
+            _last_flush = time.monotonic()
+        if _last_merge == 0.0 or time.monotonic() - _last_merge >= FLUSH_INTERVAL:
+            _merge_shards()
+            _last_merge = time.monotonic()
+        return _index
+
+
+def _merge_shards():
+    """
+    Merge every shard that changed since it was last merged into the index. Requires _index_lock.
+    """
+    global _dirty
+    own = shard_path()
+    for path in glob.glob(os.path.join(BILL_INDEX_DIR, "*.npz")):
+        try:
+            mtime = os.path.getmtime(path)
+            if _merged_shards.get(path) == mtime:
+                continue
+            taken = _index.merge(Bm25Index.load(path))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            logger.warning("Skipping unreadable bill search shard %s", path, exc_info=True)
+            continue
+        _merged_shards[path] = mtime
+        if taken and path != own:
+            _dirty = True
+
+
+def _remove_exited_shards():
+    """
+    Delete merged shards of processes that have exited. Requires _index_lock and a saved own shard.
+    """
+    if os.name != "posix":
+        return
+    for path, mtime in list(_merged_shards.items()):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if path == shard_path() or not name.isdigit() or _process_alive(int(name)):
+            continue
+        try:
+            if os.path.getmtime(path) == mtime:
+                os.unlink(path)
+        except OSError:
+            pass
+        del _merged_shards[path]
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def bill_document_key(congress, bill_type, bill_number, field):
+    """
+    Build the document key for one field of a bill.
+    """
+    return f"{congress}/{bill_type.lower()}/{bill_number}/{field}"
+
+
+def parse_document_key(key):
+    """
+    Split a document key back into its parts.
+
+    :return: A (congress, bill_type, bill_number, field) tuple.
+    """
+    congress, bill_type, bill_number, field = key.split("/")
+    return int(congress), bill_type, int(bill_number), field
+
+
+def field_text(field, response):
+    """
+    Extract the searchable text from a Congress.gov bill sub-resource response.
+
+    :param field: One of FIELDS.
+    :param response: The JSON returned by get_bill_titles, get_bill_summaries or get_bill_actions.
+    :return: The text to index.
+    """
+    if field == "titles":
+        parts = [title.get("title", "") for title in response.get("titles", [])]
+    elif field == "summaries":
+        parts = [_TAG_PATTERN.sub(" ", summary.get("text", "")) for summary in response.get("summaries", [])]
+    elif field == "actions":
+        parts = [action.get("text", "") for action in response.get("actions", [])]
+    else:
+        raise ValueError(f"Unknown bill search field: {field}")
+    return "\n".join(parts)
+
+
+def index_bill_field(congress, bill_type, bill_number, field, response):
+    """
+    Add or replace one field of a bill in the search index.
+
+    :param congress: The congress number.
+    :param bill_type: The type of bill (e.g., hr, s, hjres, etc.).
+    :param bill_number: The bill's assigned number.
+    :param field: One of FIELDS.
+    :param response: The Congress.gov JSON for that field.
+    """
+    global _dirty
+    text = field_text(field, response)
+    index = get_bill_index()
+    with _index_lock:
+        index.add(bill_document_key(congress, bill_type, bill_number, field), text, group=int(congress))
+        _dirty = True
+    maybe_flush()
+
+
+def maybe_flush(force=False):
+    """
+    Persist the index if it has changed and FLUSH_INTERVAL has elapsed.
+
+    :param force: Save any pending changes regardless of the interval.
+    """
+    global _dirty, _last_flush
+    with _index_lock:
+        if _index is None or not _dirty:
+            return
+        if not force and time.monotonic() - _last_flush < FLUSH_INTERVAL:
+            return
+        if _index.tombstone_ratio() > COMPACT_RATIO:
+            _index.compact()
+        path = shard_path()
+        _index.save(path)
+        _merged_shards[path] = os.path.getmtime(path)
+        _dirty = False
+        _last_flush = time.monotonic()
+        _remove_exited_shards()
+
+
+def search_bills(query, congress=None, limit=10):
+    """
+    Find the bills whose titles, summaries or actions best match a query.
+
+    :param query: The search query string.
+    :param congress: If given, only search bills from this congress.
+    :param limit: The maximum number of bills to return.
+    :return: A list of dicts with congress, bill_type, bill_number, field and score,
+             one per bill, ordered by descending score.
+    """
+    index = get_bill_index()
+    with _index_lock:
+        # Each bill has at most len(FIELDS) documents, so this is enough to fill `limit` bills.
+        hits = index.search(query, k=limit * len(FIELDS), group=congress)
+
+    results = {}
+    for key, score in hits:
+        bill_congress, bill_type, bill_number, field = parse_document_key(key)
+        bill = (bill_congress, bill_type, bill_number)
+        if bill not in results:
+            results[bill] = {
+                "congress": bill_congress,
+                "bill_type": bill_type,
+                "bill_number": bill_number,
+                "field": field,
+                "score": score,
+            }
+    return list(results.values())[:limit]
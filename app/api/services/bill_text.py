@@ -0,0 +1,291 @@
+"""
+bill_text.py
+
+This module downloads, parses, chunks and indexes the full text of a bill so
+questions can be answered from it.
+
+Each stage is a generator feeding the next: the download is streamed to disk
+block by block, the markup is parsed incrementally as blocks arrive, parsed
+text is cut into chunks along the bill's sections, and chunks are added to a
+content-addressed chunk store in batches. No stage ever holds the whole
+document as one string, so omnibus bills thousands of pages long are
+processed in bounded working memory. Text shared between versions of a bill
+is indexed only once. Documents are cached per (bill, text version) for
+repeat questions, and a repeat question for the same requested version is
+answered without listing the bill's text versions again. A request for the
+latest version lists them again after LATEST_VERSION_TTL, so a newly
+published version is picked up.
+"""
+
+import codecs
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+import requests
+from fastapi import HTTPException
+
+from app.api.config import DATA_DIR
+from app.api.services.congress_api import get_bill_text_versions
+from app.api.services.chunk_store import ChunkStore
+from app.api.services.hashing_index import HashingIndex
+from app.api.services.legislative_chunking import iter_section_chunks, section_mask
+from app.api.services.semantic_search import top_k
+
+BILL_TEXT_DIR = os.path.join(DATA_DIR, "bill_text")
+BILL_TEXT_CACHE_SIZE = 16
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+CHUNK_SIZE = 1000
+LATEST_VERSION_TTL = float(os.getenv("BILL_TEXT_LATEST_TTL", 3600))
+# Parseable formats in order of preference; PDFs are skipped.
+FORMAT_PREFERENCE = ("Formatted XML", "Formatted Text")
+
+_BLOCK_TAGS = {
+    "p", "div", "br", "section", "title", "subtitle", "division", "subsection", "paragraph",
+    "subparagraph", "clause", "subclause", "item", "subitem", "toc-entry",
+    "legis-body", "quoted-block", "table", "tr", "li", "h1", "h2", "h3", "h4",
+}
+# Bill XML gives the number of a section or title in an <enum> child; these
+# prefixes restore the printed "SEC. 2." / "TITLE I" headers.
+_ENUM_PREFIXES = {"section": "SEC. ", "title": "TITLE ", "subtitle": "Subtitle ", "division": "DIVISION "}
+_WHITESPACE_RUN = re.compile(r"[ \t\r\f\v]+")
+
+chunk_store = ChunkStore()
+_documents = OrderedDict()
+# (congress, bill type, bill number, requested version or None) -> (key of the cached document, time resolved).
+_requested = {}
+_documents_lock = threading.Lock()
+
+
+class BillTextDocument:
+    """
+    The indexed full text of one version of a bill, held in the shared chunk store.
+    """
+
+    def __init__(self, key, version_type, url, sections, new_chunks):
+        self.key = key
+        self.doc_key = _doc_key(key)
+        self.version_type = version_type
+        self.url = url
+        self.sections = sections
+        self.new_chunks = new_chunks
+        self.chunks = chunk_store.chunks(self.doc_key)
+        self._own_index = None
+        self._own_index_lock = threading.Lock()
+
+    def _evicted_index(self):
+        """
+        Return an index of this document's own chunks, built once after it left the shared store.
+        """
+        with self._own_index_lock:
+            if self._own_index is None:
+                index = HashingIndex()
+                index.append(self.chunks)
+                self._own_index = index
+            return self._own_index
+
+    def search(self, query, k=5, threshold=0.1, **filters):
+        """
+        Find the chunks most relevant to a query, optionally within part of the bill.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param threshold: The minimum relevance score to consider a match.
+        :param filters: division, title, subtitle and/or section to restrict the search to.
+        :return: A list of (chunk position, score) pairs ordered by descending score.
+        """
+        mask = None
+        if any(value is not None for value in filters.values()):
+            mask = section_mask(self.sections, **filters)
+        try:
+            return chunk_store.search(self.doc_key, query, k, threshold, mask=mask)
+        except KeyError:
+            # Evicted from the cache while still in use: score this document's own chunks instead.
+            scores = self._evicted_index().scores(query)
+            if mask is not None:
+                scores[~mask] = 0.0
+            return top_k(scores, k, threshold)
+
+
+def select_text_version(text_versions, version=None):
+    """
+    Pick the text version to read and the best parseable format for it.
+
+    :param text_versions: The textVersions list from get_bill_text_versions.
+    :param version: A version type such as "Introduced in House"; defaults to the latest.
+    :return: A tuple of (version type, format URL, format type).
+    :raises HTTPException: If no matching version has an HTML or XML format.
+    """
+    candidates = text_versions
+    if version is not None:
+        candidates = [v for v in text_versions if (v.get("type") or "").lower() == version.lower()]
+    # Undated versions (e.g. enrolled bills awaiting a date) sort as the newest.
+    candidates = sorted(candidates, key=lambda v: v.get("date") or "9999", reverse=True)
+
+    for candidate in candidates:
+        formats = {f.get("type"): f.get("url") for f in candidate.get("formats", [])}
+        for format_type in FORMAT_PREFERENCE:
+            if formats.get(format_type):
+                return candidate.get("type"), formats[format_type], format_type
+    raise HTTPException(status_code=404, detail="No HTML or XML text available for this bill version")
+
+
+def stream_to_disk(url, path, block_size=DOWNLOAD_BLOCK_SIZE):
+    """
+    Yield the bytes of a text version block by block, saving them to disk on the way.
+
+    A previously completed download is read back from disk instead.
+
+    :param url: The text format URL.
+    :param path: Where to keep the downloaded file.
+    :param block_size: The size of each block in bytes.
+    """
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                yield block
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f, requests.get(url, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail="Error fetching bill text")
+            for block in response.iter_content(chunk_size=block_size):
+                f.write(block)
+                yield block
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Collects character data from HTML or bill XML, breaking lines at block elements.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces = []
+        self.last_block = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.pieces.append("\n")
+            self.last_block = tag
+        elif tag == "enum" and self.last_block in _ENUM_PREFIXES:
+            self.pieces.append(_ENUM_PREFIXES[self.last_block])
+
+    def handle_endtag(self, tag):
+        if tag in _BLOCK_TAGS or tag == "header":
+            self.pieces.append("\n")
+        elif tag == "enum":
+            self.pieces.append(" ")
+        self.last_block = None
+
+    def handle_data(self, data):
+        self.pieces.append(data)
+
+    def drain(self):
+        pieces, self.pieces = self.pieces, []
+        return "".join(pieces)
+
+
+def parse_blocks(blocks):
+    """
+    Incrementally extract plain text from blocks of HTML or XML bytes.
+
+    :param blocks: An iterable of byte blocks.
+    :return: A generator of text pieces, in document order.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = _TextExtractor()
+    for block in blocks:
+        parser.feed(decoder.decode(block))
+        text = parser.drain()
+        if text:
+            yield _WHITESPACE_RUN.sub(" ", text)
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    text = parser.drain()
+    if text:
+        yield _WHITESPACE_RUN.sub(" ", text)
+
+
+def _doc_key(key):
+    return "/".join(str(part) for part in key)
+
+
+def _record_sections(chunks, sections):
+    """
+    Pass chunk texts through, collecting their SectionChunk metadata on the way.
+    """
+    for text, section in chunks:
+        sections.append(section)
+        yield text
+
+
+def _download_path(congress, bill_type, bill_number, version_type, format_type):
+    safe_version = re.sub(r"\W+", "-", version_type or "latest").strip("-").lower()
+    extension = "xml" if "XML" in format_type else "htm"
+    return os.path.join(BILL_TEXT_DIR, f"{congress}-{bill_type.lower()}-{bill_number}-{safe_version}.{extension}")
+
+
+def get_bill_text_document(congress, bill_type, bill_number, api_key, version=None):
+    """
+    Return the indexed text of a bill version, running the pipeline on a cache miss.
+
+    :param congress: The congress number.
+    :param bill_type: The type of bill (e.g., hr, s, hjres, etc.).
+    :param bill_number: The bill's assigned number.
+    :param api_key: The Congress.gov API key.
+    :param version: A text version type; defaults to the latest version.
+    :return: A BillTextDocument.
+    """
+    requested = (congress, bill_type.lower(), bill_number, version.lower() if version else None)
+    with _documents_lock:
+        key, resolved_at = _requested.get(requested, (None, None))
+        # Which version is the latest can change; a named version always means the same one.
+        fresh = version is not None or (
+            resolved_at is not None and time.monotonic() - resolved_at <= LATEST_VERSION_TTL
+        )
+        if fresh and key in _documents:
+            _documents.move_to_end(key)
+            return _documents[key]
+
+    text_versions = get_bill_text_versions(congress, bill_type, bill_number, api_key).get("textVersions", [])
+    version_type, url, format_type = select_text_version(text_versions, version)
+    key = (congress, bill_type.lower(), bill_number, version_type)
+
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _requested[requested] = (key, time.monotonic())
+            _documents.move_to_end(key)
+            return document
+
+    path = _download_path(congress, bill_type, bill_number, version_type, format_type)
+    blocks = stream_to_disk(url, path)
+    sections = []
+    chunks = _record_sections(iter_section_chunks(parse_blocks(blocks), CHUNK_SIZE), sections)
+    new_chunks = chunk_store.add_document(_doc_key(key), chunks)
+    document = BillTextDocument(key, version_type, url, sections, new_chunks)
+
+    with _documents_lock:
+        _documents[key] = document
+        _requested[requested] = (key, time.monotonic())
+        _documents.move_to_end(key)
+        while len(_documents) > BILL_TEXT_CACHE_SIZE:
+            evicted_key, evicted = _documents.popitem(last=False)
+            for alias in [alias for alias, (target, _) in _requested.items() if target == evicted_key]:
+                del _requested[alias]
+            chunk_store.remove_document(evicted.doc_key)
+    return document
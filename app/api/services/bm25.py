@@ -0,0 +1,357 @@
+"""
+bm25.py
+
+This module contains an inverted index with Okapi BM25 scoring.
+
+Postings are kept compact: for every term, the document ordinals are stored
+as a delta-encoded uint32 array alongside a uint16 array of term frequencies.
+Documents can be added at any time; new postings are buffered and appended to
+the compact arrays on the next search. Replacing or deleting a document
+tombstones its old ordinal until the index is compacted. Every document
+records when it was added, so indexes built by different processes can be
+merged with the newest copy of each document winning.
+"""
+
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from app.api.services.semantic_search import top_k
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# Bill references such as "H.R. 1234", "S. 56" or "H.J.Res. 7", which the word
+# pattern would split into single letters and a bare number.
+BILL_TYPE_PATTERNS = {
+    "hconres": r"h\.?\s?con\.?\s?res",
+    "hjres": r"h\.?\s?j\.?\s?res",
+    "hres": r"h\.?\s?res",
+    "hr": r"h\.?\s?r",
+    "sconres": r"s\.?\s?con\.?\s?res",
+    "sjres": r"s\.?\s?j\.?\s?res",
+    "sres": r"s\.?\s?res",
+    "s": r"s\.",
+}
+BILL_REFERENCE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in BILL_TYPE_PATTERNS.items()) + r")\.?\s?(?P<number>\d+)\b",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text):
+    """
+    Split text into lowercase terms, the same way TfidfVectorizer does.
+
+    Bill references also produce one combined term, e.g. "H.R. 1234" adds "hr1234".
+
+    :param text: The input text.
+    :return: A list of terms.
+    """
+    terms = TOKEN_PATTERN.findall(text.lower())
+    for match in BILL_REFERENCE_PATTERN.finditer(text):
+        bill_type = next(name for name in BILL_TYPE_PATTERNS if match.group(name))
+        term = bill_type + match.group("number")
+        if match.group(0).lower() != term:
+            # "HR1234" is already a single word token.
+            terms.append(term)
+    return terms
+
+
+class Bm25Index:
+    """
+    An incrementally updatable BM25 index over keyed documents.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        """
+        :param k1: BM25 term frequency saturation.
+        :param b: BM25 document length normalisation.
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_keys = []
+        self.doc_lengths = np.zeros(0, dtype=np.uint32)
+        self.doc_groups = np.zeros(0, dtype=np.int32)
+        self.doc_versions = np.zeros(0, dtype=np.float64)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.key_to_doc = {}
+        self.total_length = 0
+        # term -> (delta-encoded doc ordinals, term frequencies, last doc ordinal)
+        self.postings = {}
+        self.pending = {}
+        self.pending_docs = []
+
+    def __len__(self):
+        return len(self.key_to_doc)
+
+    def add(self, key, text, group=0, version=None):
+        """
+        Add a document, replacing any earlier document with the same key.
+
+        :param key: A unique string identifying the document.
+        :param text: The document text.
+        :param group: An integer the document can be filtered by at search time.
+        :param version: When the text was fetched, as a Unix timestamp; defaults to now.
+        """
+        self.delete(key)
+        doc = len(self.doc_keys)
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            docs, freqs = self.pending.setdefault(term, ([], []))
+            docs.append(doc)
+            freqs.append(min(count, np.iinfo(np.uint16).max))
+
+        self.doc_keys.append(key)
+        self.pending_docs.append((len(terms), group, time.time() if version is None else version))
+        self.key_to_doc[key] = doc
+        self.total_length += len(terms)
+
+    def delete(self, key):
+        """
+        Tombstone the document with the given key, if present.
+
+        :param key: The document key.
+        """
+        doc = self.key_to_doc.pop(key, None)
+        if doc is None:
+            return
+        self._flush_pending()
+        self.deleted[doc] = True
+        self.total_length -= int(self.doc_lengths[doc])
+
+    def flush(self):
+        """
+        Merge buffered postings into the compact arrays, e.g. before sharing the index between threads.
+        """
+        self._flush_pending()
+
+    def tombstone_ratio(self):
+        """
+        Return the fraction of document ordinals that are tombstoned.
+        """
+        self._flush_pending()
+        return float(self.deleted.mean()) if len(self.deleted) else 0.0
+
+    def _flush_pending(self):
+        """
+        Append buffered postings and document statistics to the compact arrays.
+        """
+        if self.pending_docs:
+            lengths, groups, versions = zip(*self.pending_docs)
+            self.doc_lengths = np.concatenate([self.doc_lengths, np.array(lengths, dtype=np.uint32)])
+            self.doc_groups = np.concatenate([self.doc_groups, np.array(groups, dtype=np.int32)])
+            self.doc_versions = np.concatenate([self.doc_versions, np.array(versions, dtype=np.float64)])
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(lengths), dtype=bool)])
+            self.pending_docs = []
+
+        for term, (docs, freqs) in self.pending.items():
+            docs = np.array(docs, dtype=np.int64)
+            deltas, old_freqs, last = self.postings.get(term, (None, None, 0))
+            new_deltas = np.diff(docs, prepend=last).astype(np.uint32)
+            new_freqs = np.array(freqs, dtype=np.uint16)
+            if deltas is not None:
+                new_deltas = np.concatenate([deltas, new_deltas])
+                new_freqs = np.concatenate([old_freqs, new_freqs])
+            self.postings[term] = (new_deltas, new_freqs, int(docs[-1]))
+        self.pending = {}
+
+    def scores(self, query, group=None):
+        """
+        Compute the BM25 score of every document ordinal for a query.
+
+        Document counts and frequencies only include live documents, so
+        tombstones awaiting `compact` do not skew IDF.
+
+        :param query: The search query string.
+        :param group: If given, only score documents in this group.
+        :return: A 1-D float32 array indexed by document ordinal.
+        """
+        self._flush_pending()
+        scores = np.zeros(len(self.doc_keys), dtype=np.float32)
+        live = len(self.key_to_doc)
+        if live == 0:
+            return scores
+
+        avg_length = max(self.total_length / live, 1.0)
+        norms = self.k1 * (1 - self.b + self.b * self.doc_lengths / avg_length)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            deltas, freqs, _ = posting
+            docs = np.cumsum(deltas, dtype=np.int64)
+            df = int(np.count_nonzero(~self.deleted[docs]))
+            if df == 0:
+                continue
+            idf = np.log(1 + (live - df + 0.5) / (df + 0.5))
+            tf = freqs.astype(np.float32)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norms[docs])
+
+        scores[self.deleted] = 0.0
+        if group is not None:
+            scores[self.doc_groups != group] = 0.0
+        return scores
+
+    def search(self, query, k=10, group=None):
+        """
+        Find the best matching documents for a query.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param group: If given, only return documents in this group.
+        :return: A list of (document key, score) pairs ordered by descending score.
+        """
+        ranked = top_k(self.scores(query, group), k, threshold=np.finfo(np.float32).tiny)
+        return [(self.doc_keys[doc], score) for doc, score in ranked]
+
+    def compact(self):
+        """
+        Drop tombstoned documents and renumber the remaining ones.
+        """
+        self._flush_pending()
+        keep = ~self.deleted
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+
+        postings = {}
+        for term, (deltas, freqs, _) in self.postings.items():
+            docs = np.cumsum(deltas, dtype=np.int64)
+            alive = keep[docs]
+            if not alive.any():
+                continue
+            docs = remap[docs[alive]]
+            postings[term] = (np.diff(docs, prepend=0).astype(np.uint32), freqs[alive], int(docs[-1]))
+
+        self.postings = postings
+        self.doc_keys = [key for key, alive in zip(self.doc_keys, keep) if alive]
+        self.doc_lengths = self.doc_lengths[keep]
+        self.doc_groups = self.doc_groups[keep]
+        self.doc_versions = self.doc_versions[keep]
+        self.deleted = np.zeros(len(self.doc_keys), dtype=bool)
+        self.key_to_doc = {key: doc for doc, key in enumerate(self.doc_keys)}
+
+    def merge(self, other):
+        """
+        Take every live document of another index that is newer than this index's copy.
+
+        :param other: A Bm25Index, e.g. one saved by another process.
+        :return: The number of documents taken.
+        """
+        self._flush_pending()
+        other._flush_pending()
+        take = np.zeros(len(other.doc_keys), dtype=bool)
+        for key, doc in other.key_to_doc.items():
+            mine = self.key_to_doc.get(key)
+            take[doc] = mine is None or other.doc_versions[doc] > self.doc_versions[mine]
+        taken = np.flatnonzero(take)
+        if not len(taken):
+            return 0
+
+        for doc in taken:
+            self.delete(other.doc_keys[doc])
+        self._flush_pending()
+        # Taken documents are appended in their order in `other`, so each posting stays sorted.
+        remap = len(self.doc_keys) + np.cumsum(take, dtype=np.int64) - 1
+        for term, (deltas, freqs, _) in other.postings.items():
+            docs = np.cumsum(deltas, dtype=np.int64)
+            keep = take[docs]
+            if keep.any():
+                pending_docs, pending_freqs = self.pending.setdefault(term, ([], []))
+                pending_docs.extend(remap[docs[keep]].tolist())
+                pending_freqs.extend(freqs[keep].tolist())
+        for doc in taken:
+            key = other.doc_keys[doc]
+            self.key_to_doc[key] = len(self.doc_keys)
+            self.doc_keys.append(key)
+            self.pending_docs.append((int(other.doc_lengths[doc]), int(other.doc_groups[doc]),
+                                      float(other.doc_versions[doc])))
+            self.total_length += int(other.doc_lengths[doc])
+        return len(taken)
+
+    def save(self, path):
+        """
+        Write the index to a single .npz file, replacing it atomically.
+
+        :param path: The destination file path.
+        """
+        self._flush_pending()
+        terms = list(self.postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self.postings[term][0]) for term in terms])
+        empty = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint16))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    params=np.array([self.k1, self.b]),
+                    terms=_encode_strings(terms),
+                    doc_keys=_encode_strings(self.doc_keys),
+                    offsets=offsets,
+                    deltas=np.concatenate([self.postings[t][0] for t in terms] or [empty[0]]),
+                    freqs=np.concatenate([self.postings[t][1] for t in terms] or [empty[1]]),
+                    doc_lengths=self.doc_lengths,
+                    doc_groups=self.doc_groups,
+                    doc_versions=self.doc_versions,
+                    deleted=self.deleted,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by `save`.
+
+        :param path: The .npz file path.
+        :return: The loaded Bm25Index.
+        """
+        with np.load(path) as data:
+            k1, b = data["params"]
+            index = cls(k1=float(k1), b=float(b))
+            terms = _decode_strings(data["terms"])
+            index.doc_keys = _decode_strings(data["doc_keys"])
+            offsets = data["offsets"]
+            deltas = data["deltas"]
+            freqs = data["freqs"]
+            index.doc_lengths = data["doc_lengths"]
+            index.doc_groups = data["doc_groups"]
+            index.deleted = data["deleted"]
+            if "doc_versions" in data:
+                index.doc_versions = data["doc_versions"]
+            else:
+                index.doc_versions = np.zeros(len(index.doc_keys), dtype=np.float64)
+
+        for i, term in enumerate(terms):
+            term_deltas = deltas[offsets[i]:offsets[i + 1]]
+            index.postings[term] = (term_deltas, freqs[offsets[i]:offsets[i + 1]], int(term_deltas.sum(dtype=np.int64)))
+        index.key_to_doc = {
+            key: doc for doc, key in enumerate(index.doc_keys) if not index.deleted[doc]
+        }
+        index.total_length = int(index.doc_lengths[~index.deleted].sum(dtype=np.int64))
+        return index
+
+
+def _encode_strings(strings):
+    """
+    Pack strings into one newline-separated UTF-8 byte array.
+    """
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_strings(buffer):
+    """
+    Unpack strings written by `_encode_strings`.
+    """
+    text = buffer.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
@@ -0,0 +1,124 @@
+"""
+bulk_ingest.py
+
+This module indexes large batches of bill text, such as every bill of a
+congress, across all CPU cores.
+
+Documents are split into partitions and sent to a ProcessPoolExecutor. Each
+worker parses, chunks and hashes its partition and writes the chunk texts and
+the sparse term-count matrix to a temporary .npz file; only the file path is
+sent back, so large arrays are never pickled between processes. The parent
+merges the partitions, in order, into one HashingIndex. Hashing needs no
+shared vocabulary, so workers are fully independent.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from app.api.services.bill_text import CHUNK_SIZE, parse_blocks
+from app.api.services.hashing_index import N_FEATURES, HashingIndex
+from app.api.services.legislative_chunking import iter_section_chunks
+
+PARTITION_SIZE = 16
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def _read_blocks(path):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+
+def _document_chunks(key, text):
+    """
+    Chunk one document; documents given without text are read and parsed from the file at `key`.
+    """
+    pieces = [text] if text is not None else parse_blocks(_read_blocks(key))
+    return [chunk for chunk, _ in iter_section_chunks(pieces, CHUNK_SIZE)]
+
+
+def _process_partition(partition, out_dir, n_features):
+    """
+    Chunk and hash one partition of documents in a worker process.
+
+    :param partition: A list of (document key, text or None) pairs.
+    :param out_dir: The directory to write the result file to.
+    :param n_features: The number of hash buckets.
+    :return: The path of an .npz file holding the chunks, their keys and their counts.
+    """
+    chunks, keys = [], []
+    for key, text in partition:
+        document_chunks = _document_chunks(key, text)
+        chunks.extend(document_chunks)
+        keys.extend(f"{key}#{i}" for i in range(len(document_chunks)))
+
+    counts = sparse.csr_matrix(HashingIndex(n_features).hash_counts(chunks), dtype=np.float32)
+    fd, path = tempfile.mkstemp(dir=out_dir, suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            data=counts.data, indices=counts.indices, indptr=counts.indptr,
+            chunks=_pack(chunks), keys=_pack(keys),
+        )
+    return path
+
+
+def _pack(strings):
+    """
+    Pack strings, which may contain newlines, into a byte buffer and offsets.
+    """
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.concatenate([offsets.view(np.uint8), np.frombuffer(b"".join(encoded), dtype=np.uint8)])
+
+
+def _unpack(packed, count):
+    offsets = packed[:(count + 1) * 8].view(np.int64)
+    buffer = packed[(count + 1) * 8:].tobytes()
+    return [buffer[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+
+
+def _load_partition(path, n_features):
+    with np.load(path) as data:
+        indptr = data["indptr"]
+        count = len(indptr) - 1
+        counts = sparse.csr_matrix((data["data"], data["indices"], indptr), shape=(count, n_features))
+        return _unpack(data["chunks"], count), _unpack(data["keys"], count), counts
+
+
+def bulk_index(documents, workers=None, partition_size=PARTITION_SIZE, n_features=N_FEATURES, index=None):
+    """
+    Chunk and hash documents in parallel and merge them into one index.
+
+    :param documents: An iterable of (document key, text) pairs. A text of None
+        means the key is the path of a downloaded HTML or XML bill text.
+    :param workers: The number of worker processes; defaults to the CPU count.
+    :param partition_size: The number of documents per worker task.
+    :param n_features: The number of hash buckets.
+    :param index: An existing HashingIndex to append to.
+    :return: The HashingIndex. Chunk keys are "<document key>#<chunk number>".
+    """
+    if index is None:
+        index = HashingIndex(n_features)
+    documents = list(documents)
+    partitions = [documents[i:i + partition_size] for i in range(0, len(documents), partition_size)]
+
+    with tempfile.TemporaryDirectory(prefix="bulk-ingest-") as out_dir:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_process_partition, p, out_dir, n_features) for p in partitions]
+            # Merge in submission order so chunk ids do not depend on scheduling.
+            for future in futures:
+                path = future.result()
+                chunks, keys, counts = _load_partition(path, n_features)
+                os.unlink(path)
+                index.append(chunks, keys=keys, counts=counts)
+    return index
+
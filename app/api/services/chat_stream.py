@@ -0,0 +1,73 @@
+"""
+chat_stream.py
+
+This module contains the server-sent events pipeline behind /chat/stream.
+
+The chat steps run as an async generator that reports progress as it goes:
+an acknowledgment is sent before any upstream call is made, each ranked
+passage is sent as soon as scoring completes, and per-stage timings close the
+stream. The blocking steps (member fetch, chunking, scoring) run in the
+thread pool, so the event loop keeps serving other clients meanwhile.
+"""
+
+import json
+import time
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.api.services import member_document
+from app.api.services.hybrid_search import hybrid_search
+
+
+def sse_event(event, data):
+    """
+    Format one server-sent event.
+
+    :param event: The event name.
+    :param data: A JSON-serialisable payload.
+    :return: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def chat_events(question, member_id, api_key, top_k=3, retrieval="tfidf"):
+    """
+    Answer a question about a member of Congress as a stream of events.
+
+    Emits "ack", then one "passage" per ranked chunk (best first), then
+    "timings" and finally "done". Upstream failures are reported as an
+    "error" event, since the response status has already been sent.
+
+    :param question: The question to ask.
+    :param member_id: The bioguide ID of the member.
+    :param api_key: The Congress.gov API key.
+    :param top_k: The maximum number of passages to send.
+    :param retrieval: "tfidf" or "hybrid".
+    :return: An async generator of encoded events.
+    """
+    start = time.perf_counter()
+    yield sse_event("ack", {"member_id": member_id, "question": question})
+
+    try:
+        document = await run_in_threadpool(member_document.get_member_document, member_id, api_key)
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        return
+    fetched = time.perf_counter()
+
+    if retrieval == "hybrid":
+        ranked, _ = await run_in_threadpool(hybrid_search, question, document.chunks, top_k)
+    else:
+        ranked = await run_in_threadpool(document.index.search, question, top_k)
+    scored = time.perf_counter()
+
+    for i, score in ranked:
+        yield sse_event("passage", {"index": i, "text": document.chunks[i], "score": score})
+
+    yield sse_event("timings", {
+        "fetch_ms": (fetched - start) * 1000,
+        "search_ms": (scored - fetched) * 1000,
+        "total_ms": (time.perf_counter() - start) * 1000,
+    })
+    yield sse_event("done", {"passages": len(ranked)})
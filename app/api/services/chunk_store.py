@@ -0,0 +1,197 @@
+"""
+chunk_store.py
+
+This module contains a content-addressed store of indexed chunks.
+
+Successive text versions of a bill (introduced, reported, engrossed,
+enrolled) and companion bills share most of their text. Each chunk is
+identified by a hash of its whitespace-normalised content; a chunk that is
+already stored is referenced instead of being hashed and indexed again, so
+every distinct chunk is vectorized once however many documents contain it.
+Documents are kept as ordered lists of chunk hashes, and a chunk is dropped
+from the index when the last document referencing it is removed.
+"""
+
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from app.api.services.hashing_index import N_FEATURES, HashingIndex
+from app.api.services.semantic_search import top_k
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 256
+
+
+def content_hash(chunk):
+    """
+    Hash a chunk's text, ignoring differences in whitespace.
+
+    :param chunk: The chunk text.
+    :return: A hex digest identifying the chunk's content.
+    """
+    return hashlib.sha1(" ".join(chunk.split()).encode("utf-8")).hexdigest()
+
+
+class ChunkStore:
+    """
+    A HashingIndex holding each distinct chunk once, shared by many documents.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        """
+        :param n_features: The number of hash buckets of the underlying index.
+        """
+        self.index = HashingIndex(n_features)
+        self.documents = {}
+        self.refcounts = {}
+        self.lock = threading.Lock()
+
+    def add_document(self, doc_key, chunks, batch_size=BATCH_SIZE):
+        """
+        Store a document, indexing only the chunks not stored yet.
+
+        :param doc_key: A unique key for the document, e.g. "117/hr/3076/Enrolled Bill".
+        :param chunks: An iterable of chunk texts, in document order.
+        :param batch_size: How many chunks to hash per index append.
+        :return: The number of chunks that had to be indexed.
+        """
+        self.remove_document(doc_key)
+        hashes = []
+        referenced = set()
+        added = 0
+        batch = []
+        try:
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= batch_size:
+                    added += self._add_batch(batch, hashes, referenced)
+                    batch = []
+            if batch:
+                added += self._add_batch(batch, hashes, referenced)
+        except BaseException:
+            with self.lock:
+                self._release(referenced)
+            raise
+
+        with self.lock:
+            # A concurrent add of the same key may have stored its hashes meanwhile; release them with it.
+            replaced = self.documents.get(doc_key)
+            self.documents[doc_key] = hashes
+            if replaced is not None:
+                self._release(set(replaced))
+        logger.info(
+            "Stored %s: %d chunks, %d new (%.0f%% deduplicated); store dedup ratio %.2fx",
+            doc_key, len(hashes), added, 100 * (1 - added / max(len(hashes), 1)), self.dedup_ratio(),
+        )
+        return added
+
+    def _add_batch(self, batch, hashes, referenced):
+        """
+        Append the unseen chunks of a batch to the index and record every hash.
+
+        The document's reference to each chunk is taken in the same critical
+        section, so removing another document meanwhile cannot drop a chunk
+        this one is still being built from.
+        """
+        new_chunks, new_keys = [], []
+        with self.lock:
+            for chunk in batch:
+                digest = content_hash(chunk)
+                hashes.append(digest)
+                if digest not in self.index.key_to_id and digest not in new_keys:
+                    new_chunks.append(chunk)
+                    new_keys.append(digest)
+                if digest not in referenced:
+                    referenced.add(digest)
+                    self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+            if new_chunks:
+                self.index.append(new_chunks, keys=new_keys)
+        return len(new_chunks)
+
+    def _release(self, digests):
+        """
+        Drop one reference to each chunk, deleting the ones left unreferenced. Requires the lock.
+        """
+        orphaned = []
+        for digest in digests:
+            self.refcounts[digest] -= 1
+            if self.refcounts[digest] == 0:
+                del self.refcounts[digest]
+                orphaned.append(digest)
+        self.index.delete_keys(orphaned)
+        self.index.maybe_compact()
+
+    def remove_document(self, doc_key):
+        """
+        Forget a document and drop the chunks no other document references.
+
+        :param doc_key: The document key; unknown keys are ignored.
+        """
+        with self.lock:
+            hashes = self.documents.pop(doc_key, None)
+            if hashes is None:
+                return
+            self._release(set(hashes))
+
+    def chunk_ids(self, doc_key):
+        """
+        Return the index ids of a document's chunks, in document order.
+        """
+        with self.lock:
+            return self._chunk_ids(doc_key)
+
+    def _chunk_ids(self, doc_key):
+        return np.array([self.index.key_to_id[digest] for digest in self.documents[doc_key]], dtype=np.int64)
+
+    def chunks(self, doc_key):
+        """
+        Return the texts of a document's chunks, in document order.
+        """
+        with self.lock:
+            return [self.index.chunks[i] for i in self._chunk_ids(doc_key)]
+
+    def search(self, doc_key, query, k=5, threshold=0.1, mask=None):
+        """
+        Find the chunks of one document most relevant to a query.
+
+        :param doc_key: The document key.
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param threshold: The minimum relevance score to consider a match.
+        :param mask: An optional boolean array selecting which of the document's chunks may match.
+        :return: A list of (position in the document, score) pairs ordered by descending score.
+        :raises KeyError: If the document is not stored.
+        """
+        # Resolve ids and score in one critical section: a compaction in between would renumber them.
+        with self.lock:
+            scores = self.index.scores(query, ids=self._chunk_ids(doc_key))
+        if mask is not None:
+            scores[~mask] = 0.0
+        return top_k(scores, k, threshold)
+
+    def dedup_ratio(self):
+        """
+        Return how many chunk references are served per stored chunk.
+        """
+        stats = self.stats()
+        return stats["chunk_references"] / max(stats["unique_chunks"], 1)
+
+    def stats(self):
+        """
+        Summarise the store.
+
+        :return: A dict with the number of documents, chunk references, unique chunks and the dedup ratio.
+        """
+        with self.lock:
+            references = sum(len(hashes) for hashes in self.documents.values())
+            unique = len(self.index)
+        return {
+            "documents": len(self.documents),
+            "chunk_references": references,
+            "unique_chunks": unique,
+            "dedup_ratio": references / max(unique, 1),
+        }
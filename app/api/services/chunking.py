@@ -3,8 +3,90 @@ chunking.py
 
 This module contains logic to split long text responses into smaller,
 context-preserving chunks that can be processed more effectively.
+
+`chunk_text` and `iter_chunks` size chunks in characters. `token_spans` sizes
+them in tiktoken tokens and returns character offsets into the original text,
+so callers can pack model context exactly without re-tokenizing each chunk.
 """
 
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import tiktoken
+
+TOKEN_ENCODING = "cl100k_base"
+ENCODE_SEGMENT_SIZE = 256 * 1024
+# Chunk ends that are preferred for token chunking: the end of a sentence
+# (before the following whitespace), and blank lines or section headers.
+SENTENCE_END_PATTERN = re.compile(r"[.!?;:][\"')\]]*(?=\s)")
+SECTION_BREAK_PATTERN = re.compile(r"(?=\n[ \t]*\n)|(?=\n[ \t]*(?:SECTION|SEC\.|TITLE|Sec\.)\s)")
+WHITESPACE_PATTERN = re.compile(r"\s")
+SEGMENT_SIZE = 64 * 1024
+
+
+def iter_words(source):
+    """
+    Lazily yield the whitespace-separated words of a text.
+
+    :param source: A string, or an iterable of string pieces (e.g. from a
+        streaming parser); a word may be split across consecutive pieces.
+    :return: A generator of words.
+    """
+    if isinstance(source, str):
+        # Split a segment at a time: str.split runs in C, and only one
+        # segment's words are materialised at once.
+        start = 0
+        while start < len(source):
+            end = start + SEGMENT_SIZE
+            if end < len(source):
+                match = WHITESPACE_PATTERN.search(source, end)
+                end = match.start() if match else len(source)
+            yield from source[start:end].split()
+            start = end
+        return
+
+    carry = ""
+    for piece in source:
+        if not piece:
+            continue
+        piece = carry + piece
+        words = piece.split()
+        # The last word may continue in the next piece.
+        carry = words.pop() if words and not piece[-1].isspace() else ""
+        yield from words
+    if carry:
+        yield carry
+
+
+def iter_chunks(source, max_chunk_size=1000):
+    """
+    Lazily split text into chunks of whole words, each at most max_chunk_size
+    characters long when its words are joined by single spaces.
+
+    Runs in time linear in the input: the length of the current chunk is kept
+    as a running total instead of being re-measured for every word. A word
+    longer than max_chunk_size becomes a chunk of its own.
+
+    :param source: A string, or an iterable of string pieces.
+    :param max_chunk_size: The maximum size of each chunk.
+    :return: A generator of text chunks.
+    """
+    chunk = []
+    length = 0
+    for word in iter_words(source):
+        if chunk and length + 1 + len(word) > max_chunk_size:
+            yield " ".join(chunk)
+            chunk = []
+            length = 0
+        length += len(word) + (1 if chunk else 0)
+        chunk.append(word)
+
+    if chunk:
+        yield " ".join(chunk)
+
+
 def chunk_text(text, max_chunk_size=1000):
     """
     Splits the input text into smaller chunks, each with a maximum size.
@@ -13,18 +95,154 @@ def chunk_text(text, max_chunk_size=1000):
     :param max_chunk_size: The maximum size of each chunk.
     :return: A list of text chunks.
     """
-    words = text.split()
-    chunks = []
-    chunk = []
+    return list(iter_chunks(text, max_chunk_size))
+
+
+TokenSpan = namedtuple("TokenSpan", ["start", "end", "tokens"])
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name=TOKEN_ENCODING):
+    """
+    Return a tiktoken encoding, loading it once per process.
+    """
+    return tiktoken.get_encoding(name)
+
+
+def _encode_segments(text):
+    """
+    Cut text into segments of about ENCODE_SEGMENT_SIZE characters, ending
+    each one after a newline where possible so no token straddles a cut.
+    """
+    segments = []
+    start = 0
+    while start < len(text):
+        end = start + ENCODE_SEGMENT_SIZE
+        if end < len(text):
+            newline = text.find("\n", end)
+            end = newline + 1 if newline != -1 else len(text)
+        segments.append(text[start:end])
+        start = end
+    return segments
+
 
-    for word in words:
-        if len(' '.join(chunk)) + len(word) + 1 <= max_chunk_size:
-            chunk.append(word)
+def encode_with_offsets(texts, encoding=None):
+    """
+    Tokenize documents in one batch and locate every token in its document.
+
+    :param texts: A list of documents.
+    :param encoding: A tiktoken encoding; defaults to cl100k_base.
+    :return: One (tokens, offsets) pair per document, where offsets[i] is the
+        character index at which token i starts. Both are int64 arrays.
+    """
+    encoding = encoding or get_encoding()
+    segments = [_encode_segments(text) for text in texts]
+    encoded = encoding.encode_ordinary_batch([segment for parts in segments for segment in parts])
+
+    results = []
+    position = 0
+    for text, parts in zip(texts, segments):
+        tokens = [token for part in encoded[position:position + len(parts)] for token in part]
+        position += len(parts)
+
+        # A token starts at the character holding its first byte; continuation
+        # bytes (0b10xxxxxx) do not start a character.
+        byte_lengths = np.fromiter(map(len, encoding.decode_tokens_bytes(tokens)), dtype=np.int64, count=len(tokens))
+        text_bytes = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        char_of_byte = np.cumsum((text_bytes & 0xC0) != 0x80) - 1
+        byte_starts = np.cumsum(byte_lengths) - byte_lengths
+        results.append((np.array(tokens, dtype=np.int64), char_of_byte[byte_starts]))
+    return results
+
+
+def _boundary_tokens(text, pattern, offsets):
+    """
+    Return the sorted token indices at which a boundary matched by pattern
+    begins a token.
+    """
+    positions = np.fromiter((match.end() for match in pattern.finditer(text)), dtype=np.int64)
+    indices = np.searchsorted(offsets, positions)
+    valid = indices < len(offsets)
+    indices, positions = indices[valid], positions[valid]
+    return np.unique(indices[offsets[indices] == positions])
+
+
+def _last_in(boundaries, low, high):
+    """
+    Return the largest boundary in (low, high], or None.
+    """
+    i = np.searchsorted(boundaries, high, side="right") - 1
+    if i >= 0 and boundaries[i] > low:
+        return int(boundaries[i])
+    return None
+
+
+def _first_in(boundaries, low, high):
+    """
+    Return the smallest boundary in [low, high), or None.
+    """
+    i = np.searchsorted(boundaries, low)
+    if i < len(boundaries) and boundaries[i] < high:
+        return int(boundaries[i])
+    return None
+
+
+def token_spans(text, max_tokens=512, overlap=64, encoding=None, offsets=None):
+    """
+    Split text into chunks of at most max_tokens tokens, as character spans.
+
+    Chunks end at a section or paragraph break when one falls in the second
+    half of the token window, otherwise at a sentence end, and only cut
+    mid-sentence when neither exists. Consecutive chunks share up to
+    `overlap` tokens, starting the shared part at a sentence where possible.
+
+    :param text: The document.
+    :param max_tokens: The maximum number of tokens per chunk.
+    :param overlap: The number of tokens to repeat from the previous chunk.
+    :param encoding: A tiktoken encoding; defaults to cl100k_base.
+    :param offsets: Precomputed token offsets from `encode_with_offsets`.
+    :return: A list of TokenSpan(start, end, tokens); text[start:end] is the chunk.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    if offsets is None:
+        _, offsets = encode_with_offsets([text], encoding)[0]
+
+    n = len(offsets)
+    strong = _boundary_tokens(text, SECTION_BREAK_PATTERN, offsets)
+    weak = np.union1d(strong, _boundary_tokens(text, SENTENCE_END_PATTERN, offsets))
+
+    spans = []
+    start = 0
+    while start < n:
+        end = start + max_tokens
+        if end >= n:
+            end = n
         else:
-            chunks.append(' '.join(chunk))
-            chunk = [word]
-    
-    if chunk:
-        chunks.append(' '.join(chunk))
-    
-    return chunks
+            half = start + max_tokens // 2
+            end = _last_in(strong, half, end) or _last_in(weak, half, end) or end
+
+        end_char = int(offsets[end]) if end < n else len(text)
+        spans.append(TokenSpan(int(offsets[start]), end_char, end - start))
+        if end == n:
+            break
+
+        next_start = end - overlap
+        if overlap:
+            next_start = _first_in(weak, next_start, end) or next_start
+        start = max(next_start, start + 1)
+    return spans
+
+
+def batch_token_spans(texts, max_tokens=512, overlap=64, encoding=None):
+    """
+    Token-chunk several documents, encoding all of them in one batch.
+
+    :param texts: A list of documents.
+    :return: One list of TokenSpan per document.
+    """
+    encoded = encode_with_offsets(texts, encoding)
+    return [
+        token_spans(text, max_tokens, overlap, offsets=offsets)
+        for text, (_, offsets) in zip(texts, encoded)
+    ]
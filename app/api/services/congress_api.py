@@ -17,6 +17,38 @@ def get_member_details(member_id, api_key=None):
         raise HTTPException(status_code=response.status_code, detail="Error fetching member details")
     return response.json()
 
+def get_member_sponsored_legislation(member_id, api_key=None, **kwargs):
+    """
+    Fetch the list of legislation sponsored by a member of Congress.
+    :param member_id: The bioguide ID of the member.
+    :param api_key: The API key for authentication.
+    :param kwargs: Optional parameters like 'format', 'offset', 'limit'.
+    :return: A dictionary containing the list of sponsored legislation.
+    """
+    url = f"{BASE_URL}/member/{member_id}/sponsored-legislation"
+    params = {"api_key": api_key}
+    params.update(kwargs)
+    response = requests.get(url, params=params)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Error fetching sponsored legislation")
+    return response.json()
+
+def get_member_cosponsored_legislation(member_id, api_key=None, **kwargs):
+    """
+    Fetch the list of legislation cosponsored by a member of Congress.
+    :param member_id: The bioguide ID of the member.
+    :param api_key: The API key for authentication.
+    :param kwargs: Optional parameters like 'format', 'offset', 'limit'.
+    :return: A dictionary containing the list of cosponsored legislation.
+    """
+    url = f"{BASE_URL}/member/{member_id}/cosponsored-legislation"
+    params = {"api_key": api_key}
+    params.update(kwargs)
+    response = requests.get(url, params=params)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Error fetching cosponsored legislation")
+    return response.json()
+
 def search_members(api_key=None, **kwargs):
     """
     Search for members of Congress using optional query parameters.
@@ -36,6 +68,24 @@ def search_members(api_key=None, **kwargs):
     return response.json()
 
 
+def get_bills(congress, api_key, bill_type=None, **kwargs):
+    """
+    Fetch a page of the bills of a congress, optionally of one type.
+
+    :param congress: The congress number.
+    :param api_key: The API key for authentication.
+    :param bill_type: The type of bill (e.g., hr, s, hjres, etc.); all types if omitted.
+    :param kwargs: Optional parameters like 'format', 'offset', 'limit', 'sort'.
+    :return: A dictionary containing the list of bills and pagination.
+    """
+    url = f"{BASE_URL}/bill/{congress}" + (f"/{bill_type}" if bill_type else "")
+    params = {"api_key": api_key}
+    params.update(kwargs)
+    response = requests.get(url, params=params)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Error fetching bills")
+    return response.json()
+
 def get_bill_details(congress, bill_type, bill_number, api_key, **kwargs):
     """
     Fetch detailed information about a specific bill.
@@ -0,0 +1,625 @@
+"""
+congress_store.py
+
+This module keeps a normalised local SQLite copy of the Congress.gov data the
+API has fetched: bills, their actions, cosponsors, committees, subjects and
+related bills, plus members and committees.
+
+Every fetcher response can be synced with the matching store_* function; a
+re-sync replaces the bill's previous rows for that resource. Questions that
+span many bills ("bills cosponsored by X with a floor action this month") are
+then answered with one indexed query instead of dozens of upstream calls.
+
+Each thread uses its own connection; the database runs in WAL mode so reads
+are never blocked by a sync in progress. The `bills.id` rowid is a stable
+integer ordinal for a bill and is used by the in-memory indexes built on top
+of this store. Those indexes follow syncs made in this process through the
+on_sync listeners. Every sync also bumps its process's row in store_writes,
+which is how a ChangeWatch notices syncs made by another process, such as
+the crawler.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from app.api.config import DATA_DIR
+
+DB_PATH = os.getenv("CONGRESS_DB_PATH", os.path.join(DATA_DIR, "congress.db"))
+# Minimum seconds between checks of whether the store changed under an in-memory index.
+STORE_POLL_INTERVAL = float(os.getenv("STORE_POLL_INTERVAL", 30))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    id INTEGER PRIMARY KEY,
+    congress INTEGER NOT NULL,
+    bill_type TEXT NOT NULL,
+    bill_number INTEGER NOT NULL,
+    title TEXT,
+    origin_chamber TEXT,
+    introduced_date TEXT,
+    policy_area TEXT,
+    sponsor_bioguide_id TEXT,
+    latest_action_date TEXT,
+    latest_action_text TEXT,
+    update_date TEXT,
+    UNIQUE (congress, bill_type, bill_number)
+);
+CREATE INDEX IF NOT EXISTS bills_sponsor ON bills (sponsor_bioguide_id);
+CREATE INDEX IF NOT EXISTS bills_latest_action ON bills (latest_action_date);
+CREATE INDEX IF NOT EXISTS bills_policy_area ON bills (policy_area);
+
+CREATE TABLE IF NOT EXISTS members (
+    bioguide_id TEXT PRIMARY KEY,
+    full_name TEXT,
+    party TEXT,
+    state TEXT,
+    district INTEGER,
+    current_member INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    bill_id INTEGER NOT NULL REFERENCES bills (id) ON DELETE CASCADE,
+    action_date TEXT NOT NULL,
+    action_code TEXT,
+    action_type TEXT,
+    text TEXT,
+    source_system TEXT
+);
+CREATE INDEX IF NOT EXISTS actions_bill ON actions (bill_id, action_date);
+CREATE INDEX IF NOT EXISTS actions_date ON actions (action_date, action_type);
+
+CREATE TABLE IF NOT EXISTS cosponsors (
+    bill_id INTEGER NOT NULL REFERENCES bills (id) ON DELETE CASCADE,
+    bioguide_id TEXT NOT NULL,
+    sponsorship_date TEXT,
+    is_original INTEGER,
+    PRIMARY KEY (bill_id, bioguide_id)
+);
+CREATE INDEX IF NOT EXISTS cosponsors_member ON cosponsors (bioguide_id);
+
+CREATE TABLE IF NOT EXISTS committees (
+    system_code TEXT PRIMARY KEY,
+    name TEXT,
+    chamber TEXT,
+    committee_type TEXT,
+    parent_code TEXT
+);
+
+CREATE TABLE IF NOT EXISTS bill_committees (
+    bill_id INTEGER NOT NULL REFERENCES bills (id) ON DELETE CASCADE,
+    system_code TEXT NOT NULL,
+    activity TEXT NOT NULL DEFAULT '',
+    activity_date TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (bill_id, system_code, activity, activity_date)
+);
+CREATE INDEX IF NOT EXISTS bill_committees_code ON bill_committees (system_code, bill_id);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    bill_id INTEGER NOT NULL REFERENCES bills (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    PRIMARY KEY (bill_id, name)
+);
+CREATE INDEX IF NOT EXISTS subjects_name ON subjects (name);
+
+CREATE TABLE IF NOT EXISTS related_bills (
+    bill_id INTEGER NOT NULL REFERENCES bills (id) ON DELETE CASCADE,
+    related_congress INTEGER NOT NULL,
+    related_type TEXT NOT NULL,
+    related_number INTEGER NOT NULL,
+    relationship_type TEXT NOT NULL,
+    identified_by TEXT,
+    PRIMARY KEY (bill_id, related_congress, related_type, related_number, relationship_type)
+);
+
+CREATE TABLE IF NOT EXISTS store_writes (
+    pid INTEGER PRIMARY KEY,
+    writes INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_local = threading.local()
+_sync_listeners = []
+_member_sync_listeners = []
+
+
+def get_connection():
+    """
+    Return this thread's connection to the store, creating the schema on first use.
+
+    :return: A sqlite3.Connection whose rows behave like dicts.
+    """
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.path != DB_PATH:
+        directory = os.path.dirname(os.path.abspath(DB_PATH))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(DB_PATH, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(SCHEMA)
+        _local.connection = connection
+        _local.path = DB_PATH
+    return connection
+
+
+def _record_write():
+    """
+    Count one committed sync of this process in the store.
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "INSERT INTO store_writes (pid, writes) VALUES (?, 1) ON CONFLICT (pid) DO UPDATE SET writes = writes + 1",
+            (os.getpid(),),
+        )
+
+
+def external_writes():
+    """
+    Return the number of syncs other processes, such as the crawler or other API workers, committed to the store.
+    """
+    row = get_connection().execute(
+        "SELECT COALESCE(SUM(writes), 0) FROM store_writes WHERE pid != ?", (os.getpid(),)
+    ).fetchone()
+    return row[0]
+
+
+class ChangeWatch:
+    """
+    Tells an in-memory index built from the store when another process has synced to it since.
+
+    Syncs made in this process are left out: the index follows those through
+    its on_sync listener. Other processes' syncs are checked for at most once
+    per STORE_POLL_INTERVAL.
+    """
+
+    def __init__(self, interval=None):
+        """
+        Create the watch before reading from the store, so syncs made while the index is built are noticed.
+
+        :param interval: Seconds between checks; defaults to STORE_POLL_INTERVAL.
+        """
+        self.interval = STORE_POLL_INTERVAL if interval is None else interval
+        self.path = DB_PATH
+        self.writes = external_writes()
+        self.checked_at = time.monotonic()
+
+    def changed(self):
+        """
+        Return True if the store moved to another path or another process synced to it since the watch was created.
+        """
+        if self.path != DB_PATH:
+            return True
+        now = time.monotonic()
+        if now - self.checked_at < self.interval:
+            return False
+        self.checked_at = now
+        return external_writes() != self.writes
+
+
+def bill_id(connection, congress, bill_type, bill_number):
+    """
+    Return the id of a bill, inserting a placeholder row if it is not stored yet.
+    """
+    bill_type = bill_type.lower()
+    connection.execute(
+        "INSERT OR IGNORE INTO bills (congress, bill_type, bill_number) VALUES (?, ?, ?)",
+        (int(congress), bill_type, int(bill_number)),
+    )
+    row = connection.execute(
+        "SELECT id FROM bills WHERE congress = ? AND bill_type = ? AND bill_number = ?",
+        (int(congress), bill_type, int(bill_number)),
+    ).fetchone()
+    return row["id"]
+
+
+def _upsert_member(connection, bioguide_id, full_name=None, party=None, state=None, district=None, current=None):
+    connection.execute(
+        """
+        INSERT INTO members (bioguide_id, full_name, party, state, district, current_member)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (bioguide_id) DO UPDATE SET
+            full_name = COALESCE(excluded.full_name, full_name),
+            party = COALESCE(excluded.party, party),
+            state = COALESCE(excluded.state, state),
+            district = COALESCE(excluded.district, district),
+            current_member = COALESCE(excluded.current_member, current_member)
+        """,
+        (bioguide_id, full_name, party, state, district, current),
+    )
+
+
+def _upsert_committee(connection, system_code, name=None, chamber=None, committee_type=None, parent_code=None):
+    connection.execute(
+        """
+        INSERT INTO committees (system_code, name, chamber, committee_type, parent_code)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (system_code) DO UPDATE SET
+            name = COALESCE(excluded.name, name),
+            chamber = COALESCE(excluded.chamber, chamber),
+            committee_type = COALESCE(excluded.committee_type, committee_type),
+            parent_code = COALESCE(excluded.parent_code, parent_code)
+        """,
+        (system_code, name, chamber, committee_type, parent_code),
+    )
+
+
+def store_bill_details(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_details.
+    """
+    bill = response.get("bill", {})
+    sponsors = bill.get("sponsors") or []
+    latest = bill.get("latestAction") or {}
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        for sponsor in sponsors:
+            _upsert_member(connection, sponsor["bioguideId"], sponsor.get("fullName"), sponsor.get("party"),
+                           sponsor.get("state"), sponsor.get("district"))
+        connection.execute(
+            """
+            UPDATE bills SET title = ?, origin_chamber = ?, introduced_date = ?, policy_area = ?,
+                sponsor_bioguide_id = ?, latest_action_date = ?, latest_action_text = ?, update_date = ?
+            WHERE id = ?
+            """,
+            (
+                bill.get("title"), bill.get("originChamber"), bill.get("introducedDate"),
+                (bill.get("policyArea") or {}).get("name"),
+                sponsors[0]["bioguideId"] if sponsors else None,
+                latest.get("actionDate"), latest.get("text"), bill.get("updateDate"), row_id,
+            ),
+        )
+
+
+def store_bill_actions(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_actions, replacing the bill's stored actions.
+    """
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        connection.execute("DELETE FROM actions WHERE bill_id = ?", (row_id,))
+        connection.executemany(
+            "INSERT INTO actions (bill_id, action_date, action_code, action_type, text, source_system) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (row_id, action.get("actionDate"), action.get("actionCode"), action.get("type"),
+                 action.get("text"), (action.get("sourceSystem") or {}).get("name"))
+                for action in response.get("actions", [])
+            ],
+        )
+
+
+def store_bill_cosponsors(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_cosponsors, replacing the bill's stored cosponsors.
+    """
+    cosponsors = response.get("cosponsors", [])
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        for cosponsor in cosponsors:
+            _upsert_member(connection, cosponsor["bioguideId"], cosponsor.get("fullName"), cosponsor.get("party"),
+                           cosponsor.get("state"), cosponsor.get("district"))
+        connection.execute("DELETE FROM cosponsors WHERE bill_id = ?", (row_id,))
+        connection.executemany(
+            "INSERT OR REPLACE INTO cosponsors (bill_id, bioguide_id, sponsorship_date, is_original) VALUES (?, ?, ?, ?)",
+            [
+                (row_id, c["bioguideId"], c.get("sponsorshipDate"), int(bool(c.get("isOriginalCosponsor"))))
+                for c in cosponsors
+            ],
+        )
+
+
+def store_bill_committees(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_committees, including subcommittee activity.
+    """
+    rows = []
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        for committee in response.get("committees", []):
+            code = committee["systemCode"]
+            _upsert_committee(connection, code, committee.get("name"), committee.get("chamber"), committee.get("type"))
+            rows.extend((row_id, code, a.get("name", ""), a.get("date", "")) for a in committee.get("activities") or [])
+            rows.append((row_id, code, "", ""))
+            for sub in committee.get("subcommittees") or []:
+                _upsert_committee(connection, sub["systemCode"], sub.get("name"), committee.get("chamber"),
+                                  "Subcommittee", code)
+                rows.extend((row_id, sub["systemCode"], a.get("name", ""), a.get("date", "")) for a in sub.get("activities") or [])
+                rows.append((row_id, sub["systemCode"], "", ""))
+        connection.execute("DELETE FROM bill_committees WHERE bill_id = ?", (row_id,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO bill_committees (bill_id, system_code, activity, activity_date) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+
+def store_bill_subjects(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_subjects, including the policy area.
+    """
+    response = response.get("subjects", response)
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        connection.execute("DELETE FROM subjects WHERE bill_id = ?", (row_id,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO subjects (bill_id, name) VALUES (?, ?)",
+            [(row_id, subject["name"]) for subject in response.get("legislativeSubjects", [])],
+        )
+        policy_area = (response.get("policyArea") or {}).get("name")
+        if policy_area:
+            connection.execute("UPDATE bills SET policy_area = ? WHERE id = ?", (policy_area, row_id))
+
+
+def store_bill_related_bills(congress, bill_type, bill_number, response):
+    """
+    Sync the response of get_bill_related_bills, one row per relationship.
+    """
+    connection = get_connection()
+    with connection:
+        row_id = bill_id(connection, congress, bill_type, bill_number)
+        connection.execute("DELETE FROM related_bills WHERE bill_id = ?", (row_id,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO related_bills "
+            "(bill_id, related_congress, related_type, related_number, relationship_type, identified_by) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (row_id, int(related["congress"]), related["type"].lower(), int(related["number"]),
+                 detail.get("type", ""), detail.get("identifiedBy"))
+                for related in response.get("relatedBills", [])
+                for detail in related.get("relationshipDetails") or [{}]
+            ],
+        )
+
+
+def store_member_details(response):
+    """
+    Sync the response of get_member_details.
+    """
+    member = response.get("member", {})
+    party_history = member.get("partyHistory") or []
+    connection = get_connection()
+    with connection:
+        _upsert_member(
+            connection, member["bioguideId"], member.get("directOrderName"),
+            party_history[-1].get("partyAbbreviation") if party_history else None,
+            member.get("state"), member.get("district"),
+            None if member.get("currentMember") is None else int(member["currentMember"]),
+        )
+    _record_write()
+    for listener in _member_sync_listeners:
+        listener(member["bioguideId"])
+
+
+def store_committee_details(chamber, response):
+    """
+    Sync the response of get_committee_details.
+    """
+    committee = response.get("committee", {})
+    history = committee.get("history") or []
+    connection = get_connection()
+    with connection:
+        _upsert_committee(connection, committee["systemCode"], history[0].get("officialName") if history else None,
+                          chamber, committee.get("type"))
+        for sub in committee.get("subcommittees") or []:
+            _upsert_committee(connection, sub["systemCode"], sub.get("name"), chamber, "Subcommittee",
+                              committee["systemCode"])
+
+
+BILL_RESOURCES = {
+    "details": store_bill_details,
+    "actions": store_bill_actions,
+    "cosponsors": store_bill_cosponsors,
+    "committees": store_bill_committees,
+    "subjects": store_bill_subjects,
+    "related-bills": store_bill_related_bills,
+}
+
+
+def sync_bill_resource(resource, congress, bill_type, bill_number, response):
+    """
+    Sync any bill sub-resource by name; resources without a table are ignored.
+
+    :param resource: One of BILL_RESOURCES, e.g. "actions".
+    :return: True if the response was stored.
+    :raises ValueError: If the response is one page of several, which would truncate the stored rows.
+    """
+    store = BILL_RESOURCES.get(resource)
+    if store is None:
+        return False
+    if response.get("pagination", {}).get("next"):
+        raise ValueError(f"Refusing to sync a partial {resource} response for {congress} {bill_type} {bill_number}")
+    store(congress, bill_type, bill_number, response)
+    _record_write()
+    for listener in _sync_listeners:
+        listener(resource, int(congress), bill_type.lower(), int(bill_number))
+    return True
+
+
+def on_sync(listener):
+    """
+    Register a callback run after each bill resource is synced, e.g. to refresh an in-memory index.
+
+    :param listener: A callable taking (resource, congress, bill_type, bill_number).
+    :return: The listener, so this can be used as a decorator.
+    """
+    _sync_listeners.append(listener)
+    return listener
+
+
+def on_member_sync(listener):
+    """
+    Register a callback run after a member's details are synced.
+
+    :param listener: A callable taking the member's bioguide ID.
+    :return: The listener, so this can be used as a decorator.
+    """
+    _member_sync_listeners.append(listener)
+    return listener
+
+
+def bill_member_ids(congress, bill_type, bill_number):
+    """
+    Return the bioguide IDs of a stored bill's sponsor and cosponsors.
+    """
+    rows = get_connection().execute(
+        """
+        SELECT b.sponsor_bioguide_id FROM bills b
+        WHERE b.congress = ? AND b.bill_type = ? AND b.bill_number = ? AND b.sponsor_bioguide_id IS NOT NULL
+        UNION
+        SELECT c.bioguide_id FROM cosponsors c JOIN bills b ON b.id = c.bill_id
+        WHERE b.congress = ? AND b.bill_type = ? AND b.bill_number = ?
+        """,
+        (int(congress), bill_type.lower(), int(bill_number)) * 2,
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def find_bills(congress=None, bill_type=None, sponsor=None, cosponsor=None, committee=None, subject=None,
+               policy_area=None, action_since=None, action_until=None, action_type=None, limit=100):
+    """
+    Query stored bills. All given filters must match.
+
+    :param sponsor: The bioguide ID of the sponsor.
+    :param cosponsor: The bioguide ID of a cosponsor.
+    :param committee: A committee or subcommittee system code.
+    :param subject: A legislative subject name.
+    :param policy_area: A policy area name.
+    :param action_since: Only bills with an action on or after this ISO date.
+    :param action_until: Only bills with an action on or before this ISO date.
+    :param action_type: Only count actions of this type (e.g., Floor) for the date filters.
+    :param limit: The maximum number of bills to return.
+    :return: A list of bill dicts, most recently active first.
+    """
+    clauses, params = [], []
+    if congress is not None:
+        clauses.append("b.congress = ?")
+        params.append(int(congress))
+    if bill_type is not None:
+        clauses.append("b.bill_type = ?")
+        params.append(bill_type.lower())
+    if sponsor is not None:
+        clauses.append("b.sponsor_bioguide_id = ?")
+        params.append(sponsor)
+    if policy_area is not None:
+        clauses.append("b.policy_area = ?")
+        params.append(policy_area)
+    if cosponsor is not None:
+        clauses.append("b.id IN (SELECT bill_id FROM cosponsors WHERE bioguide_id = ?)")
+        params.append(cosponsor)
+    if committee is not None:
+        clauses.append("b.id IN (SELECT bill_id FROM bill_committees WHERE system_code = ?)")
+        params.append(committee)
+    if subject is not None:
+        clauses.append("b.id IN (SELECT bill_id FROM subjects WHERE name = ?)")
+        params.append(subject)
+    if action_since is not None or action_until is not None or action_type is not None:
+        action_clauses, action_params = ["a.bill_id = b.id"], []
+        if action_since is not None:
+            action_clauses.append("a.action_date >= ?")
+            action_params.append(action_since)
+        if action_until is not None:
+            action_clauses.append("a.action_date <= ?")
+            action_params.append(action_until)
+        if action_type is not None:
+            action_clauses.append("a.action_type = ?")
+            action_params.append(action_type)
+        clauses.append(f"EXISTS (SELECT 1 FROM actions a WHERE {' AND '.join(action_clauses)})")
+        params.extend(action_params)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = get_connection().execute(
+        f"""
+        SELECT b.congress, b.bill_type, b.bill_number, b.title, b.origin_chamber, b.introduced_date,
+               b.policy_area, b.sponsor_bioguide_id, b.latest_action_date, b.latest_action_text
+        FROM bills b {where}
+        ORDER BY b.latest_action_date DESC, b.id
+        LIMIT ?
+        """,
+        params + [int(limit)],
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def related_bill_titles(bioguide_id):
+    """
+    List the related bills of every stored bill a member sponsored or cosponsored.
+
+    :param bioguide_id: The member's bioguide ID.
+    :return: A list of dicts with the member's bill, the related bill, the relationship type
+        and the related bill's title if it is stored.
+    """
+    rows = get_connection().execute(
+        """
+        SELECT b.congress, b.bill_type, b.bill_number, r.related_congress, r.related_type, r.related_number,
+               r.relationship_type, rb.title AS related_title
+        FROM bills b
+        JOIN related_bills r ON r.bill_id = b.id
+        LEFT JOIN bills rb ON rb.congress = r.related_congress AND rb.bill_type = r.related_type
+                          AND rb.bill_number = r.related_number
+        WHERE b.sponsor_bioguide_id = ? OR b.id IN (SELECT bill_id FROM cosponsors WHERE bioguide_id = ?)
+        ORDER BY b.congress, b.bill_type, b.bill_number, r.related_congress, r.related_type, r.related_number
+        """,
+        (bioguide_id, bioguide_id),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_bills_by_id(bill_ids):
+    """
+    Look up stored bills by their ids, e.g. the ordinals returned by an in-memory index.
+
+    :param bill_ids: A sequence of bill ids.
+    :return: A list of bill dicts in the order of `bill_ids`; unknown ids are skipped.
+    """
+    bill_ids = [int(i) for i in bill_ids]
+    if not bill_ids:
+        return []
+    rows = get_connection().execute(
+        f"""
+        SELECT id, congress, bill_type, bill_number, title, origin_chamber, introduced_date, policy_area,
+               sponsor_bioguide_id, latest_action_date, latest_action_text
+        FROM bills WHERE id IN ({",".join("?" * len(bill_ids))})
+        """,
+        bill_ids,
+    ).fetchall()
+    by_id = {row["id"]: row for row in rows}
+    return [{k: by_id[i][k] for k in by_id[i].keys() if k != "id"} for i in bill_ids if i in by_id]
+
+
+def get_stored_bill(congress, bill_type, bill_number):
+    """
+    Return a stored bill with its actions, cosponsors, committees and subjects.
+
+    :return: A dict, or None if the bill has not been synced.
+    """
+    connection = get_connection()
+    bill = connection.execute(
+        "SELECT * FROM bills WHERE congress = ? AND bill_type = ? AND bill_number = ?",
+        (int(congress), bill_type.lower(), int(bill_number)),
+    ).fetchone()
+    if bill is None:
+        return None
+    row_id = bill["id"]
+    result = dict(bill)
+    del result["id"]
+    result["actions"] = [dict(row) for row in connection.execute(
+        "SELECT action_date, action_code, action_type, text, source_system FROM actions "
+        "WHERE bill_id = ? ORDER BY action_date DESC, id", (row_id,))]
+    result["cosponsors"] = [dict(row) for row in connection.execute(
+        "SELECT c.bioguide_id, m.full_name, m.party, m.state, c.sponsorship_date, c.is_original "
+        "FROM cosponsors c LEFT JOIN members m USING (bioguide_id) WHERE c.bill_id = ? "
+        "ORDER BY c.sponsorship_date, c.bioguide_id", (row_id,))]
+    result["committees"] = [dict(row) for row in connection.execute(
+        "SELECT DISTINCT bc.system_code, c.name, c.chamber FROM bill_committees bc "
+        "LEFT JOIN committees c USING (system_code) WHERE bc.bill_id = ? ORDER BY bc.system_code", (row_id,))]
+    result["subjects"] = [row["name"] for row in connection.execute(
+        "SELECT name FROM subjects WHERE bill_id = ? ORDER BY name", (row_id,))]
+    return result
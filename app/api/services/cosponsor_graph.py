@@ -0,0 +1,263 @@
+"""
+cosponsor_graph.py
+
+This module contains the member-by-member co-sponsorship matrix built from
+the local store.
+
+Every bill links its sponsor and cosponsors. Those links form a sparse
+member x bill incidence matrix B. The matrix C = B @ B.T counts, for every
+pair of members, the bills they are both on; its diagonal holds each member's
+own bill count. "Who co-sponsors most with X" is then a row of C. Bipartisan
+scores for all members come from one further sparse product of C with a
+member x party indicator matrix.
+
+C is built once from the store. After that it is updated incrementally. A
+sync of a bill's sponsor or cosponsors only marks that bill dirty. The next
+query subtracts the bill's old participant pairs from C and adds its new ones
+in a single sparse addition, instead of rebuilding C. The sum is a new matrix
+swapped in under the graph's lock, which readers hold too, so a query never
+sees C mid-update. Bills synced by the crawler never reach the listener, so
+get_graph rebuilds C from scratch once the crawler has written.
+"""
+
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from app.api.services import congress_store
+from app.api.services.congress_store import ChangeWatch, get_connection, on_sync
+
+PARTICIPANTS_QUERY = """
+SELECT bill_id, bioguide_id FROM cosponsors {where}
+UNION
+SELECT id, sponsor_bioguide_id FROM bills WHERE sponsor_bioguide_id IS NOT NULL {and_where}
+"""
+
+# Bills per participant query, keeping well under SQLite's limit on bound parameters.
+BATCH_SIZE = 400
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+class CosponsorGraph:
+    """
+    The co-sponsorship matrix over the members seen in the store.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: A connection to the local store.
+        """
+        self.path = congress_store.DB_PATH
+        self.watch = ChangeWatch()
+        self.member_ids = []
+        self.member_index = {}
+        self.bill_members = {}
+        self.dirty = set()
+        # Reentrant so callers can hold it across several reads for a consistent view.
+        self.lock = threading.RLock()
+
+        participants = self._participants(connection)
+        rows, columns = [], []
+        for column, (bill, members) in enumerate(participants.items()):
+            self.bill_members[bill] = members
+            rows.append(members)
+            columns.append(np.full(len(members), column))
+        n_members = len(self.member_ids)
+        if rows:
+            incidence = sparse.csr_matrix(
+                (np.ones(sum(len(r) for r in rows)), (np.concatenate(rows), np.concatenate(columns))),
+                shape=(n_members, len(participants)),
+            )
+            self.cooccurrence = (incidence @ incidence.T).tocsr()
+        else:
+            self.cooccurrence = sparse.csr_matrix((n_members, n_members))
+        self._load_parties(connection)
+
+    def _member(self, bioguide_id):
+        index = self.member_index.get(bioguide_id)
+        if index is None:
+            index = len(self.member_ids)
+            self.member_ids.append(bioguide_id)
+            self.member_index[bioguide_id] = index
+        return index
+
+    def _participants(self, connection, bill_ids=None):
+        """
+        Return {bill id: sorted member indices} for the given bills, or all bills.
+        """
+        if bill_ids is None:
+            query, params = PARTICIPANTS_QUERY.format(where="", and_where=""), ()
+        else:
+            marks = ",".join("?" * len(bill_ids))
+            query = PARTICIPANTS_QUERY.format(where=f"WHERE bill_id IN ({marks})", and_where=f"AND id IN ({marks})")
+            params = (*bill_ids, *bill_ids)
+        grouped = {bill: [] for bill in bill_ids or ()}
+        for bill, bioguide_id in connection.execute(query, params).fetchall():
+            grouped.setdefault(bill, []).append(self._member(bioguide_id))
+        return {bill: np.unique(np.array(members, dtype=np.int64)) for bill, members in grouped.items()}
+
+    def _load_parties(self, connection):
+        party = dict(connection.execute("SELECT bioguide_id, party FROM members").fetchall())
+        self.parties = sorted({p for p in party.values() if p})
+        codes = {p: i for i, p in enumerate(self.parties)}
+        self.member_party = np.array(
+            [codes.get(party.get(member), -1) for member in self.member_ids], dtype=np.int64
+        )
+
+    def mark_dirty(self, congress, bill_type, bill_number):
+        with self.lock:
+            self.dirty.add((congress, bill_type, bill_number))
+
+    def refresh(self, connection):
+        """
+        Apply the changes of every bill synced since the last refresh.
+        """
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            if not dirty:
+                return
+            bill_ids = [
+                row[0] for key in dirty for row in connection.execute(
+                    "SELECT id FROM bills WHERE congress = ? AND bill_type = ? AND bill_number = ?", key
+                )
+            ]
+            updated = {}
+            for start in range(0, len(bill_ids), BATCH_SIZE):
+                updated.update(self._participants(connection, bill_ids[start:start + BATCH_SIZE]))
+
+            rows, columns, values = [], [], []
+            for bill, members in updated.items():
+                for pair_members, sign in ((self.bill_members.get(bill, ()), -1.0), (members, 1.0)):
+                    pair_members = np.asarray(pair_members, dtype=np.int64)
+                    rows.append(np.repeat(pair_members, len(pair_members)))
+                    columns.append(np.tile(pair_members, len(pair_members)))
+                    values.append(np.full(len(pair_members) ** 2, sign))
+                self.bill_members[bill] = members
+
+            n_members = len(self.member_ids)
+            delta = sparse.csr_matrix(
+                (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                shape=(n_members, n_members),
+            )
+            old = self.cooccurrence.tocoo()
+            grown = sparse.csr_matrix((old.data, (old.row, old.col)), shape=(n_members, n_members))
+            cooccurrence = (grown + delta).tocsr()
+            cooccurrence.eliminate_zeros()
+            self.cooccurrence = cooccurrence
+            self._load_parties(connection)
+
+    def party(self, index):
+        code = self.member_party[index]
+        return self.parties[code] if code >= 0 else None
+
+    def collaborators(self, bioguide_id, limit=10):
+        """
+        Rank the members who share the most bills with a member.
+
+        :param bioguide_id: The member's bioguide ID.
+        :param limit: The number of collaborators to return.
+        :return: A list of {"bioguide_id", "party", "shared_bills"} rows, or None if the member is unknown.
+        """
+        with self.lock:
+            index = self.member_index.get(bioguide_id)
+            if index is None:
+                return None
+            row = self.cooccurrence.getrow(index)
+            others = row.indices != index
+            members, counts = row.indices[others], row.data[others]
+            order = np.lexsort((members, -counts))[:limit]
+            return [
+                {"bioguide_id": self.member_ids[members[i]], "party": self.party(members[i]),
+                 "shared_bills": int(counts[i])}
+                for i in order
+            ]
+
+    def bipartisan_scores(self):
+        """
+        Score every member by the share of their co-sponsorship links that cross party lines.
+
+        :return: A tuple of (bill counts, scores) arrays indexed by member; the score is NaN
+            for members of unknown party or without collaborators of known party.
+        """
+        with self.lock:
+            n_members = len(self.member_ids)
+            known = self.member_party >= 0
+            indicator = sparse.csr_matrix(
+                (np.ones(known.sum()), (np.flatnonzero(known), self.member_party[known])),
+                shape=(n_members, max(len(self.parties), 1)),
+            )
+            by_party = np.asarray((self.cooccurrence @ indicator).todense())
+            bills = self.cooccurrence.diagonal()
+            same = np.where(known, by_party[np.arange(n_members), np.maximum(self.member_party, 0)], 0)
+        links = by_party.sum(axis=1) - np.where(known, bills, 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(known & (links > 0), (by_party.sum(axis=1) - same) / links, np.nan)
+        return bills, scores
+
+
+def get_graph():
+    """
+    Return the co-sponsorship graph, building it on first use or after another process
+    synced to the store, and applying pending syncs.
+    """
+    global _graph
+    connection = get_connection()
+    with _graph_lock:
+        if _graph is None or _graph.watch.changed():
+            _graph = CosponsorGraph(connection)
+        graph = _graph
+    graph.refresh(connection)
+    return graph
+
+
+@on_sync
+def _record_sync(resource, congress, bill_type, bill_number):
+    if resource in ("details", "cosponsors") and _graph is not None:
+        _graph.mark_dirty(congress, bill_type, bill_number)
+
+
+def top_collaborators(bioguide_id, limit=10):
+    """
+    Return a member's bill count, bipartisan score and top collaborators, or None if unknown.
+    """
+    graph = get_graph()
+    with graph.lock:
+        collaborators = graph.collaborators(bioguide_id, limit)
+        if collaborators is None:
+            return None
+        index = graph.member_index[bioguide_id]
+        bills, scores = graph.bipartisan_scores()
+        return {
+            "bioguide_id": bioguide_id,
+            "party": graph.party(index),
+            "bills": int(bills[index]),
+            "bipartisan_score": None if np.isnan(scores[index]) else float(scores[index]),
+            "collaborators": collaborators,
+        }
+
+
+def bipartisan_ranking(party=None, min_bills=1, limit=20):
+    """
+    Rank members by bipartisan score.
+
+    :param party: Only rank members of this party (e.g., "D").
+    :param min_bills: Skip members on fewer bills than this.
+    :param limit: The number of members to return.
+    :return: A list of {"bioguide_id", "party", "bills", "bipartisan_score"} rows.
+    """
+    graph = get_graph()
+    with graph.lock:
+        bills, scores = graph.bipartisan_scores()
+        keep = ~np.isnan(scores) & (bills >= min_bills)
+        if party is not None:
+            keep &= graph.member_party == (graph.parties.index(party) if party in graph.parties else -2)
+        candidates = np.flatnonzero(keep)
+        order = candidates[np.lexsort((-bills[candidates], -scores[candidates]))][:limit]
+        return [
+            {"bioguide_id": graph.member_ids[i], "party": graph.party(i), "bills": int(bills[i]),
+             "bipartisan_score": float(scores[i])}
+            for i in order
+        ]
@@ -0,0 +1,458 @@
+"""
+crawler.py
+
+This module contains a resumable crawler that backfills the local store with
+every bill of a congress.
+
+The work queue lives in its own SQLite file: one row per (bill, resource)
+with a status, an attempt count and the earliest time it may be retried, plus
+a checkpoint of how far the bill listing has been paged. Every completed item
+is committed as it finishes, so a crawl killed at any point resumes from the
+queue and re-fetches at most the items that were in flight.
+
+Requests go through a RequestBudget shared by all workers: a token bucket
+holding the hourly rate limit of the Congress.gov API and an optional quota
+on the total number of requests for this run. Concurrency is bounded by the
+worker pool. Transient failures (429, 5xx, connection errors) are retried
+with exponential backoff; other errors fail the item after the first try.
+Responses for resources with tables are synced into the store, the rest are
+written as JSON files under CRAWL_CACHE_DIR. Titles, summaries and actions
+are also indexed for /bill-search/, in the crawler's own bill_search shard.
+
+Run from the repository root:
+
+    python -m app.api.services.crawler 118 --workers 4 --quota 5000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from fastapi import HTTPException
+
+from app.api.config import DATA_DIR
+from app.api.services import congress_api
+from app.api.services.bill_search import FIELDS, index_bill_field, maybe_flush
+from app.api.services.congress_store import sync_bill_resource
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PATH = os.getenv("CRAWL_QUEUE_PATH", os.path.join(DATA_DIR, "crawl_queue.db"))
+CRAWL_CACHE_DIR = os.path.join(DATA_DIR, "crawl")
+RATE_PER_HOUR = 5000
+PAGE_SIZE = 250
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 2.0
+
+RESOURCE_FETCHERS = {
+    "details": congress_api.get_bill_details,
+    "actions": congress_api.get_bill_actions,
+    "amendments": congress_api.get_bill_amendments,
+    "committees": congress_api.get_bill_committees,
+    "cosponsors": congress_api.get_bill_cosponsors,
+    "related-bills": congress_api.get_bill_related_bills,
+    "subjects": congress_api.get_bill_subjects,
+    "summaries": congress_api.get_bill_summaries,
+    "text": congress_api.get_bill_text_versions,
+    "titles": congress_api.get_bill_titles,
+}
+
+# The path to the list in each paginated response; further pages are appended to it.
+PAGED_KEYS = {
+    "actions": ("actions",),
+    "amendments": ("amendments",),
+    "committees": ("committees",),
+    "cosponsors": ("cosponsors",),
+    "related-bills": ("relatedBills",),
+    "subjects": ("subjects", "legislativeSubjects"),
+    "summaries": ("summaries",),
+    "text": ("textVersions",),
+    "titles": ("titles",),
+}
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    congress INTEGER NOT NULL,
+    bill_type TEXT NOT NULL,
+    bill_number INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    PRIMARY KEY (congress, bill_type, bill_number, resource)
+);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items(status, not_before);
+
+CREATE TABLE IF NOT EXISTS listings (
+    congress INTEGER PRIMARY KEY,
+    next_offset INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class QuotaExhausted(Exception):
+    """
+    Raised when the request quota for this run has been used up.
+    """
+
+
+class RequestBudget:
+    """
+    A thread-safe token bucket enforcing a request rate and an optional total quota.
+    """
+
+    def __init__(self, rate_per_hour=RATE_PER_HOUR, quota=None):
+        """
+        :param rate_per_hour: The sustained number of requests allowed per hour.
+        :param quota: The total number of requests allowed, or None for no limit.
+        """
+        self.rate = rate_per_hour / 3600.0
+        self.capacity = max(1.0, rate_per_hour / 60.0)
+        self.tokens = self.capacity
+        self.quota = quota
+        self.used = 0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait for a request slot.
+
+        :raises QuotaExhausted: If the quota has been used up.
+        """
+        while True:
+            with self.lock:
+                if self.quota is not None and self.used >= self.quota:
+                    raise QuotaExhausted()
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.used += 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+class WorkQueue:
+    """
+    The persistent queue of (bill, resource) items and the listing checkpoints.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: The SQLite file holding the queue; defaults to QUEUE_PATH.
+        """
+        path = path or QUEUE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(QUEUE_SCHEMA)
+
+    def listing(self, congress):
+        """
+        Return (next offset, complete) for the bill listing of a congress.
+        """
+        row = self.connection.execute(
+            "SELECT next_offset, complete FROM listings WHERE congress = ?", (congress,)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def add_listing_page(self, congress, bills, resources, next_offset, complete):
+        """
+        Queue every resource of a page of listed bills and advance the checkpoint atomically.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO items (congress, bill_type, bill_number, resource) VALUES (?, ?, ?, ?)",
+                [(congress, bill["type"].lower(), int(bill["number"]), resource)
+                 for bill in bills for resource in resources],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO listings (congress, next_offset, complete) VALUES (?, ?, ?)",
+                (congress, next_offset, int(complete)),
+            )
+
+    def ready(self, congress, limit, exclude=()):
+        """
+        Return up to `limit` pending items whose backoff has elapsed.
+        """
+        rows = self.connection.execute(
+            "SELECT congress, bill_type, bill_number, resource FROM items "
+            "WHERE congress = ? AND status = 'pending' AND not_before <= ? "
+            "ORDER BY bill_type, bill_number, resource LIMIT ?",
+            (congress, time.time(), limit + len(exclude)),
+        ).fetchall()
+        return [item for item in rows if item not in exclude][:limit]
+
+    def next_retry(self, congress):
+        """
+        Return when the earliest pending item may run, or None if nothing is pending.
+        """
+        return self.connection.execute(
+            "SELECT MIN(not_before) FROM items WHERE congress = ? AND status = 'pending'", (congress,)
+        ).fetchone()[0]
+
+    def mark_done(self, item):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE items SET status = 'done', attempts = attempts + 1, last_error = NULL "
+                "WHERE congress = ? AND bill_type = ? AND bill_number = ? AND resource = ?", item,
+            )
+
+    def mark_failed(self, item, error, retry_delay=None):
+        """
+        Record a failed attempt; the item is retried after `retry_delay` seconds, or fails for good if None.
+        """
+        status = "pending" if retry_delay is not None else "failed"
+        with self.connection:
+            self.connection.execute(
+                "UPDATE items SET status = ?, attempts = attempts + 1, not_before = ?, last_error = ? "
+                "WHERE congress = ? AND bill_type = ? AND bill_number = ? AND resource = ?",
+                (status, time.time() + (retry_delay or 0), str(error)[:500], *item),
+            )
+
+    def requeue_failed(self, congress):
+        """
+        Give every item that failed for good a fresh set of attempts.
+        """
+        with self.connection:
+            self.connection.execute(
+                "UPDATE items SET status = 'pending', attempts = 0, not_before = 0 "
+                "WHERE congress = ? AND status = 'failed'", (congress,),
+            )
+
+    def attempts(self, item):
+        return self.connection.execute(
+            "SELECT attempts FROM items WHERE congress = ? AND bill_type = ? AND bill_number = ? AND resource = ?",
+            item,
+        ).fetchone()[0]
+
+    def counts(self, congress):
+        """
+        Return the number of items per status for a congress.
+        """
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*) FROM items WHERE congress = ? GROUP BY status", (congress,)
+        ).fetchall()
+        return {"pending": 0, "done": 0, "failed": 0, **dict(rows)}
+
+
+class Progress:
+    """
+    Throughput and ETA for the items completed during this run.
+    """
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+        self.completed = 0
+        self.started = time.monotonic()
+
+    def update(self):
+        self.completed += 1
+        self.remaining -= 1
+
+    def report(self, budget):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.completed / elapsed
+        eta = self.remaining / rate if rate else float("inf")
+        return (
+            f"{self.completed} items this run, {self.remaining} remaining; "
+            f"{rate:.2f} items/s, {budget.used / elapsed:.2f} requests/s; ETA {_format_duration(eta)}"
+        )
+
+
+def _format_duration(seconds):
+    if seconds == float("inf"):
+        return "unknown"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s"
+
+
+def _is_transient(error):
+    """
+    Whether a failed request is worth retrying.
+    """
+    if isinstance(error, HTTPException):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, requests.RequestException)
+
+
+def list_bills(queue, congress, api_key, budget, resources):
+    """
+    Page through the bills of a congress, queueing their resources, from the last checkpoint.
+    """
+    offset, complete = queue.listing(congress)
+    while not complete:
+        budget.acquire()
+        page = congress_api.get_bills(congress, api_key, offset=offset, limit=PAGE_SIZE)
+        bills = page.get("bills", [])
+        offset += len(bills)
+        complete = not bills or not page.get("pagination", {}).get("next")
+        queue.add_listing_page(congress, bills, resources, offset, complete)
+        logger.info("Listed %d bills of the %dth congress", offset, congress)
+
+
+def fetch_resource(item, api_key, budget):
+    """
+    Fetch every page of one bill resource and save it.
+
+    :param item: A (congress, bill_type, bill_number, resource) tuple.
+    :return: The item.
+    """
+    congress, bill_type, bill_number, resource = item
+    fetcher = RESOURCE_FETCHERS[resource]
+    key = PAGED_KEYS.get(resource)
+    response = None
+    offset = 0
+    while True:
+        budget.acquire()
+        if key is None:
+            page = fetcher(congress, bill_type, bill_number, api_key)
+        else:
+            page = fetcher(congress, bill_type, bill_number, api_key, offset=offset, limit=PAGE_SIZE)
+        if response is None:
+            response = page
+        else:
+            _paged_list(response, key).extend(_paged_list(page, key))
+        if key is None or not page.get("pagination", {}).get("next"):
+            break
+        offset += PAGE_SIZE
+    if key is not None:
+        # The merged response holds every page, so it takes the last page's pagination (without "next").
+        response["pagination"] = page.get("pagination", {})
+    save_response(resource, congress, bill_type, bill_number, response)
+    return item
+
+
+def _paged_list(response, path):
+    """
+    Return the list at a PAGED_KEYS path of a response, adding an empty one if missing.
+    """
+    for key in path[:-1]:
+        response = response.setdefault(key, {})
+    return response.setdefault(path[-1], [])
+
+
+def save_response(resource, congress, bill_type, bill_number, response):
+    """
+    Sync a response into the store, or write it to the JSON cache if the store has no table for it.
+
+    Titles, summaries and actions are also added to the bill search index.
+    """
+    if resource in FIELDS:
+        index_bill_field(congress, bill_type, bill_number, resource, response)
+    if sync_bill_resource(resource, congress, bill_type, bill_number, response):
+        return
+    directory = os.path.join(CRAWL_CACHE_DIR, str(congress), bill_type, str(bill_number))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{resource}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(response, f)
+    os.replace(path + ".tmp", path)
+
+
+def crawl(congress, api_key, workers=4, rate_per_hour=RATE_PER_HOUR, quota=None, resources=None,
+          queue=None, report_every=30.0, max_attempts=MAX_ATTEMPTS, retry_failed=False):
+    """
+    Backfill every bill of a congress, resuming any earlier crawl of it.
+
+    :param congress: The congress number.
+    :param api_key: The Congress.gov API key.
+    :param workers: The maximum number of concurrent requests.
+    :param rate_per_hour: The request rate limit shared by all workers.
+    :param quota: The maximum number of requests for this run; the crawl stops cleanly when it is used.
+    :param resources: The bill resources to fetch; defaults to all of RESOURCE_FETCHERS.
+    :param queue: The WorkQueue; defaults to the one at QUEUE_PATH.
+    :param report_every: Seconds between progress reports.
+    :param max_attempts: Attempts before a transiently failing item is given up on.
+    :param retry_failed: Whether to retry the items earlier runs gave up on.
+    :return: The number of items per status once the run ends.
+    """
+    resources = list(resources or RESOURCE_FETCHERS)
+    queue = queue or WorkQueue()
+    budget = RequestBudget(rate_per_hour, quota)
+    if retry_failed:
+        queue.requeue_failed(congress)
+    try:
+        list_bills(queue, congress, api_key, budget, resources)
+    except QuotaExhausted:
+        logger.info("Quota used up while listing bills; run again to continue")
+        return queue.counts(congress)
+
+    progress = Progress(queue.counts(congress)["pending"])
+    last_report = time.monotonic()
+    in_flight = {}
+    exhausted = False
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                if not exhausted:
+                    for item in queue.ready(congress, 2 * workers - len(in_flight), exclude=set(in_flight.values())):
+                        in_flight[pool.submit(fetch_resource, item, api_key, budget)] = item
+                if not in_flight:
+                    next_retry = queue.next_retry(congress)
+                    if exhausted or next_retry is None:
+                        break
+                    time.sleep(max(0.0, min(next_retry - time.time(), report_every)))
+                    continue
+
+                finished, _ = wait(in_flight, timeout=report_every, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        queue.mark_done(item)
+                    elif isinstance(error, QuotaExhausted):
+                        exhausted = True
+                        continue
+                    elif _is_transient(error) and queue.attempts(item) + 1 < max_attempts:
+                        queue.mark_failed(item, error, retry_delay=BACKOFF_SECONDS * 2 ** queue.attempts(item))
+                        continue
+                    else:
+                        queue.mark_failed(item, error)
+                        logger.warning("Giving up on %s: %s", item, error)
+                    progress.update()
+
+                if time.monotonic() - last_report >= report_every:
+                    logger.info(progress.report(budget))
+                    last_report = time.monotonic()
+
+    finally:
+        # Persist what was indexed since the last periodic flush.
+        maybe_flush(force=True)
+
+    counts = queue.counts(congress)
+    logger.info("%s; %s", progress.report(budget), counts)
+    if exhausted:
+        logger.info("Quota used up; run again to continue")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the local store with every bill of a congress.")
+    parser.add_argument("congress", type=int)
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent requests.")
+    parser.add_argument("--rate", type=int, default=RATE_PER_HOUR, help="Requests per hour across all workers.")
+    parser.add_argument("--quota", type=int, default=None, help="Stop after this many requests.")
+    parser.add_argument("--resources", nargs="+", choices=list(RESOURCE_FETCHERS), default=None)
+    parser.add_argument("--retry-failed", action="store_true", help="Retry items earlier runs gave up on.")
+    parser.add_argument("--api-key", default=os.getenv("CONGRESS_GOV_API_KEY"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    crawl(args.congress, args.api_key, workers=args.workers, rate_per_hour=args.rate, quota=args.quota,
+          resources=args.resources, retry_failed=args.retry_failed)
+
+
+if __name__ == "__main__":
+    main()
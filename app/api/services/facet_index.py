@@ -0,0 +1,263 @@
+"""
+facet_index.py
+
+This module contains a bitmap index of stored bills by facet: congress,
+origin chamber, policy area, legislative subject and status.
+
+Bills are numbered by their `bills.id` ordinal in the local store. Each
+facet value has a bitmap with bit i set when bill i has that value. The
+bitmaps are NumPy uint8 arrays packed eight bills per byte, so a congress of
+~15,000 bills takes ~2 KB per value. A filter is a few vectorized
+bitwise_and/bitwise_or calls over these arrays. Facet counts AND the result
+bitmap with every value's bitmap at once and sum the bits.
+
+The index is built from the store on first use. After that, syncs of bill
+details and subjects update the synced bill's bits in place. Bills the
+crawler writes from its own process are only picked up by a rebuild, which
+get_facet_index starts once the index's ChangeWatch reports them.
+"""
+
+import re
+import threading
+
+import numpy as np
+
+from app.api.services import congress_store
+from app.api.services.congress_store import ChangeWatch, get_connection, on_sync
+
+FACETS = ("congress", "origin_chamber", "policy_area", "subject", "status")
+
+# Latest action text patterns, checked in order; bills matching none are "introduced".
+STATUS_PATTERNS = (
+    ("enacted", re.compile(r"Became (Public|Private) Law", re.IGNORECASE)),
+    ("vetoed", re.compile(r"Vetoed", re.IGNORECASE)),
+    ("passed", re.compile(r"Passed|Agreed to|Resolving differences", re.IGNORECASE)),
+    ("reported", re.compile(r"Reported|Ordered to be reported|Placed on .*Calendar", re.IGNORECASE)),
+)
+
+# Number of set bits in each byte value.
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def bill_status(latest_action_text):
+    """
+    Classify a bill's progress from the text of its latest action.
+    """
+    for status, pattern in STATUS_PATTERNS:
+        if latest_action_text and pattern.search(latest_action_text):
+            return status
+    return "introduced"
+
+
+class Facet:
+    """
+    The bitmaps of every value of one facet, stored as the rows of a 2-D uint8 array.
+    """
+
+    def __init__(self, n_bytes):
+        self.values = []
+        self.codes = {}
+        self.bits = np.zeros((0, n_bytes), dtype=np.uint8)
+
+    def row(self, value):
+        """
+        Return the bitmap row of a value, adding an empty one if new.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            if code == len(self.bits):
+                grown = np.zeros((max(8, 2 * len(self.bits)), self.bits.shape[1]), dtype=np.uint8)
+                grown[:len(self.bits)] = self.bits
+                self.bits = grown
+        return code
+
+    def resize(self, n_bytes):
+        grown = np.zeros((len(self.bits), n_bytes), dtype=np.uint8)
+        grown[:, :self.bits.shape[1]] = self.bits
+        self.bits = grown
+
+    def set(self, ordinal, values):
+        """
+        Make `values` the values of bill `ordinal`, clearing any it had before.
+        """
+        byte, mask = ordinal >> 3, np.uint8(0x80 >> (ordinal & 7))
+        self.bits[:, byte] &= ~mask
+        for value in values:
+            if value is not None:
+                code = self.row(value)
+                self.bits[code, byte] |= mask
+
+    def bitmap(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            return np.zeros(self.bits.shape[1], dtype=np.uint8)
+        return self.bits[code]
+
+
+class FacetIndex:
+    """
+    Bitmaps of bill ordinals for every facet value.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: A connection to the local store.
+        """
+        self.path = congress_store.DB_PATH
+        self.watch = ChangeWatch()
+        self.lock = threading.Lock()
+        self.n_bytes = 0
+        self.facets = {}
+        self.valid = np.zeros(0, dtype=np.uint8)
+        max_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM bills").fetchone()[0]
+        self._ensure_capacity(max_id)
+
+        bills = connection.execute(
+            "SELECT id, congress, origin_chamber, policy_area, latest_action_text FROM bills"
+        ).fetchall()
+        for ordinal, congress, chamber, policy_area, latest_action in bills:
+            self.facets["congress"].set(ordinal, [congress])
+            self.facets["origin_chamber"].set(ordinal, [chamber])
+            self.facets["policy_area"].set(ordinal, [policy_area])
+            self.facets["status"].set(ordinal, [bill_status(latest_action)])
+        subjects = {}
+        for ordinal, name in connection.execute("SELECT bill_id, name FROM subjects").fetchall():
+            subjects.setdefault(ordinal, []).append(name)
+        for ordinal, names in subjects.items():
+            self.facets["subject"].set(ordinal, names)
+        self.valid = self._ordinals_bitmap([row[0] for row in bills])
+
+    def _ensure_capacity(self, ordinal):
+        n_bytes = ordinal // 8 + 1
+        if n_bytes <= self.n_bytes:
+            return
+        n_bytes = max(n_bytes, 2 * self.n_bytes)
+        for name in FACETS:
+            if name in self.facets:
+                self.facets[name].resize(n_bytes)
+            else:
+                self.facets[name] = Facet(n_bytes)
+        grown = np.zeros(n_bytes, dtype=np.uint8)
+        grown[:self.n_bytes] = self.valid
+        self.valid = grown
+        self.n_bytes = n_bytes
+
+    def _ordinals_bitmap(self, ordinals):
+        bits = np.zeros(self.n_bytes * 8, dtype=bool)
+        bits[np.asarray(ordinals, dtype=np.int64)] = True
+        return np.packbits(bits)
+
+    def update_bill(self, connection, congress, bill_type, bill_number):
+        """
+        Re-read one bill's facet values from the store after a sync.
+        """
+        bill = connection.execute(
+            "SELECT id, origin_chamber, policy_area, latest_action_text FROM bills "
+            "WHERE congress = ? AND bill_type = ? AND bill_number = ?",
+            (congress, bill_type, bill_number),
+        ).fetchone()
+        if bill is None:
+            return
+        ordinal = bill["id"]
+        subjects = [row[0] for row in connection.execute("SELECT name FROM subjects WHERE bill_id = ?", (ordinal,))]
+        with self.lock:
+            self._ensure_capacity(ordinal)
+            self.facets["congress"].set(ordinal, [congress])
+            self.facets["origin_chamber"].set(ordinal, [bill["origin_chamber"]])
+            self.facets["policy_area"].set(ordinal, [bill["policy_area"]])
+            self.facets["status"].set(ordinal, [bill_status(bill["latest_action_text"])])
+            self.facets["subject"].set(ordinal, subjects)
+            self.valid[ordinal >> 3] |= np.uint8(0x80 >> (ordinal & 7))
+
+    def filter(self, filters, match_all=()):
+        """
+        Select the bills matching every filtered facet.
+
+        :param filters: A dict of facet name to a list of values. A bill matches a facet if it has any
+            of the values, or all of them for facets named in `match_all`.
+        :param match_all: Facets whose values must all match.
+        :return: A packed bitmap of the matching bill ordinals.
+        """
+        with self.lock:
+            return self._filter(filters, match_all)
+
+    def _filter(self, filters, match_all):
+        result = self.valid.copy()
+        for name, values in filters.items():
+            if not values:
+                continue
+            bitmaps = [self.facets[name].bitmap(value) for value in values]
+            combine = np.bitwise_and if name in match_all else np.bitwise_or
+            result &= combine.reduce(bitmaps)
+        return result
+
+    def _counts(self, bitmap, facet):
+        f = self.facets[facet]
+        counts = POPCOUNT[f.bits[:len(f.values)] & bitmap].sum(axis=1, dtype=np.int64)
+        return {str(value): int(count) for value, count in zip(f.values, counts) if count}
+
+    def filter_counts(self, filters, match_all=(), count_facets=FACETS):
+        """
+        Select the matching bills and count them per facet value in one critical section.
+
+        A sync in between could grow the bitmaps, so the result of an earlier
+        `filter` may no longer line up with the facet bitmaps.
+
+        :param filters: A dict of facet name to a list of values, as for `filter`.
+        :param match_all: Facets whose values must all match.
+        :param count_facets: The facets to count within the matching bills.
+        :return: A tuple of (packed bitmap of matches, {facet: {value (as a string): count}}).
+        """
+        with self.lock:
+            bitmap = self._filter(filters, match_all)
+            return bitmap, {facet: self._counts(bitmap, facet) for facet in count_facets}
+
+
+def ordinals(bitmap):
+    """
+    Return the bill ordinals set in a packed bitmap, in ascending order.
+    """
+    return np.flatnonzero(np.unpackbits(bitmap))
+
+
+def get_facet_index():
+    """
+    Return the facet index, building it from the store on first use or when the crawler has added bills.
+    """
+    global _index
+    with _index_lock:
+        if _index is None or _index.watch.changed():
+            _index = FacetIndex(get_connection())
+        return _index
+
+
+@on_sync
+def _update_on_sync(resource, congress, bill_type, bill_number):
+    if resource in ("details", "subjects") and _index is not None and _index.path == congress_store.DB_PATH:
+        _index.update_bill(get_connection(), congress, bill_type, bill_number)
+
+
+def search_facets(filters, match_all=(), count_facets=FACETS, limit=100, offset=0):
+    """
+    Filter stored bills by facet values and count the matches per facet value.
+
+    :param filters: A dict of facet name to a list of values.
+    :param match_all: Facets whose values must all match rather than any.
+    :param count_facets: The facets to count within the matching bills.
+    :param limit: The maximum number of bills to return.
+    :param offset: The number of matching bills to skip.
+    :return: A dict with the total, a page of matching bill ordinals and per-facet counts.
+    """
+    bitmap, counts = get_facet_index().filter_counts(filters, match_all, count_facets)
+    matches = ordinals(bitmap)
+    return {
+        "total": int(len(matches)),
+        "ordinals": matches[offset:offset + limit],
+        "counts": counts,
+    }
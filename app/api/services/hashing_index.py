@@ -0,0 +1,257 @@
+"""
+hashing_index.py
+
+This module contains an append-only TF-IDF index for corpora that grow over
+time, such as the daily stream of new bill actions and summaries.
+
+Terms are mapped to columns with feature hashing, so there is no vocabulary
+to refit. Raw term counts are stored per chunk, and document frequencies are
+kept as running counts for the columns that occur in the corpus: a sorted
+array of column numbers and one of counts, rather than one entry per hash
+bucket. Appending chunks only costs the new data. IDF weights and document
+norms are derived from those counts on the first query after a change and
+reused until the next one. Deleted chunks are tombstoned and physically
+dropped by `compact`.
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from app.api.services.semantic_search import densify, top_k
+
+N_FEATURES = 2**20
+COMPACT_RATIO = 0.25
+
+
+class HashingIndex:
+    """
+    An incrementally maintained TF-IDF index over hashed term counts.
+
+    Scores match a TfidfVectorizer fitted on the live chunks (smoothed IDF,
+    L2-normalised rows), apart from rare hash collisions.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        """
+        :param n_features: The number of hash buckets.
+        """
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, dtype=np.float32
+        )
+        self.chunks = []
+        self.keys = []
+        self.key_to_id = {}
+        self.deleted = np.zeros(0, dtype=bool)
+        # Document frequencies of the columns seen so far, sorted by column.
+        self.df_columns = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.num_live = 0
+        self.counts = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self.pending = []
+        self._idf = None
+        self._norms = None
+
+    def __len__(self):
+        return self.num_live
+
+    def hash_counts(self, texts):
+        """
+        Convert texts to raw hashed term counts.
+
+        :param texts: A list of strings.
+        :return: A sparse (len(texts) x n_features) matrix of counts.
+        """
+        return self.vectorizer.transform(texts)
+
+    def append(self, chunks, keys=None, counts=None):
+        """
+        Add chunks to the index without touching the existing ones.
+
+        :param chunks: The list of chunk texts.
+        :param keys: Optional unique keys, one per chunk, for later deletion.
+        :param counts: Optional precomputed `hash_counts(chunks)`, e.g. from a worker process.
+        :return: The ids assigned to the new chunks.
+        """
+        if keys is None:
+            keys = [None] * len(chunks)
+        if counts is None:
+            counts = self.hash_counts(chunks)
+        counts = sparse.csr_matrix(counts, dtype=np.float32)
+
+        first_id = len(self.chunks)
+        self.chunks.extend(chunks)
+        self.keys.extend(keys)
+        for offset, key in enumerate(keys):
+            if key is not None:
+                self.key_to_id[key] = first_id + offset
+
+        # Each row has unique column indices, so counting indices counts documents.
+        self._update_doc_freq(counts.indices, 1)
+        self.deleted = np.concatenate([self.deleted, np.zeros(len(chunks), dtype=bool)])
+        self.num_live += len(chunks)
+        self.pending.append(counts)
+        self._idf = None
+        self._norms = None
+        return list(range(first_id, first_id + len(chunks)))
+
+    def _update_doc_freq(self, columns, sign):
+        """
+        Add (sign 1) or remove (sign -1) one document per occurrence of a column.
+        """
+        columns, amounts = np.unique(np.asarray(columns, dtype=np.int64), return_counts=True)
+        positions, found = self._find_columns(columns)
+        self.doc_freq[positions[found]] += sign * amounts[found]
+        if not found.all():
+            self.df_columns = np.insert(self.df_columns, positions[~found], columns[~found])
+            self.doc_freq = np.insert(self.doc_freq, positions[~found], sign * amounts[~found])
+
+    def _find_columns(self, columns):
+        """
+        Locate columns in `df_columns`.
+
+        :return: A tuple of (insertion positions, mask of the columns already present).
+        """
+        positions = np.searchsorted(self.df_columns, columns)
+        found = positions < self.df_columns.size
+        found[found] = self.df_columns[positions[found]] == columns[found]
+        return positions, found
+
+    def delete(self, ids):
+        """
+        Tombstone chunks. Their ids stay reserved until the next `compact`.
+
+        :param ids: The chunk ids to delete.
+        """
+        matrix = self._matrix()
+        rows = []
+        for chunk_id in ids:
+            if self.deleted[chunk_id]:
+                continue
+            rows.append(matrix.indices[matrix.indptr[chunk_id]:matrix.indptr[chunk_id + 1]])
+            self.deleted[chunk_id] = True
+            self.num_live -= 1
+            key = self.keys[chunk_id]
+            if key is not None and self.key_to_id.get(key) == chunk_id:
+                del self.key_to_id[key]
+        if rows:
+            self._update_doc_freq(np.concatenate(rows), -1)
+        self._idf = None
+        self._norms = None
+
+    def delete_keys(self, keys):
+        """
+        Tombstone chunks by the keys they were appended with.
+
+        :param keys: The chunk keys to delete; unknown keys are ignored.
+        """
+        self.delete([self.key_to_id[key] for key in keys if key in self.key_to_id])
+
+    def compact(self):
+        """
+        Drop tombstoned chunks and renumber the rest.
+
+        :return: An array mapping each old id to its new id, or -1 if it was dropped.
+        """
+        matrix = self._matrix()
+        keep = ~self.deleted
+        remap = np.where(keep, np.cumsum(keep) - 1, -1)
+
+        self.counts = matrix[keep]
+        self.chunks = [chunk for chunk, alive in zip(self.chunks, keep) if alive]
+        self.keys = [key for key, alive in zip(self.keys, keep) if alive]
+        self.key_to_id = {key: i for i, key in enumerate(self.keys) if key is not None}
+        self.deleted = np.zeros(len(self.chunks), dtype=bool)
+        seen = self.doc_freq > 0
+        self.df_columns = self.df_columns[seen]
+        self.doc_freq = self.doc_freq[seen]
+        self._idf = None
+        self._norms = None
+        return remap
+
+    def maybe_compact(self):
+        """
+        Compact once more than COMPACT_RATIO of the chunk ids are tombstoned.
+
+        :return: The id remapping from `compact`, or None if nothing was done.
+        """
+        if self.deleted.sum() > COMPACT_RATIO * len(self.deleted):
+            return self.compact()
+        return None
+
+    def _matrix(self):
+        """
+        Merge appended segments into the main count matrix.
+        """
+        if self.pending:
+            self.counts = sparse.vstack([self.counts] + self.pending, format="csr")
+            self.pending = []
+        return self.counts
+
+    def idf(self, columns):
+        """
+        Look up smoothed IDF weights from the running document frequencies.
+
+        :param columns: An array of hash columns.
+        :return: A float32 array with one weight per column.
+        """
+        if self._idf is None:
+            self._idf = (np.log((1 + self.num_live) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        columns = np.asarray(columns, dtype=np.int64)
+        positions, found = self._find_columns(columns)
+        weights = np.full(columns.size, np.log(1 + self.num_live) + 1, dtype=np.float32)
+        weights[found] = self._idf[positions[found]]
+        return weights
+
+    def scores(self, query, ids=None):
+        """
+        Compute the cosine similarity of a query against every chunk id.
+
+        :param query: The search query string.
+        :param ids: Optionally, only score these chunk ids.
+        :return: A 1-D array with one relevance score per chunk id (or per entry
+            of `ids`); deleted ids score 0.
+        """
+        matrix = self._matrix()
+        if ids is not None:
+            ids = np.asarray(ids, dtype=np.int64)
+        size = matrix.shape[0] if ids is None else len(ids)
+        if matrix.shape[0] == 0 or size == 0:
+            return np.zeros(size, dtype=np.float32)
+        if self._norms is None:
+            # ||tf * idf|| per row, recomputed only after the corpus changes.
+            weights = np.square(matrix.data * self.idf(matrix.indices))
+            squares = sparse.csr_matrix((weights, matrix.indices, matrix.indptr), shape=matrix.shape)
+            self._norms = np.sqrt(np.asarray(squares.sum(axis=1)).ravel())
+            self._norms[self._norms == 0] = 1.0
+
+        query_counts = sparse.csr_matrix(self.hash_counts([query]), dtype=np.float32)
+        query_idf = self.idf(query_counts.indices)
+        query_norm = np.sqrt(np.square(query_counts.data * query_idf).sum())
+        if query_norm == 0:
+            return np.zeros(size, dtype=np.float32)
+        # tf * idf^2: one idf for the query's weights and one for the stored raw counts.
+        query_weights = sparse.csr_matrix(
+            (query_counts.data * query_idf ** 2, query_counts.indices, query_counts.indptr), shape=query_counts.shape
+        )
+
+        if ids is None:
+            raw = densify(matrix @ query_weights.T).ravel()
+            result = (raw / self._norms / query_norm).astype(np.float32)
+            result[self.deleted] = 0.0
+        else:
+            raw = densify(matrix[ids] @ query_weights.T).ravel()
+            result = (raw / self._norms[ids] / query_norm).astype(np.float32)
+            result[self.deleted[ids]] = 0.0
+        return result
+
+    def search(self, query, k=5, threshold=0.1):
+        """
+        Find the chunks most relevant to a query.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param threshold: The minimum relevance score to consider a match.
+        :return: A list of (chunk id, score) pairs ordered by descending score.
+        """
+        return top_k(self.scores(query), k, threshold)
@@ -0,0 +1,144 @@
+"""
+hybrid_search.py
+
+This module contains a hybrid retriever that combines lexical and vector
+search over the same chunks.
+
+BM25 catches exact tokens such as bill numbers ("H.R. 1234") and surnames
+that a reduced-dimension embedding blurs away, while the LSA vector pass
+matches paraphrases that share few words with the query. Both passes run in
+parallel and their rankings are merged with reciprocal rank fusion, which
+only needs ranks, so the two very different score scales never have to be
+calibrated against each other. On corpora of ANN_MIN_CHUNKS chunks or more,
+the vector pass probes an IVF index instead of scoring every chunk.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.api.services.ann_index import AnnIndex, LsaEmbedder
+from app.api.services.bm25 import Bm25Index
+from app.api.services.semantic_search import get_index, top_k
+
+RRF_K = 60
+CANDIDATE_DEPTH = 50
+VECTOR_THRESHOLD = 0.1
+N_COMPONENTS = 128
+ANN_MIN_CHUNKS = int(os.getenv("ANN_MIN_CHUNKS", 20000))
+
+_executor = ThreadPoolExecutor(max_workers=4)
+
+
+class HybridIndex:
+    """
+    A BM25 index and an LSA embedding over the same list of chunks.
+    """
+
+    def __init__(self, chunks, n_components=N_COMPONENTS):
+        """
+        :param chunks: The list of text chunks to index.
+        :param n_components: The LSA dimensionality for the vector pass.
+        """
+        self.ann = None
+        self.chunks = list(chunks)
+        self.lexical = Bm25Index()
+        for i, chunk in enumerate(self.chunks):
+            self.lexical.add(str(i), chunk)
+        # Merge the postings now: searches run concurrently on the cached index
+        # and must never flush it themselves.
+        self.lexical.flush()
+        try:
+            self.embedder, self.vectors = LsaEmbedder.fit(self.chunks, n_components=n_components)
+        except ValueError:
+            # No indexable terms at all; only the lexical pass can (not) match.
+            self.embedder, self.vectors = None, None
+        if self.vectors is not None and len(self.chunks) >= ANN_MIN_CHUNKS:
+            # The IVF index keeps its own, cluster-ordered copy of the vectors.
+            self.ann = AnnIndex.from_embeddings(self.embedder, self.vectors)
+            self.vectors = None
+
+    def lexical_ranking(self, query, depth=CANDIDATE_DEPTH):
+        """
+        Rank chunks by BM25.
+
+        :return: A list of (chunk index, score) pairs, best first.
+        """
+        return top_k(self.lexical.scores(query), depth, threshold=np.finfo(np.float32).tiny)
+
+    def vector_ranking(self, query, depth=CANDIDATE_DEPTH):
+        """
+        Rank chunks by cosine similarity of their LSA vectors.
+
+        :return: A list of (chunk index, score) pairs, best first.
+        """
+        if self.embedder is None:
+            return []
+        if self.ann is not None:
+            return self.ann.search(query, depth, threshold=VECTOR_THRESHOLD)
+        query_vector = self.embedder.embed([query])[0]
+        return top_k(self.vectors @ query_vector, depth, threshold=VECTOR_THRESHOLD)
+
+    def search(self, query, k=5, depth=CANDIDATE_DEPTH):
+        """
+        Run both passes in parallel and fuse their rankings.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param depth: How many candidates each pass contributes to the fusion.
+        :return: A tuple of (list of (chunk index, fused score) pairs, dict of stage timings in ms).
+        """
+        start = time.perf_counter()
+        lexical = _executor.submit(_timed, self.lexical_ranking, query, depth)
+        vector = _executor.submit(_timed, self.vector_ranking, query, depth)
+        lexical_ranking, lexical_ms = lexical.result()
+        vector_ranking, vector_ms = vector.result()
+
+        fusion_start = time.perf_counter()
+        fused = reciprocal_rank_fusion([lexical_ranking, vector_ranking])[:k]
+        end = time.perf_counter()
+        timings = {
+            "lexical_ms": lexical_ms,
+            "vector_ms": vector_ms,
+            "fusion_ms": (end - fusion_start) * 1000,
+            "total_ms": (end - start) * 1000,
+        }
+        return fused, timings
+
+
+def _timed(function, *args):
+    """
+    Call a function and return its result with the elapsed milliseconds.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Merge rankings by summing 1 / (k + rank) for every list an item appears in.
+
+    :param rankings: Lists of (item, score) pairs, each ordered best first.
+    :param k: The RRF damping constant; larger values flatten the rank curve.
+    :return: A list of (item, fused score) pairs ordered by descending fused score.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (item, _) in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+def hybrid_search(query, chunks, k=5):
+    """
+    Performs a hybrid lexical and vector search on the given chunks of text.
+
+    :param query: The search query string.
+    :param chunks: The list of text chunks to search within.
+    :param k: The maximum number of chunks to return.
+    :return: A tuple of (list of (chunk index, fused score) pairs, dict of stage timings in ms).
+    """
+    return get_index(chunks, factory=HybridIndex).search(query, k)
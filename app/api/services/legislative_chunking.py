@@ -0,0 +1,152 @@
+"""
+legislative_chunking.py
+
+This module contains a structure-aware chunker for bill text.
+
+Bills are organised into divisions, titles, subtitles and numbered sections
+("SECTION 1.", "SEC. 2."), which are in turn split into lettered subsections.
+One pass of a single compiled pattern finds every such header. Chunks never
+cross a section or higher-level header; a section longer than the chunk size
+is split at its subsections where possible, and otherwise at whitespace.
+
+Chunks are (start, end) spans over the text they came from, each carrying the
+division, title, subtitle and section it belongs to, so retrieval can be
+restricted to part of a bill.
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+HEADER_PATTERN = re.compile(
+    r"^[ \t]*(?:"
+    r"DIVISION\s+(?P<division>[A-Z]{1,3})\b"
+    r"|TITLE\s+(?P<title>[IVXLC]+)\b"
+    r"|Subtitle\s+(?P<subtitle>[A-Z]{1,2})\b"
+    r"|(?:SECTION|SEC\.)\s+(?P<section>\d+[A-Za-z]?(?:-\d+)?)\."
+    r"|\((?P<subdivision>[a-z]{1,2}|\d{1,2})\)"
+    r")[ \t]*(?P<heading>[^\n]*)",
+    re.MULTILINE,
+)
+NON_SPACE_PATTERN = re.compile(r"\S")
+
+SectionChunk = namedtuple(
+    "SectionChunk", ["start", "end", "division", "title", "subtitle", "section", "heading"]
+)
+
+# The header levels, outermost first; a header resets every level below it.
+LEVELS = ("division", "title", "subtitle", "section")
+
+
+def _heading(match):
+    return match.group("heading").strip(" \t.-—–").strip() or None
+
+
+def section_spans(text, max_chunk_size=2000, context=None, pos=0):
+    """
+    Split bill text into chunks aligned to its structure.
+
+    :param text: The bill text.
+    :param max_chunk_size: The maximum size of each chunk in characters.
+    :param context: The (division, title, subtitle, section, heading) in effect
+        at `pos`, when chunking continues from an earlier piece of the text.
+    :param pos: Where in `text` to start.
+    :return: A list of SectionChunk; text[chunk.start:chunk.end] is the chunk text.
+    """
+    state = dict(zip(LEVELS + ("heading",), context or (None,) * 5))
+    # Hard breaks end a chunk and change its metadata; soft breaks
+    # (subsections) are preferred places to split long sections.
+    breaks = [(pos, dict(state))]
+    soft = []
+    for match in HEADER_PATTERN.finditer(text, pos):
+        if match.group("subdivision"):
+            soft.append(match.start())
+            continue
+        level = next(level for level in LEVELS if match.group(level))
+        for lower in LEVELS[LEVELS.index(level):]:
+            state[lower] = None
+        state[level] = match.group(level)
+        state["heading"] = _heading(match)
+        breaks.append((match.start(), dict(state)))
+    breaks.append((len(text), None))
+
+    spans = []
+    for (start, meta), (end, _) in zip(breaks, breaks[1:]):
+        while start < end:
+            if not NON_SPACE_PATTERN.search(text, start, end):
+                break
+            cut = end
+            if end - start > max_chunk_size:
+                limit = start + max_chunk_size
+                i = bisect_right(soft, limit) - 1
+                if i >= 0 and soft[i] > start:
+                    cut = soft[i]
+                else:
+                    space = max(text.rfind(" ", start + 1, limit), text.rfind("\n", start + 1, limit))
+                    cut = space if space > start else limit
+            spans.append(SectionChunk(start, cut, meta["division"], meta["title"],
+                                      meta["subtitle"], meta["section"], meta["heading"]))
+            start = cut
+    return spans
+
+
+def iter_section_chunks(pieces, max_chunk_size=2000):
+    """
+    Chunk a stream of text pieces by structure as it arrives.
+
+    Text is buffered until it holds several chunks' worth; every chunk but
+    the last, possibly incomplete one is then emitted and the buffer is cut
+    back to where that last chunk starts.
+
+    :param pieces: An iterable of text pieces, e.g. from a streaming parser.
+    :param max_chunk_size: The maximum size of each chunk in characters.
+    :return: A generator of (chunk text, SectionChunk) pairs. Span offsets are
+        relative to the whole stream.
+    """
+    buffer = ""
+    base = 0
+    context = None
+    pos = 0
+
+    def emit(spans):
+        for span in spans:
+            yield buffer[span.start:span.end], span._replace(start=base + span.start - pos, end=base + span.end - pos)
+
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) < 4 * max_chunk_size:
+            continue
+        spans = section_spans(buffer, max_chunk_size, context, pos)
+        if len(spans) < 2:
+            continue
+        yield from emit(spans[:-1])
+        last = spans[-1]
+        context = last[2:]
+        # Keep one character before the cut so "^" still only matches at line starts.
+        base += last.start - pos
+        buffer = buffer[last.start - 1:]
+        pos = 1
+
+    yield from emit(section_spans(buffer, max_chunk_size, context, pos))
+
+
+def section_mask(chunks, division=None, title=None, subtitle=None, section=None):
+    """
+    Select the chunks that belong to part of a bill.
+
+    :param chunks: A list of SectionChunk.
+    :param division: A division letter, e.g. "A".
+    :param title: A title numeral, e.g. "IV".
+    :param subtitle: A subtitle letter, e.g. "B".
+    :param section: A section number, e.g. "101".
+    :return: A boolean array with True for each matching chunk.
+    """
+    criteria = {"division": division, "title": title, "subtitle": subtitle, "section": section}
+    mask = np.ones(len(chunks), dtype=bool)
+    for field, value in criteria.items():
+        if value is not None:
+            wanted = str(value).upper()
+            mask &= np.array([(getattr(chunk, field) or "").upper() == wanted for chunk in chunks], dtype=bool)
+    return mask
@@ -0,0 +1,266 @@
+"""
+member_document.py
+
+This module builds the searchable knowledge document that /chat/ answers
+questions about a member of Congress from.
+
+The member's details, sponsored legislation and cosponsored legislation are
+fetched concurrently, together with the titles of related bills from the
+local store, and rendered into short passages: identity, terms served, party
+history, leadership roles, one passage per bill and one per related bill.
+The document is cached per bioguide ID together with its prebuilt search
+index, so repeat questions about the same member are answered without any
+upstream round trip until the cache entry expires or the member's data is
+synced again. A sync also drops the member's cached /chat/ results.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from fastapi import HTTPException
+
+from app.api.services.chunking import chunk_text
+from app.api.services.congress_api import (
+    get_member_details, get_member_sponsored_legislation, get_member_cosponsored_legislation
+)
+from app.api.services.congress_store import bill_member_ids, on_member_sync, on_sync, related_bill_titles
+from app.api.services.result_cache import member_source, result_cache
+from app.api.services.semantic_search import corpus_fingerprint, get_index
+
+MEMBER_CACHE_SIZE = 256
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", 3600))
+LEGISLATION_LIMIT = 250
+# Bill resources that appear in member documents; syncing one invalidates the documents of the bill's members.
+MEMBER_BILL_RESOURCES = ("details", "actions", "cosponsors", "related-bills")
+
+_executor = ThreadPoolExecutor(max_workers=8)
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+class MemberDocument:
+    """
+    A rendered member knowledge document, its chunks and their search index.
+    """
+
+    def __init__(self, member_id, passages):
+        """
+        :param member_id: The bioguide ID of the member.
+        :param passages: The rendered passages, in document order.
+        """
+        self.member_id = member_id
+        self.passages = passages
+        self.text = "\n\n".join(passages)
+        self.chunks = [chunk for passage in passages for chunk in chunk_text(passage)]
+        self.fingerprint = corpus_fingerprint(self.chunks)
+        self.index = get_index(self.chunks)
+        self.built_at = time.monotonic()
+
+
+def fetch_member_sources(member_id, api_key):
+    """
+    Fetch the member's details, legislation and related bill titles concurrently.
+
+    Everything but the details is optional: if one of them fails, the
+    document is built without it rather than failing the whole request.
+
+    :param member_id: The bioguide ID of the member.
+    :param api_key: The Congress.gov API key.
+    :return: A tuple of (member details, sponsored list, cosponsored list, related bills list).
+    """
+    details = _executor.submit(get_member_details, member_id, api_key)
+    sponsored = _executor.submit(get_member_sponsored_legislation, member_id, api_key, limit=LEGISLATION_LIMIT)
+    cosponsored = _executor.submit(get_member_cosponsored_legislation, member_id, api_key, limit=LEGISLATION_LIMIT)
+    related = _executor.submit(related_bill_titles, member_id)
+
+    member = details.result()["member"]
+    return (
+        member,
+        _optional_list(sponsored, "sponsoredLegislation"),
+        _optional_list(cosponsored, "cosponsoredLegislation"),
+        _optional_list(related),
+    )
+
+
+def _optional_list(future, key=None):
+    """
+    Return a fetched list, or an empty one if the fetch failed.
+    """
+    try:
+        result = future.result()
+    except (HTTPException, requests.RequestException, sqlite3.Error):
+        return []
+    return result if key is None else result.get(key, [])
+
+
+def _bill_label(item):
+    """
+    Format a legislation item's identifier, e.g. "HR 1234 (118th Congress)".
+    """
+    congress = item.get("congress")
+    if item.get("amendmentNumber"):
+        label = f"Amendment {item['amendmentNumber']}"
+    else:
+        label = f"{item.get('type', '')} {item.get('number', '')}".strip()
+    return f"{label} ({_ordinal(congress)} Congress)" if congress else label
+
+
+def _ordinal(number):
+    number = int(number)
+    if 10 <= number % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+
+def _legislation_passage(role, item):
+    """
+    Render one sponsored or cosponsored bill as a passage.
+    """
+    parts = [f"{role} {_bill_label(item)}"]
+    if item.get("title"):
+        parts.append(f": {item['title']}")
+    if item.get("policyArea") and item["policyArea"].get("name"):
+        parts.append(f". Policy area: {item['policyArea']['name']}")
+    if item.get("introducedDate"):
+        parts.append(f". Introduced {item['introducedDate']}")
+    latest = item.get("latestAction") or {}
+    if latest.get("text"):
+        parts.append(f". Latest action ({latest.get('actionDate', 'undated')}): {latest['text']}")
+    return "".join(parts)
+
+
+def _related_passage(related):
+    """
+    Render one related bill of a member's bill as a passage.
+    """
+    bill = f"{related['bill_type'].upper()} {related['bill_number']} ({_ordinal(related['congress'])} Congress)"
+    other = (
+        f"{related['related_type'].upper()} {related['related_number']} "
+        f"({_ordinal(related['related_congress'])} Congress)"
+    )
+    passage = f"Related bill of {bill}: {other}"
+    if related.get("related_title"):
+        passage += f", {related['related_title']}"
+    if related.get("relationship_type"):
+        passage += f" ({related['relationship_type']})"
+    return passage + "."
+
+
+def render_member_passages(member, sponsored, cosponsored, related=()):
+    """
+    Render a member's data as a list of self-contained passages.
+
+    :param member: The "member" object from get_member_details.
+    :param sponsored: The sponsoredLegislation list.
+    :param cosponsored: The cosponsoredLegislation list.
+    :param related: Related bills of the member's bills, from congress_store.related_bill_titles.
+    :return: A list of passage strings.
+    """
+    name = member.get("directOrderName") or f"{member.get('firstName', '')} {member.get('lastName', '')}".strip()
+    passages = [
+        f"Details of {member.get('invertedOrderName', name)}:\n"
+        f"{member.get('honorificName', '')} {member.get('firstName', '')} {member.get('lastName', '')}".strip()
+    ]
+
+    identity = [f"{name} represents {member.get('state', 'an unknown state')}"]
+    if member.get("district") is not None:
+        identity.append(f", district {member['district']}")
+    identity.append(". ")
+    if member.get("birthYear"):
+        identity.append(f"Born in {member['birthYear']}. ")
+    if member.get("currentMember") is not None:
+        identity.append("Currently serving in Congress. " if member["currentMember"] else "No longer serving in Congress. ")
+    if member.get("officialWebsiteUrl"):
+        identity.append(f"Official website: {member['officialWebsiteUrl']}.")
+    passages.append("".join(identity).strip())
+
+    terms = member.get("terms") or []
+    if isinstance(terms, dict):
+        terms = terms.get("item", [])
+    for term in terms:
+        passage = f"Term: served in the {term.get('chamber', 'Congress')}"
+        if term.get("congress"):
+            passage += f" in the {_ordinal(term['congress'])} Congress"
+        passage += f" from {term.get('startYear')} to {term.get('endYear') or 'present'}"
+        where = term.get("stateName") or term.get("stateCode")
+        if where:
+            passage += f", representing {where}"
+        passages.append(passage + ".")
+
+    party_history = member.get("partyHistory") or []
+    if party_history:
+        parties = "; ".join(
+            f"{party.get('partyName')} since {party.get('startYear')}" for party in party_history
+        )
+        passages.append(f"Party affiliation history: {parties}.")
+
+    for role in member.get("leadership") or []:
+        passage = f"Leadership role: {role.get('type')}"
+        if role.get("congress"):
+            passage += f" in the {_ordinal(role['congress'])} Congress"
+        passages.append(passage + ".")
+
+    for key, label in (("sponsoredLegislation", "sponsored"), ("cosponsoredLegislation", "cosponsored")):
+        count = (member.get(key) or {}).get("count")
+        if count is not None:
+            passages.append(f"{name} has {label} {count} pieces of legislation.")
+
+    passages.extend(_legislation_passage("Sponsored", item) for item in sponsored)
+    passages.extend(_legislation_passage("Cosponsored", item) for item in cosponsored)
+    passages.extend(_related_passage(item) for item in related)
+    return passages
+
+
+def get_member_document(member_id, api_key):
+    """
+    Return the knowledge document for a member, building it on a cache miss.
+
+    :param member_id: The bioguide ID of the member.
+    :param api_key: The Congress.gov API key.
+    :return: A MemberDocument.
+    """
+    with _documents_lock:
+        document = _documents.get(member_id)
+        if document is not None and time.monotonic() - document.built_at <= MEMBER_CACHE_TTL:
+            _documents.move_to_end(member_id)
+            return document
+
+    document = MemberDocument(member_id, render_member_passages(*fetch_member_sources(member_id, api_key)))
+
+    with _documents_lock:
+        _documents[member_id] = document
+        _documents.move_to_end(member_id)
+        while len(_documents) > MEMBER_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document
+
+
+def invalidate_member_document(member_id):
+    """
+    Drop a member's cached document, e.g. after their data was re-synced.
+    """
+    with _documents_lock:
+        _documents.pop(member_id, None)
+
+
+@on_member_sync
+def _invalidate_synced_member(bioguide_id):
+    """
+    Drop a member's document and the cached results computed from it.
+    """
+    invalidate_member_document(bioguide_id)
+    result_cache.invalidate_source(member_source(bioguide_id))
+
+
+@on_sync
+def _invalidate_bill_members(resource, congress, bill_type, bill_number):
+    if resource in MEMBER_BILL_RESOURCES:
+        for bioguide_id in bill_member_ids(congress, bill_type, bill_number):
+            _invalidate_synced_member(bioguide_id)
@@ -0,0 +1,182 @@
+"""
+posting_index.py
+
+This module contains reverse indexes from committees and members to the
+stored bills they are linked to.
+
+Each index maps a key (a committee system code or a bioguide ID) to a sorted
+NumPy int64 posting array of bill ordinals (`bills.id` in the local store).
+Paging through a key's bills is a binary search for the cursor, which is the
+last ordinal of the previous page, followed by a slice. Unlike an offset, the
+cursor stays valid while syncs add bills to the posting list.
+
+The indexes are built from the store on first use. After that, syncs of a
+bill's details, cosponsors or committees move only that bill between
+posting arrays. Patching arrays for bills synced by a separate process
+would mean replaying its syncs, so those rebuild the indexes instead.
+"""
+
+import threading
+
+import numpy as np
+
+from app.api.services import congress_store
+from app.api.services.congress_store import ChangeWatch, get_connection, on_sync
+
+# The query listing (key, bill ordinal) pairs for each index, optionally for one bill.
+INDEX_QUERIES = {
+    "committee": "SELECT DISTINCT system_code, bill_id FROM bill_committees {where}",
+    "sponsor": "SELECT sponsor_bioguide_id, id FROM bills WHERE sponsor_bioguide_id IS NOT NULL {and_where}",
+    "cosponsor": "SELECT bioguide_id, bill_id FROM cosponsors {where}",
+}
+
+# The synced bill resource that changes each index.
+INDEX_RESOURCES = {"committees": "committee", "details": "sponsor", "cosponsors": "cosponsor"}
+
+_indexes = None
+_indexes_lock = threading.Lock()
+
+
+class PostingIndex:
+    """
+    Sorted arrays of bill ordinals per key.
+    """
+
+    def __init__(self, pairs):
+        """
+        :param pairs: An iterable of (key, bill ordinal) pairs.
+        """
+        self.postings = {}
+        self.bill_keys = {}
+        grouped = {}
+        for key, bill in pairs:
+            grouped.setdefault(key, []).append(bill)
+            self.bill_keys.setdefault(bill, set()).add(key)
+        for key, bills in grouped.items():
+            self.postings[key] = np.unique(np.array(bills, dtype=np.int64))
+
+    def update_bill(self, bill, keys):
+        """
+        Make `keys` the keys linked to a bill, removing it from the postings of any others.
+        """
+        keys = set(keys)
+        old_keys = self.bill_keys.get(bill, set())
+        for key in old_keys - keys:
+            posting = self.postings[key]
+            posting = np.delete(posting, np.searchsorted(posting, bill))
+            if len(posting):
+                self.postings[key] = posting
+            else:
+                del self.postings[key]
+        for key in keys - old_keys:
+            posting = self.postings.get(key, np.zeros(0, dtype=np.int64))
+            self.postings[key] = np.insert(posting, np.searchsorted(posting, bill), bill)
+        if keys:
+            self.bill_keys[bill] = keys
+        else:
+            self.bill_keys.pop(bill, None)
+
+    def posting(self, key):
+        return self.postings.get(key, np.zeros(0, dtype=np.int64))
+
+
+def page(posting, cursor=None, limit=100):
+    """
+    Return one page of a posting array.
+
+    :param posting: A sorted array of bill ordinals.
+    :param cursor: The last ordinal of the previous page, or None for the first page.
+    :param limit: The page size.
+    :return: A tuple of (ordinals, next cursor or None on the last page).
+    """
+    start = 0 if cursor is None else int(np.searchsorted(posting, cursor, side="right"))
+    ordinals = posting[start:start + limit]
+    more = start + limit < len(posting)
+    return ordinals, int(ordinals[-1]) if more and len(ordinals) else None
+
+
+class ReverseIndexes:
+    """
+    The committee, sponsor and cosponsor posting indexes of one store.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: A connection to the local store.
+        """
+        self.path = congress_store.DB_PATH
+        self.watch = ChangeWatch()
+        self.lock = threading.Lock()
+        self.indexes = {
+            name: PostingIndex(connection.execute(query.format(where="", and_where="")).fetchall())
+            for name, query in INDEX_QUERIES.items()
+        }
+
+    def update_bill(self, connection, name, congress, bill_type, bill_number):
+        """
+        Re-read one bill's keys for an index after a sync.
+        """
+        row = connection.execute(
+            "SELECT id FROM bills WHERE congress = ? AND bill_type = ? AND bill_number = ?",
+            (congress, bill_type, bill_number),
+        ).fetchone()
+        if row is None:
+            return
+        bill = row["id"]
+        query = INDEX_QUERIES[name].format(where="WHERE bill_id = ?", and_where="AND id = ?")
+        keys = [key for key, _ in connection.execute(query, (bill,)).fetchall()]
+        with self.lock:
+            self.indexes[name].update_bill(bill, keys)
+
+    def posting(self, name, key):
+        with self.lock:
+            return self.indexes[name].posting(key)
+
+
+def get_reverse_indexes():
+    """
+    Return the reverse indexes, building them on first use or once a separate process has synced bills.
+    """
+    global _indexes
+    with _indexes_lock:
+        if _indexes is None or _indexes.watch.changed():
+            _indexes = ReverseIndexes(get_connection())
+        return _indexes
+
+
+@on_sync
+def _update_on_sync(resource, congress, bill_type, bill_number):
+    name = INDEX_RESOURCES.get(resource)
+    if name is not None and _indexes is not None and _indexes.path == congress_store.DB_PATH:
+        _indexes.update_bill(get_connection(), name, congress, bill_type, bill_number)
+
+
+def committee_bills(system_code, cursor=None, limit=100):
+    """
+    Page through the bills referred to a committee or subcommittee.
+
+    :param system_code: The committee system code, e.g. "hsag00".
+    :param cursor: The next_cursor of the previous page.
+    :param limit: The page size.
+    :return: A tuple of (total, page of bill ordinals, next cursor).
+    """
+    posting = get_reverse_indexes().posting("committee", system_code.lower())
+    return (len(posting), *page(posting, cursor, limit))
+
+
+def member_bills(bioguide_id, role="any", cursor=None, limit=100):
+    """
+    Page through the bills a member sponsored, cosponsored, or either.
+
+    :param bioguide_id: The member's bioguide ID.
+    :param role: One of "sponsor", "cosponsor" or "any".
+    :param cursor: The next_cursor of the previous page.
+    :param limit: The page size.
+    :return: A tuple of (total, page of bill ordinals, next cursor).
+    """
+    indexes = get_reverse_indexes()
+    if role == "any":
+        posting = np.union1d(indexes.posting("sponsor", bioguide_id), indexes.posting("cosponsor", bioguide_id))
+    else:
+        posting = indexes.posting(role, bioguide_id)
+    return (len(posting), *page(posting, cursor, limit))
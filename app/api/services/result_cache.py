@@ -0,0 +1,144 @@
+"""
+result_cache.py
+
+This module contains a cache of retrieval results placed in front of the
+search layer, so clients re-asking the same question skip both the upstream
+fetch and the scoring.
+
+Results are keyed by the normalised question plus a fingerprint of the chunk
+corpus they were computed over. Each data source (for example one member of
+Congress) is bound to the fingerprint of its latest corpus; while that
+binding is fresh, a repeat question can be answered before anything is
+fetched. When a source is re-fetched and its corpus has changed, the results
+for its old corpus are dropped. member_document invalidates a member's source
+whenever data in the member's document is synced.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = 2048
+SOURCE_TTL = float(os.getenv("RESULT_CACHE_TTL", 900))
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def member_source(member_id):
+    """
+    Return the source key of a member's data.
+    """
+    return f"member:{member_id}"
+
+
+def normalize_query(query):
+    """
+    Reduce a question to the form used in cache keys.
+
+    :param query: The question text.
+    :return: The lowercased question without punctuation or repeated whitespace.
+    """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+class QueryResultCache:
+    """
+    An LRU cache of search results keyed by (question, corpus fingerprint).
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, source_ttl=SOURCE_TTL):
+        """
+        :param max_entries: The maximum number of cached results.
+        :param source_ttl: Seconds a source's fingerprint may be trusted without re-fetching it.
+        """
+        self.max_entries = max_entries
+        self.source_ttl = source_ttl
+        self.entries = OrderedDict()
+        self.sources = {}
+        self.lock = threading.Lock()
+
+    def get(self, query, fingerprint, variant=None):
+        """
+        Look up a cached result.
+
+        :param query: The question text.
+        :param fingerprint: The fingerprint of the corpus searched.
+        :param variant: Anything else the result depends on, such as top_k.
+        :return: The cached result, or None.
+        """
+        key = (normalize_query(query), fingerprint, variant)
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+            return result
+
+    def put(self, query, fingerprint, result, variant=None):
+        """
+        Store a result, evicting the least recently used ones past the size limit.
+        """
+        key = (normalize_query(query), fingerprint, variant)
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def bind(self, source, fingerprint):
+        """
+        Record the current corpus fingerprint of a source.
+
+        If the source previously had a different corpus, results for the old
+        one are dropped.
+
+        :param source: A key for the underlying data, e.g. "member:A000360".
+        :param fingerprint: The fingerprint of the source's freshly fetched corpus.
+        """
+        with self.lock:
+            previous = self.sources.get(source)
+            self.sources[source] = (fingerprint, time.monotonic())
+            if previous is not None and previous[0] != fingerprint:
+                self._drop_fingerprint(previous[0])
+
+    def fingerprint_for(self, source):
+        """
+        Return the fingerprint bound to a source if it is still fresh.
+
+        :param source: The source key.
+        :return: The fingerprint, or None if unknown or older than source_ttl.
+        """
+        with self.lock:
+            bound = self.sources.get(source)
+            if bound is None or time.monotonic() - bound[1] > self.source_ttl:
+                return None
+            return bound[0]
+
+    def invalidate_source(self, source):
+        """
+        Forget a source and every result computed from its corpus, e.g. after a sync.
+
+        :param source: The source key.
+        """
+        with self.lock:
+            bound = self.sources.pop(source, None)
+            if bound is not None:
+                self._drop_fingerprint(bound[0])
+
+    def clear(self):
+        """
+        Drop every cached result and source binding.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.sources.clear()
+
+    def _drop_fingerprint(self, fingerprint):
+        for key in [key for key in self.entries if key[1] == fingerprint]:
+            del self.entries[key]
+
+
+result_cache = QueryResultCache()
+
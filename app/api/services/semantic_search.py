@@ -3,11 +3,284 @@ semantic_search.py
 
 This module contains logic to perform semantic search on text chunks,
 retrieving and ranking the most relevant information based on a query.
+
+The TF-IDF model for a corpus is fitted once and kept in a small LRU cache
+keyed by a hash of the corpus content, so repeated questions about the same
+chunks only need to transform the query and take a sparse dot product.
+Large corpora are also persisted to the memory-mapped vector store, so other
+worker processes open the same index instead of fitting their own copy.
+Scoring stays sparse end to end; anything that has to be densified goes
+through `densify`, which checks the estimated size against a memory budget.
 """
 
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from app.api.services import vector_store
+
+logger = logging.getLogger(__name__)
+
+INDEX_CACHE_SIZE = 64
+PERSIST_MIN_CHUNKS = int(os.getenv("PERSIST_MIN_CHUNKS", 500))
+DENSE_MEMORY_LIMIT = int(os.getenv("DENSE_MEMORY_LIMIT", 32 * 1024 * 1024))
+
+
+def estimate_dense_bytes(matrix):
+    """
+    Estimate the memory a dense copy of a sparse matrix would need.
+
+    :param matrix: A scipy sparse matrix.
+    :return: The size in bytes of the equivalent dense array.
+    """
+    rows, cols = matrix.shape
+    return rows * cols * matrix.dtype.itemsize
+
+
+def densify(matrix, max_bytes=None):
+    """
+    Convert a sparse matrix to a dense array after checking its estimated size.
+
+    :param matrix: A scipy sparse matrix.
+    :param max_bytes: The largest dense array allowed; defaults to DENSE_MEMORY_LIMIT.
+    :return: The dense NumPy array.
+    :raises MemoryError: If the dense array would exceed the budget.
+    """
+    if max_bytes is None:
+        max_bytes = DENSE_MEMORY_LIMIT
+    estimated = estimate_dense_bytes(matrix)
+    logger.debug("Densifying %s matrix: ~%.1f MiB", matrix.shape, estimated / 2**20)
+    if estimated > max_bytes:
+        raise MemoryError(
+            f"Refusing to densify a {matrix.shape[0]}x{matrix.shape[1]} matrix: "
+            f"~{estimated / 2**20:.1f} MiB exceeds the {max_bytes / 2**20:.1f} MiB limit"
+        )
+    return matrix.toarray()
+
+
+class TfidfIndex:
+    """
+    A TF-IDF model fitted once over a corpus of chunks.
+
+    The document matrix is kept sparse with L2-normalised rows, so the cosine
+    similarity against a transformed query is a single sparse dot product.
+    """
+
+    def __init__(self, chunks, vectorizer=None, matrix=None):
+        """
+        Fit the vectorizer over the given chunks, unless a fitted one is supplied.
+
+        :param chunks: The list of text chunks to index.
+        :param vectorizer: An already fitted TfidfVectorizer, e.g. from the vector store.
+        :param matrix: The chunk x vocabulary matrix produced by that vectorizer.
+        """
+        if vectorizer is not None:
+            self.chunks = chunks
+            self.vectorizer = vectorizer
+            self.matrix = matrix
+            return
+
+        self.chunks = list(chunks)
+        self.vectorizer = TfidfVectorizer(dtype=np.float32)
+        try:
+            self.matrix = self.vectorizer.fit_transform(self.chunks)
+        except ValueError:
+            # Empty corpus, or nothing but stop words: nothing can ever match.
+            self.matrix = None
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def transform(self, queries):
+        """
+        Vectorize queries with the fitted vocabulary and IDF weights.
+
+        :param queries: A list of query strings.
+        :return: A sparse matrix with one normalised row per query.
+        """
+        return self.vectorizer.transform(queries)
+
+    def scores(self, query):
+        """
+        Compute the cosine similarity of a query against every chunk.
+
+        :param query: The search query string.
+        :return: A 1-D array with one relevance score per chunk.
+        """
+        if self.matrix is None:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+        query_vector = self.transform([query])
+        # (chunks x vocab) @ (vocab x 1) stays sparse; only the n-vector of
+        # scores is ever densified.
+        return densify(self.matrix @ query_vector.T).ravel()
+
+    def search(self, query, k=5, threshold=0.1):
+        """
+        Find the chunks most relevant to a query.
+
+        :param query: The search query string.
+        :param k: The maximum number of results.
+        :param threshold: The minimum relevance score to consider a match.
+        :return: A list of (chunk index, score) pairs ordered by descending score.
+        """
+        return top_k(self.scores(query), k, threshold)
+
+    def nbytes(self):
+        """
+        Report the memory held by the sparse document matrix.
+
+        :return: The size in bytes of the CSR data, indices and indptr arrays.
+        """
+        if self.matrix is None:
+            return 0
+        return self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
+
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def corpus_fingerprint(chunks):
+    """
+    Compute a stable content hash for a list of chunks.
+
+    :param chunks: The list of text chunks.
+    :return: A hex digest identifying the corpus.
+    """
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        encoded = chunk.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def get_index(chunks, factory=None):
+    """
+    Return the fitted index for a corpus, building it on a cache miss.
+
+    :param chunks: The list of text chunks to index.
+    :param factory: A callable that builds another kind of index from the chunks.
+                    Defaults to TfidfIndex, which is also shared through the vector store.
+    :return: The index over the chunks.
+    """
+    fingerprint = corpus_fingerprint(chunks)
+    key = fingerprint if factory is None else (factory.__qualname__, fingerprint)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    if factory is None:
+        index = _load_or_build_index(fingerprint, chunks)
+    else:
+        index = factory(chunks)
+
+    with _index_cache_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def _load_or_build_index(key, chunks):
+    """
+    Open a corpus index persisted by another worker, or fit and persist a new one.
+
+    Only corpora of at least PERSIST_MIN_CHUNKS chunks go through the vector
+    store; smaller ones are cheaper to refit than to map from disk.
+    """
+    if len(chunks) < PERSIST_MIN_CHUNKS:
+        return TfidfIndex(chunks)
+
+    parts = vector_store.read_index(key)
+    if parts is not None:
+        stored_chunks, vectorizer, matrix = parts
+        return TfidfIndex(stored_chunks, vectorizer=vectorizer, matrix=matrix)
+
+    index = TfidfIndex(chunks)
+    if index.matrix is not None:
+        vector_store.write_index(key, index.chunks, index.vectorizer, index.matrix)
+    return index
+
+
+def clear_index_cache():
+    """
+    Drop every cached index.
+    """
+    with _index_cache_lock:
+        _index_cache.clear()
+
+
+def top_k(scores, k, threshold=None):
+    """
+    Select the k highest scores using partial selection.
+
+    np.argpartition finds the k best candidates in O(n); only those k are
+    then sorted, so the cost does not grow with n log n on large corpora.
+
+    :param scores: A 1-D array of relevance scores.
+    :param k: The maximum number of results to return.
+    :param threshold: If given, drop results scoring below it.
+    :return: A list of (index, score) pairs ordered by descending score.
+    """
+    scores = np.asarray(scores)
+    if threshold is not None:
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(scores.size)
+    if k <= 0 or candidates.size == 0:
+        return []
+
+    if candidates.size > k:
+        best = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[best]
+    # Sort by descending score, breaking ties by position like argmax does.
+    order = np.lexsort((candidates, -scores[candidates]))
+    return [(int(i), float(scores[i])) for i in candidates[order]]
+
+
+def semantic_search_top_k(query, chunks, k=5, threshold=0.1):
+    """
+    Performs a semantic search and returns the k most relevant chunks.
+
+    :param query: The search query string.
+    :param chunks: The list of text chunks to search within.
+    :param k: The maximum number of chunks to return.
+    :param threshold: The minimum relevance score to consider a match.
+    :return: A list of (chunk index, score) pairs ordered by descending score.
+    """
+    return get_index(chunks).search(query, k, threshold)
+
+
+def batch_semantic_search(queries, chunks, k=5, threshold=0.1):
+    """
+    Performs a semantic search for several queries against one corpus.
+
+    The queries are vectorized together and scored with a single sparse
+    (queries x vocab) @ (vocab x chunks) product.
+
+    :param queries: The list of search query strings.
+    :param chunks: The list of text chunks to search within.
+    :param k: The maximum number of chunks to return per query.
+    :param threshold: The minimum relevance score to consider a match.
+    :return: One list of (chunk index, score) pairs per query, in query order.
+    """
+    index = get_index(chunks)
+    if index.matrix is None or not queries:
+        return [[] for _ in queries]
+
+    score_matrix = (index.transform(queries) @ index.matrix.T).tocsr()
+    return [top_k(densify(score_matrix[row]).ravel(), k, threshold) for row in range(len(queries))]
+
+
 def semantic_search(query, chunks, threshold=0.1):
     """
     Performs a semantic search on the given chunks of text.
@@ -17,12 +290,11 @@ def semantic_search(query, chunks, threshold=0.1):
     :param threshold: The minimum relevance score to consider a match.
     :return: The most relevant chunk and its relevance score.
     """
-    vectorizer = TfidfVectorizer().fit_transform([query] + chunks)
-    vectors = vectorizer.toarray()
+    index = get_index(chunks)
+    relevance_scores = index.scores(query)
+    if relevance_scores.size == 0:
+        return "", 0.0
 
-    cosine_matrix = cosine_similarity(vectors[0:1], vectors[1:])
-    relevance_scores = cosine_matrix[0]
-    
     most_relevant_idx = relevance_scores.argmax()
     most_relevant_score = relevance_scores[most_relevant_idx]
 
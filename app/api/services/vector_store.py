@@ -0,0 +1,258 @@
+"""
+vector_store.py
+
+This module contains an on-disk format for fitted TF-IDF indexes that is
+opened with `numpy.memmap`, so several uvicorn worker processes share one
+page-cache copy of the chunk vectors instead of each holding its own.
+
+A store lives in a directory per index name:
+
+    <VECTOR_DIR>/<name>/CURRENT        name of the active version directory
+    <VECTOR_DIR>/<name>/<version>/     one immutable build of the index
+        data.npy, indices.npy, indptr.npy   the CSR chunk x vocabulary matrix
+        idf.npy                             IDF weight per vocabulary column
+        vocabulary.txt                      one term per line, in column order
+        chunks.txt                          all chunk texts, back to back (UTF-8)
+        offsets.npy                         byte offset of each chunk in chunks.txt
+
+Opening a version maps the arrays read-only without copying them. A rebuilt
+index is written to a fresh version directory and published by atomically
+replacing CURRENT, so readers never see a half-written index.
+
+Index names are corpus fingerprints, so stores pile up as corpora change.
+Reading a store touches its directory; after each write the least recently
+used stores beyond VECTOR_STORE_LIMIT are removed.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.api.config import DATA_DIR
+
+VECTOR_DIR = os.path.join(DATA_DIR, "vectors")
+CURRENT_FILE = "CURRENT"
+VECTOR_STORE_LIMIT = int(os.getenv("VECTOR_STORE_LIMIT", 256))
+# Unpublished versions older than this are leftovers of concurrent publishes.
+VERSION_GRACE_SECONDS = 3600
+
+
+class MmapChunks:
+    """
+    A read-only sequence of chunk texts decoded on access from a mapped buffer.
+    """
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def store_path(name):
+    """
+    Return the directory holding every version of a named index.
+    """
+    return os.path.join(VECTOR_DIR, name)
+
+
+def current_version(name):
+    """
+    Return the directory of the active version of a named index, or None.
+    """
+    version = _current_version_name(store_path(name))
+    return os.path.join(store_path(name), version) if version else None
+
+
+def _current_version_name(root):
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_index(name, chunks, vectorizer, matrix):
+    """
+    Write a fitted index as a new version and make it the current one.
+
+    :param name: The index name.
+    :param chunks: The list of chunk texts, one per matrix row.
+    :param vectorizer: The fitted TfidfVectorizer.
+    :param matrix: The sparse chunk x vocabulary TF-IDF matrix.
+    :return: The directory of the new version.
+    """
+    root = store_path(name)
+    os.makedirs(root, exist_ok=True)
+    build_dir = tempfile.mkdtemp(dir=root, prefix=".build-")
+    try:
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        index_dtype = np.int32 if max(matrix.nnz, matrix.shape[1]) < 2**31 else np.int64
+        np.save(os.path.join(build_dir, "data.npy"), matrix.data)
+        np.save(os.path.join(build_dir, "indices.npy"), matrix.indices.astype(index_dtype))
+        np.save(os.path.join(build_dir, "indptr.npy"), matrix.indptr.astype(index_dtype))
+        np.save(os.path.join(build_dir, "idf.npy"), vectorizer.idf_.astype(np.float32))
+
+        vocabulary = vectorizer.vocabulary_
+        with open(os.path.join(build_dir, "vocabulary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(sorted(vocabulary, key=vocabulary.get)))
+
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        with open(os.path.join(build_dir, "chunks.txt"), "wb") as f:
+            for i, chunk in enumerate(chunks):
+                encoded = chunk.encode("utf-8")
+                f.write(encoded)
+                offsets[i + 1] = offsets[i] + len(encoded)
+        np.save(os.path.join(build_dir, "offsets.npy"), offsets)
+
+        version = f"v{time.time_ns()}"
+        os.rename(build_dir, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    _publish(root, version)
+    collect_garbage(keep=name)
+    return os.path.join(root, version)
+
+
+def _publish(root, version):
+    """
+    Point CURRENT at a version and remove the version it replaced.
+
+    Only the version read from CURRENT just before the swap is removed: once
+    replaced it can never become current again, whereas a version published
+    concurrently by another writer may be the one CURRENT names now. Versions
+    left behind by such races are removed once they are older than both the
+    current version and VERSION_GRACE_SECONDS. Workers that still have an old
+    version mapped keep reading it safely; the files disappear once they close them.
+    """
+    previous = _current_version_name(root)
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix=".current-")
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    if previous and previous != version:
+        shutil.rmtree(os.path.join(root, previous), ignore_errors=True)
+
+    current = _current_version_name(root)
+    cutoff = min(_version_time(current), time.time_ns() - VERSION_GRACE_SECONDS * 10**9)
+    for entry in os.listdir(root):
+        if entry.startswith("v") and entry != current and _version_time(entry) < cutoff:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def _version_time(version):
+    """
+    Return the creation time in nanoseconds encoded in a version name.
+    """
+    try:
+        return int(version[1:])
+    except (TypeError, ValueError):
+        return 0
+
+
+def collect_garbage(keep=None, limit=None):
+    """
+    Remove the least recently used stores beyond `limit`.
+
+    Stores with a build in progress are left alone.
+
+    :param keep: A store name never to remove, e.g. the one just written.
+    :param limit: The number of stores to keep; defaults to VECTOR_STORE_LIMIT.
+    :return: The names of the removed stores.
+    """
+    limit = VECTOR_STORE_LIMIT if limit is None else limit
+    try:
+        names = [entry for entry in os.listdir(VECTOR_DIR) if os.path.isdir(store_path(entry))]
+    except FileNotFoundError:
+        return []
+    if len(names) <= limit:
+        return []
+
+    def last_used(name):
+        try:
+            return os.stat(store_path(name)).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    removed = []
+    for name in sorted(names, key=last_used)[:len(names) - limit]:
+        if name == keep or any(entry.startswith(".build-") for entry in os.listdir(store_path(name))):
+            continue
+        shutil.rmtree(store_path(name), ignore_errors=True)
+        removed.append(name)
+    return removed
+
+
+def read_index(name):
+    """
+    Map the current version of a named index without copying it.
+
+    :param name: The index name.
+    :return: A (chunks, vectorizer, matrix) tuple, or None if no version exists.
+    """
+    # A concurrent rebuild may remove the version between reading CURRENT
+    # and opening its files; read CURRENT again and retry.
+    for attempt in range(3):
+        try:
+            parts = _read_version(current_version(name))
+            if parts is not None:
+                # Mark the store as recently used for collect_garbage.
+                os.utime(store_path(name))
+            return parts
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+
+
+def _read_version(version_dir):
+    """
+    Map the files of one version directory.
+    """
+    if version_dir is None:
+        return None
+
+    def load(filename):
+        return np.load(os.path.join(version_dir, filename), mmap_mode="r")
+
+    offsets = load("offsets.npy")
+    indptr = load("indptr.npy")
+    with open(os.path.join(version_dir, "vocabulary.txt"), encoding="utf-8") as f:
+        terms = f.read().split("\n")
+    if terms == [""]:
+        terms = []
+
+    matrix = sparse.csr_matrix(
+        (load("data.npy"), load("indices.npy"), indptr),
+        shape=(len(indptr) - 1, len(terms)),
+        copy=False,
+    )
+    vectorizer = TfidfVectorizer(dtype=np.float32, vocabulary={term: i for i, term in enumerate(terms)})
+    vectorizer.idf_ = load("idf.npy")
+
+    chunks_path = os.path.join(version_dir, "chunks.txt")
+    if os.path.getsize(chunks_path):
+        buffer = np.memmap(chunks_path, dtype=np.uint8, mode="r")
+    else:
+        buffer = np.zeros(0, dtype=np.uint8)
+    return MmapChunks(buffer, offsets), vectorizer, matrix
@@ -0,0 +1,78 @@
+"""
+bench_ann_recall.py
+
+Compares recall@k and queries per second of the IVF approximate index
+against exact search over the same LSA vectors, for several n_probe values.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ann_recall
+"""
+
+import time
+
+import numpy as np
+
+from app.api.services.ann_index import AnnIndex
+
+NUM_CHUNKS = 50_000
+NUM_TOPICS = 200
+VOCABULARY_SIZE = 30_000
+WORDS_PER_CHUNK = 120
+NUM_QUERIES = 200
+K = 10
+N_PROBES = [1, 2, 4, 8, 16, 32]
+
+
+def synthetic_corpus(num_chunks, seed=0):
+    """
+    Build chunks that each mix words from one topic with common background words.
+
+    :param num_chunks: The number of chunks to generate.
+    :param seed: The random seed.
+    :return: A list of chunk strings.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}" for i in range(VOCABULARY_SIZE)])
+    topic_words = rng.integers(0, VOCABULARY_SIZE, size=(NUM_TOPICS, 300))
+    topics = rng.integers(0, NUM_TOPICS, size=num_chunks)
+    chunks = []
+    for topic in topics:
+        words = np.concatenate([
+            rng.choice(topic_words[topic], size=WORDS_PER_CHUNK // 2),
+            rng.integers(0, VOCABULARY_SIZE, size=WORDS_PER_CHUNK // 2),
+        ])
+        chunks.append(" ".join(vocabulary[words]))
+    return chunks
+
+
+def queries_per_second(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    chunks = synthetic_corpus(NUM_CHUNKS)
+    start = time.perf_counter()
+    index = AnnIndex.build(chunks, n_components=128)
+    print(f"built {len(index)} chunks into {len(index.centroids)} lists in {time.perf_counter() - start:.1f}s")
+
+    rng = np.random.default_rng(1)
+    queries = [" ".join(chunks[i].split()[:12]) for i in rng.integers(0, NUM_CHUNKS, size=NUM_QUERIES)]
+    exact = [{i for i, _ in index.exact_search(query, k=K)} for query in queries]
+
+    print(f"{'n_probe':>8} {'recall@' + str(K):>10} {'QPS':>10}")
+    print(f"{'exact':>8} {1.0:>10.3f} {queries_per_second(lambda q: index.exact_search(q, k=K), queries):>10.0f}")
+    for n_probe in N_PROBES:
+        hits = 0
+        for query, truth in zip(queries, exact):
+            hits += len(truth & {i for i, _ in index.search(query, k=K, n_probe=n_probe)})
+        recall = hits / sum(len(truth) for truth in exact)
+        qps = queries_per_second(lambda q: index.search(q, k=K, n_probe=n_probe), queries)
+        print(f"{n_probe:>8} {recall:>10.3f} {qps:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
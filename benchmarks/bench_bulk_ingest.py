@@ -0,0 +1,52 @@
+"""
+bench_bulk_ingest.py
+
+Measures bulk ingest throughput for synthetic bill texts as the number of
+worker processes grows. Throughput should scale close to linearly up to the
+number of physical cores.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_ingest
+"""
+
+import os
+import time
+
+from app.api.services.bulk_ingest import bulk_index
+from benchmarks.bench_chunking import synthetic_bill_text
+
+NUM_DOCUMENTS = 64
+DOCUMENT_MEGABYTES = 1
+
+
+def synthetic_documents():
+    """
+    Build bill-sized documents with a section header every few lines.
+    """
+    documents = []
+    for n in range(NUM_DOCUMENTS):
+        lines = synthetic_bill_text(DOCUMENT_MEGABYTES, seed=n).split("\n")
+        for i in range(0, len(lines), 20):
+            lines[i] = f"SEC. {i // 20 + 1}. {lines[i].upper()}."
+        documents.append((f"118/hr/{n}", "\n".join(lines)))
+    return documents
+
+
+def main():
+    documents = synthetic_documents()
+    megabytes = sum(len(text) for _, text in documents) / 2**20
+    print(f"{'workers':>8} {'seconds':>8} {'MiB/s':>7} {'speedup':>8} {'chunks':>8}")
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        index = bulk_index(documents, workers=workers, partition_size=4)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>8.2f} {megabytes / elapsed:>7.1f} {baseline / elapsed:>7.1f}x {len(index):>8}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+bench_chunking.py
+
+Compares the streaming chunker with the previous chunk_text implementation,
+which re-joined the current chunk for every word, on multi-megabyte inputs
+shaped like bill text.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_chunking
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.api.services.chunking import iter_chunks
+
+INPUT_MEGABYTES = [1, 4, 16]
+CHUNK_SIZES = [1000, 4000]
+
+
+def legacy_chunk_text(text, max_chunk_size=1000):
+    """
+    The original chunk_text, kept here as the baseline.
+    """
+    words = text.split()
+    chunks = []
+    chunk = []
+
+    for word in words:
+        if len(' '.join(chunk)) + len(word) + 1 <= max_chunk_size:
+            chunk.append(word)
+        else:
+            chunks.append(' '.join(chunk))
+            chunk = [word]
+
+    if chunk:
+        chunks.append(' '.join(chunk))
+
+    return chunks
+
+
+def synthetic_bill_text(megabytes, seed=0):
+    """
+    Build text of roughly the given size from words of legislative length.
+
+    :param megabytes: The approximate size in MiB.
+    :param seed: The random seed.
+    :return: The text.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(["the", "Secretary", "shall", "section", "subsection", "amended", "striking",
+                           "inserting", "appropriated", "fiscal", "year", "(a)", "(1)", "Act", "United",
+                           "States", "Code", "paragraph", "such", "sums", "as", "may", "be", "necessary"])
+    # Average word length plus separator is about 6 characters.
+    words = rng.choice(vocabulary, size=megabytes * 2**20 // 6)
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return "\n".join(lines)
+
+
+def measure(function):
+    """
+    Time a call, then repeat it under tracemalloc to find its peak allocation.
+
+    :return: A tuple of (result, seconds, peak bytes).
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    print(f"{'MiB':>4} {'chunk':>6} {'legacy s':>9} {'stream s':>9} {'speedup':>8} {'legacy peak MiB':>16} {'stream peak MiB':>16}")
+    for megabytes in INPUT_MEGABYTES:
+        text = synthetic_bill_text(megabytes)
+        for size in CHUNK_SIZES:
+            legacy, legacy_time, legacy_peak = measure(lambda: legacy_chunk_text(text, size))
+            # Count chunks without keeping them, as a streaming consumer would.
+            count, stream_time, stream_peak = measure(lambda: sum(1 for _ in iter_chunks(text, size)))
+            assert count == len(legacy)
+            print(
+                f"{megabytes:>4} {size:>6} {legacy_time:>9.2f} {stream_time:>9.2f} "
+                f"{legacy_time / stream_time:>7.1f}x {legacy_peak / 2**20:>16.1f} {stream_peak / 2**20:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
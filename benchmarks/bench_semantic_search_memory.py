@@ -0,0 +1,62 @@
+"""
+bench_semantic_search_memory.py
+
+Measures the memory used to score a query against synthetic corpora of
+increasing size. The sparse scoring path should stay roughly flat, while the
+dense matrix the old implementation built grows with chunks x vocabulary.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_semantic_search_memory
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.api.services.semantic_search import TfidfIndex, estimate_dense_bytes
+
+CORPUS_SIZES = [1_000, 5_000, 20_000, 50_000]
+VOCABULARY_SIZE = 40_000
+WORDS_PER_CHUNK = 150
+
+
+def synthetic_corpus(num_chunks, seed=0):
+    """
+    Build a corpus of chunks drawn from a Zipf-like synthetic vocabulary.
+
+    :param num_chunks: The number of chunks to generate.
+    :param seed: The random seed.
+    :return: A list of chunk strings.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}" for i in range(VOCABULARY_SIZE)])
+    weights = 1.0 / np.arange(1, VOCABULARY_SIZE + 1)
+    words = rng.choice(vocabulary, size=(num_chunks, WORDS_PER_CHUNK), p=weights / weights.sum())
+    return [" ".join(row) for row in words]
+
+
+def main():
+    print(f"{'chunks':>8} {'vocab':>8} {'sparse MiB':>11} {'dense MiB':>10} {'query peak KiB':>15} {'query ms':>9}")
+    for size in CORPUS_SIZES:
+        index = TfidfIndex(synthetic_corpus(size))
+        query = "term5 term120 term3000 term39999"
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index.scores(query)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{size:>8} {index.matrix.shape[1]:>8} "
+            f"{index.nbytes() / 2**20:>11.1f} "
+            f"{estimate_dense_bytes(index.matrix) / 2**20:>10.1f} "
+            f"{peak / 2**10:>15.1f} {elapsed * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
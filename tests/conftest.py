@@ -0,0 +1,20 @@
+"""
+Shared fixtures for the tests of the local store and the indexes built on it.
+"""
+
+import pytest
+
+from app.api.services import bill_graph, congress_store, cosponsor_graph, facet_index, posting_index
+from tests.test_congress_store import sync_sample_bills
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """
+    A fresh store holding the sample bills, with every in-memory index reset.
+    """
+    monkeypatch.setattr(congress_store, "DB_PATH", str(tmp_path / "congress.db"))
+    monkeypatch.setattr(cosponsor_graph, "_graph", None)
+    monkeypatch.setattr(facet_index, "_index", None)
+    monkeypatch.setattr(posting_index, "_indexes", None)
+    monkeypatch.setattr(bill_graph, "_graph", None)
+    sync_sample_bills()
@@ -0,0 +1,55 @@
+"""
+Unit tests for the columnar analytics snapshot.
+"""
+
+import numpy as np
+import pytest
+
+from app.api.services import analytics, congress_store
+from app.api.services.analytics import (
+    Snapshot, busiest_sponsors, committee_activity_per_week, get_snapshot, time_to_floor, to_days,
+)
+from app.api.services.congress_store import get_connection, sync_bill_resource
+from tests.test_congress_store import cosponsor, sync_sample_bills
+
+@pytest.fixture
+def snapshot(monkeypatch, tmp_path):
+    monkeypatch.setattr(congress_store, "DB_PATH", str(tmp_path / "congress.db"))
+    sync_sample_bills()
+    return Snapshot(get_connection())
+
+def test_snapshot_encodes_dates_and_categoricals(snapshot):
+    assert to_days(["1970-01-02", None, "2021-05-11T00:00:00Z"]).tolist() == [1, analytics.MISSING_DAY, 18758]
+    assert snapshot.action_day.dtype == np.int32
+    assert len(snapshot.action_type) == 5
+    assert sorted(snapshot.action_types.values) == ["Floor", "IntroReferral"]
+    comer = snapshot.members.codes["C001108"]
+    assert snapshot.parties.decode(snapshot.member_party[comer]) == "R"
+
+def test_reports(snapshot):
+    floor = time_to_floor(snapshot, congress=117)
+    # hr3076 was introduced 2021-05-11 and passed the House 2022-02-08.
+    assert floor["bills"] == 1 and floor["median_days"] == 273
+    assert [bucket["bills"] for bucket in floor["histogram"]] == [0, 0, 0, 1, 0, 0]
+
+    sponsors = busiest_sponsors(snapshot, limit=2)
+    assert [(row["bioguide_id"], row["sponsored"], row["cosponsored"]) for row in sponsors] == [
+        ("C001108", 1, 1), ("M000087", 1, 0)]
+
+    weeks = {row["committee"]: row["weeks"] for row in committee_activity_per_week(snapshot)}
+    assert weeks["hsag00"] == {"2021-04-26": 1}
+    assert weeks["hsgo00"] == {"2021-05-10": 1}
+    assert committee_activity_per_week(snapshot, congress=116) == []
+
+def test_snapshot_is_rebuilt_after_sync_at_most_once_per_interval(snapshot, monkeypatch):
+    monkeypatch.setattr(analytics, "_snapshot", None)
+    before = get_snapshot()
+    assert get_snapshot(max_age=0) is before, "A snapshot without syncs should not be rebuilt"
+    sync_bill_resource("cosponsors", 117, "hr", 2820, {"cosponsors": [
+        cosponsor("P000449", "Rob Portman", "R", "OH", "2021-05-02"),
+    ]})
+    assert get_snapshot() is before, "Syncs should be batched until the refresh interval passes"
+    after = get_snapshot(max_age=0)
+    assert after is not before
+    assert get_snapshot(max_age=0) is after
+    assert "P000449" in {row["bioguide_id"] for row in busiest_sponsors(after, limit=10)}
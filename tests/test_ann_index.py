@@ -0,0 +1,35 @@
+"""
+Unit tests for the approximate nearest-neighbour index.
+"""
+
+from app.api.services import semantic_search
+from app.api.services.ann_index import AnnIndex, LsaEmbedder
+
+CHUNKS = [
+    "The farm bill extends crop insurance and farm credit programs.",
+    "Highway funding for bridges and road repair.",
+    "Crop insurance premiums for specialty crop farmers.",
+    "Port security grants for maritime terminals.",
+    "Bridge inspection standards for state highway agencies.",
+    "Maritime shipping and port infrastructure.",
+]
+
+def test_ann_search_matches_exact_when_probing_all_lists():
+    index = AnnIndex.build(CHUNKS, n_components=3, n_lists=3)
+    query = "crop insurance for farmers"
+    assert index.search(query, k=2, n_probe=3) == index.exact_search(query, k=2)
+    assert index.search(query, k=1)[0][0] in (0, 2), "ANN search returned an unrelated chunk"
+
+def test_ann_save_and_load(tmp_path):
+    index = AnnIndex.build(CHUNKS, n_components=3, n_lists=2)
+    path = tmp_path / "ann.npz"
+    index.save(str(path))
+    loaded = AnnIndex.load(str(path))
+    for query in ["port terminals", "highway bridges"]:
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+
+def test_lsa_fit_on_a_wide_corpus_stays_sparse(monkeypatch):
+    monkeypatch.setattr(semantic_search, "DENSE_MEMORY_LIMIT", 1024)
+    chunks = [" ".join(f"term{chunk}x{word}" for word in range(500)) for chunk in range(4)]
+    embedder, vectors = LsaEmbedder.fit(chunks, n_components=256)
+    assert embedder.dimensions == 3 and vectors.shape == (4, 3)
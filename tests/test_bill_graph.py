@@ -0,0 +1,42 @@
+"""
+Unit tests for the related-bills graph.
+"""
+
+from app.api.services.bill_graph import UnionFind, bill_family, get_bill_graph
+from app.api.services.congress_store import sync_bill_resource
+
+def related(congress, bill_type, number, relationship="Identical bill"):
+    return {"congress": congress, "type": bill_type, "number": number, "title": "", "url": "", "latestAction": {},
+            "relationshipDetails": [{"type": relationship, "identifiedBy": "CRS"}]}
+
+def family_numbers(congress, bill_type, number):
+    return [bill["bill_number"] for bill in bill_family(congress, bill_type, number)["bills"]]
+
+def test_union_find_merges_sets():
+    sets = UnionFind()
+    nodes = [sets.add() for _ in range(5)]
+    sets.union(nodes[0], nodes[1])
+    sets.union(nodes[3], nodes[4])
+    assert sets.union(nodes[1], nodes[0]) is None
+    sets.union(nodes[4], nodes[1])
+    assert len({sets.find(n) for n in nodes}) == 2
+
+def test_family_spans_hops_and_follows_syncs(store):
+    family = bill_family(117, "HR", 3076)
+    assert [(b["bill_type"], b["bill_number"], b["title"]) for b in family["bills"]] == [
+        ("hr", 3076, "Postal Service Reform Act of 2022"), ("s", 1720, "Postal Service Reform Act of 2021")]
+    assert {r["relationship_type"] for r in family["relations"]} == {"Related bill"}
+    assert bill_family(117, "hr", 2820) is None
+
+    # s1720 gains a House companion that is itself related to hr2820: one family of four.
+    graph = get_bill_graph()
+    sync_bill_resource("related-bills", 117, "s", 1720, {"relatedBills": [
+        related(117, "HR", 3076, "Related bill"), related(117, "HR", 3077)]})
+    sync_bill_resource("related-bills", 117, "hr", 3077, {"relatedBills": [related(117, "HR", 2820)]})
+    assert get_bill_graph() is graph
+    assert sorted(family_numbers(117, "hr", 2820)) == [1720, 2820, 3076, 3077]
+
+    # Dropping a relation cannot be applied incrementally, so the graph is rebuilt.
+    sync_bill_resource("related-bills", 117, "hr", 3077, {"relatedBills": []})
+    assert get_bill_graph() is not graph
+    assert sorted(family_numbers(117, "hr", 3076)) == [1720, 3076, 3077]
@@ -0,0 +1,86 @@
+"""
+Unit tests for the streaming bill text pipeline.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.services import bill_text
+from app.api.services.bill_text import parse_blocks, select_text_version
+
+TEXT_VERSIONS = [
+    {"date": "2021-05-11T04:00:00Z", "type": "Introduced in House", "formats": [
+        {"type": "Formatted Text", "url": "https://www.congress.gov/117/bills/hr3076/BILLS-117hr3076ih.htm"},
+        {"type": "PDF", "url": "https://www.congress.gov/117/bills/hr3076/BILLS-117hr3076ih.pdf"},
+    ]},
+    {"date": "2022-04-06T04:00:00Z", "type": "Enrolled Bill", "formats": [
+        {"type": "PDF", "url": "https://www.congress.gov/117/bills/hr3076/BILLS-117hr3076enr.pdf"},
+        {"type": "Formatted XML", "url": "https://www.congress.gov/117/bills/hr3076/BILLS-117hr3076enr.xml"},
+    ]},
+]
+
+BILL_XML = (
+    "<bill><legis-body><section><enum>1.</enum><header>Short title</header><text>This Act may be cited as the "
+    "Postal Service Reform Act of 2022.</text></section><section><enum>2.</enum><header>Retiree health benefits"
+    "</header><text>Requires enrollment in Medicare Part B for postal retirees &amp; annuitants."
+    "</text></section></legis-body></bill>"
+)
+
+def test_select_text_version_prefers_latest_parseable_format():
+    assert select_text_version(TEXT_VERSIONS) == (
+        "Enrolled Bill", "https://www.congress.gov/117/bills/hr3076/BILLS-117hr3076enr.xml", "Formatted XML"
+    )
+    assert select_text_version(TEXT_VERSIONS, "introduced in house")[2] == "Formatted Text"
+
+    pdf_only = [{"date": "2022-01-01", "type": "Introduced in Senate", "formats": [{"type": "PDF", "url": "x.pdf"}]}]
+    with pytest.raises(HTTPException):
+        select_text_version(pdf_only)
+
+def test_parse_blocks_handles_tags_split_across_blocks():
+    data = BILL_XML.encode("utf-8")
+    blocks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    text = "".join(parse_blocks(blocks))
+
+    assert "Medicare Part B for postal retirees & annuitants." in text
+    assert "<" not in text
+    assert "\nSEC. 2. Retiree health benefits\n" in text
+    assert " ".join(text.split()) == " ".join("".join(parse_blocks([data])).split())
+
+def test_bill_text_document_is_indexed_and_cached(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(bill_text, "BILL_TEXT_DIR", str(tmp_path))
+    monkeypatch.setattr(bill_text, "get_bill_text_versions", lambda *args: calls.append(args) or {"textVersions": TEXT_VERSIONS})
+    (tmp_path / "117-hr-3076-enrolled-bill.xml").write_text(BILL_XML, encoding="utf-8")
+
+    document = bill_text.get_bill_text_document(117, "HR", 3076, api_key=None)
+    ranked = document.search("Medicare enrollment for postal retirees", k=1)
+
+    assert document.version_type == "Enrolled Bill"
+    assert "Medicare Part B" in document.chunks[ranked[0][0]]
+    assert document.sections[ranked[0][0]].section == "2"
+    assert document.search("Medicare enrollment for postal retirees", section="1") == []
+    assert bill_text.get_bill_text_document(117, "hr", 3076, api_key=None) is document
+    assert len(calls) == 1, "A cached version should not list the text versions again"
+    monkeypatch.setattr(bill_text, "LATEST_VERSION_TTL", 0)
+    assert bill_text.get_bill_text_document(117, "hr", 3076, api_key=None) is document
+    assert len(calls) == 2, "The latest version should be looked up again once the alias expires"
+
+    bill_text.chunk_store.remove_document(document.doc_key)
+    ranked = document.search("Medicare enrollment for postal retirees", k=1)
+    assert "Medicare Part B" in document.chunks[ranked[0][0]]
+    index = document._evicted_index()
+    assert document.search("Postal Service Reform Act", k=1)[0][0] == 0
+    assert document._evicted_index() is index, "The evicted document's index should be built once"
+
+def test_stream_to_disk_cleans_up_failed_download(monkeypatch, tmp_path):
+    class Response:
+        status_code = 404
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(bill_text.requests, "get", lambda *args, **kwargs: Response())
+    with pytest.raises(HTTPException):
+        list(bill_text.stream_to_disk("https://www.congress.gov/missing.xml", str(tmp_path / "missing.xml")))
+    assert list(tmp_path.iterdir()) == []
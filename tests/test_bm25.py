@@ -0,0 +1,94 @@
+"""
+Unit tests for the BM25 inverted index.
+"""
+
+import os
+
+from app.api.services import bill_search
+from app.api.services.bm25 import Bm25Index, tokenize
+from app.api.services.bill_search import field_text
+
+def build_index():
+    index = Bm25Index()
+    index.add("117/hr/1/titles", "Farm Credit Improvement Act", group=117)
+    index.add("117/hr/2/titles", "Highway Safety Act", group=117)
+    index.add("118/s/3/summaries", "This bill expands farm credit for rural farm families.", group=118)
+    return index
+
+def test_bm25_search_ranks_and_filters():
+    index = build_index()
+    results = index.search("farm credit")
+    assert [key for key, _ in results] == ["117/hr/1/titles", "118/s/3/summaries"], "BM25 ranking failed"
+    assert results[0][1] > results[1][1]
+    assert index.search("farm", group=117)[0][0] == "117/hr/1/titles"
+    assert index.search("spaceport") == []
+
+def test_bm25_replace_delete_and_compact():
+    index = build_index()
+    index.add("117/hr/2/titles", "Rural Broadband Act", group=117)
+    assert index.search("highway") == [], "Replaced document should not match"
+    index.delete("117/hr/1/titles")
+    assert [key for key, _ in index.search("farm")] == ["118/s/3/summaries"]
+    before = index.search("rural")
+    index.compact()
+    assert len(index.doc_keys) == 2
+    assert index.search("rural") == before
+
+def test_bm25_save_and_load(tmp_path):
+    index = build_index()
+    index.delete("117/hr/2/titles")
+    path = tmp_path / "index.npz"
+    index.save(str(path))
+    loaded = Bm25Index.load(str(path))
+    assert loaded.search("farm credit") == index.search("farm credit")
+    loaded.add("118/hr/4/actions", "Referred to the Committee on Agriculture farm panel.", group=118)
+    assert "118/hr/4/actions" in [key for key, _ in loaded.search("farm")]
+    assert len(loaded) == 3
+
+def test_field_text_strips_summary_markup():
+    response = {"summaries": [{"text": "<p><strong>Farm Act</strong> expands credit.</p>"}]}
+    assert field_text("summaries", response).split() == ["Farm", "Act", "expands", "credit."]
+
+def test_tokenize_joins_bill_references():
+    assert "hr1234" in tokenize("See H.R. 1234 and S. 56.")
+    assert "s56" in tokenize("See H.R. 1234 and S. 56.")
+    assert tokenize("HR1234") == ["hr1234"]
+    assert tokenize("it is 5 pages") == ["it", "is", "pages"]
+
+def test_bm25_ignores_tombstones_in_document_frequency(monkeypatch, tmp_path):
+    index = Bm25Index()
+    index.add("a", "farm bill for dairy farmers")
+    index.add("b", "postal service reform")
+    for _ in range(5):
+        index.add("a", "farm bill for dairy farmers")
+    assert index.scores("farm").max() > 0
+    assert [key for key, _ in index.search("farm")] == ["a"]
+
+    monkeypatch.setattr(bill_search, "_index", index)
+    monkeypatch.setattr(bill_search, "_dirty", True)
+    monkeypatch.setattr(bill_search, "BILL_INDEX_DIR", str(tmp_path))
+    bill_search.maybe_flush(force=True)
+    assert index.tombstone_ratio() == 0.0 and len(index.doc_keys) == 2
+
+def test_worker_shards_merge_keeping_the_newest_copy(monkeypatch, tmp_path):
+    worker = Bm25Index()
+    worker.add("117/hr/1/titles", "Farm Credit Act", group=117, version=1.0)
+    worker.add("117/hr/2/titles", "Highway Safety Act", group=117, version=5.0)
+    worker.save(str(tmp_path / "101.npz"))
+    crawler = Bm25Index()
+    crawler.add("117/hr/1/titles", "Farm Credit Improvement Act", group=117, version=3.0)
+    crawler.add("117/hr/2/titles", "Old Highway Title", group=117, version=2.0)
+    crawler.save(str(tmp_path / "102.npz"))
+
+    monkeypatch.setattr(bill_search, "BILL_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(bill_search, "_index", None)
+    monkeypatch.setattr(bill_search, "_last_merge", 0.0)
+    monkeypatch.setattr(bill_search, "_process_alive", lambda pid: False)
+    index = bill_search.get_bill_index()
+
+    assert len(index) == 2
+    assert [key for key, _ in index.search("improvement")] == ["117/hr/1/titles"]
+    assert index.search("old") == []
+    bill_search.maybe_flush(force=True)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(bill_search.shard_path())]
+    assert len(Bm25Index.load(bill_search.shard_path())) == 2
@@ -0,0 +1,40 @@
+"""
+Unit tests for parallel bulk ingest.
+"""
+
+import numpy as np
+
+from app.api.services.bulk_ingest import bulk_index
+from app.api.services.hashing_index import HashingIndex
+from app.api.services.legislative_chunking import iter_section_chunks
+
+DOCUMENTS = [
+    (f"117/hr/{n}", f"SECTION 1. SHORT TITLE.\nThis Act may be cited as the Act number {n}.\n"
+                    f"SEC. 2. {topic}.\nThe Secretary shall carry out a program on {topic.lower()}.\n")
+    for n, topic in enumerate(["POSTAL REFORM", "RURAL BROADBAND", "VETERANS HEALTH", "WILDFIRE RESPONSE"] * 5)
+]
+
+def test_bulk_index_matches_sequential_indexing():
+    index = bulk_index(DOCUMENTS, workers=2, partition_size=3, n_features=2**16)
+
+    expected = HashingIndex(2**16)
+    for key, text in DOCUMENTS:
+        expected.append([chunk for chunk, _ in iter_section_chunks([text])])
+
+    assert index.chunks == expected.chunks
+    assert index.keys[:3] == ["117/hr/0#0", "117/hr/0#1", "117/hr/1#0"]
+    query = "broadband program"
+    assert np.allclose(index.scores(query), expected.scores(query))
+
+def test_bulk_index_reads_bill_text_files(tmp_path):
+    path = tmp_path / "117-hr-3076-enrolled-bill.xml"
+    path.write_text(
+        "<bill><section><enum>1.</enum><header>Short title</header>"
+        "<text>This Act may be cited as the Postal Service Reform Act.</text></section></bill>",
+        encoding="utf-8",
+    )
+
+    index = bulk_index([(str(path), None)], workers=1, n_features=2**16)
+
+    assert len(index) == 1
+    assert index.chunks[0].strip().startswith("SEC. 1. Short title")
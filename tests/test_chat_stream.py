@@ -0,0 +1,52 @@
+"""
+Unit tests for the streaming chat pipeline.
+"""
+
+import asyncio
+import json
+
+from fastapi import HTTPException
+
+from app.api.services import member_document
+from app.api.services.chat_stream import chat_events
+
+def collect(events):
+    async def run():
+        return [event async for event in events]
+    parsed = []
+    for raw in asyncio.run(run()):
+        event_line, data_line = raw.strip().split("\n")
+        parsed.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return parsed
+
+class FakeDocument:
+    def __init__(self, passages):
+        self.chunks = passages
+        self.index = member_document.get_index(passages)
+
+def test_chat_events_ack_passages_then_timings(monkeypatch):
+    document = FakeDocument([
+        "Sponsored S 1895: Lower Health Care Costs Act.",
+        "Term: served in the Senate from 2003 to 2021.",
+        "Leadership role: Conference Chair.",
+    ])
+    monkeypatch.setattr(member_document, "get_member_document", lambda member_id, api_key: document)
+
+    events = collect(chat_events("health care costs", "A000360", api_key=None, top_k=2))
+    names = [name for name, _ in events]
+
+    assert names[0] == "ack" and names[-2:] == ["timings", "done"]
+    passages = [data for name, data in events if name == "passage"]
+    assert passages[0]["text"].startswith("Sponsored S 1895")
+    assert events[-1][1] == {"passages": len(passages)}
+    assert set(events[-2][1]) == {"fetch_ms", "search_ms", "total_ms"}
+
+def test_chat_events_reports_upstream_errors(monkeypatch):
+    def fail(member_id, api_key):
+        raise HTTPException(status_code=404, detail="Error fetching member details")
+    monkeypatch.setattr(member_document, "get_member_document", fail)
+
+    events = collect(chat_events("anything", "X000000", api_key=None))
+
+    assert [name for name, _ in events] == ["ack", "error"]
+    assert events[1][1]["status_code"] == 404
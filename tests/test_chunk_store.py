@@ -0,0 +1,80 @@
+"""
+Unit tests for the content-addressed chunk store.
+"""
+
+from app.api.services.chunk_store import ChunkStore, content_hash
+
+INTRODUCED = [
+    "SEC. 1. SHORT TITLE. This Act may be cited as the Postal Service Reform Act.",
+    "SEC. 2. HEALTH BENEFITS. Postal retirees shall enroll in Medicare Part B.",
+    "SEC. 3. REPORTS. The Postal Service shall report delivery data weekly.",
+]
+# The reported version rewords section 3 and reflows the whitespace of section 1.
+REPORTED = [
+    "SEC. 1.  SHORT TITLE.\nThis Act may be cited as the Postal Service Reform Act.",
+    INTRODUCED[1],
+    "SEC. 3. REPORTS. The Postal Service shall publish delivery performance data weekly.",
+]
+
+def test_unchanged_chunks_are_stored_once():
+    store = ChunkStore(n_features=2**16)
+
+    assert store.add_document("117/hr/3076/ih", INTRODUCED) == 3
+    assert store.add_document("117/hr/3076/rh", REPORTED) == 1
+    assert content_hash(INTRODUCED[0]) == content_hash(REPORTED[0])
+
+    stats = store.stats()
+    assert stats == {"documents": 2, "chunk_references": 6, "unique_chunks": 4, "dedup_ratio": 1.5}
+    assert store.chunks("117/hr/3076/rh")[2] == REPORTED[2]
+
+def test_search_is_scoped_to_one_document():
+    store = ChunkStore(n_features=2**16)
+    store.add_document("117/hr/3076/ih", INTRODUCED)
+    store.add_document("117/hr/3076/rh", REPORTED)
+
+    ranked = store.search("117/hr/3076/rh", "delivery performance data", k=3)
+
+    assert ranked[0][0] == 2
+    assert all(position < len(REPORTED) for position, _ in ranked)
+
+def test_removing_a_document_drops_only_orphaned_chunks():
+    store = ChunkStore(n_features=2**16)
+    store.add_document("117/hr/3076/ih", INTRODUCED)
+    store.add_document("117/hr/3076/rh", REPORTED)
+
+    store.remove_document("117/hr/3076/ih")
+
+    assert len(store.index) == 3
+    assert store.chunks("117/hr/3076/rh")[0] == INTRODUCED[0]
+    assert store.search("117/hr/3076/rh", "Medicare Part B retirees", k=1)[0][0] == 1
+
+def test_removal_during_add_keeps_chunks_the_new_document_shares():
+    store = ChunkStore(n_features=2**16)
+    store.add_document("117/hr/3076/ih", INTRODUCED)
+
+    def reported_chunks():
+        yield REPORTED[0]
+        yield REPORTED[1]
+        # Another request evicts the introduced version while this one is still streaming.
+        store.remove_document("117/hr/3076/ih")
+        yield REPORTED[2]
+
+    store.add_document("117/hr/3076/rh", reported_chunks(), batch_size=2)
+
+    assert store.chunks("117/hr/3076/rh") == [INTRODUCED[0], REPORTED[1], REPORTED[2]]
+    assert store.stats()["unique_chunks"] == 3
+
+def test_concurrent_adds_of_one_document_keep_one_reference():
+    store = ChunkStore(n_features=2**16)
+
+    def introduced_chunks():
+        yield INTRODUCED[0]
+        # A second request for the same document finishes first.
+        store.add_document("117/hr/3076/ih", INTRODUCED)
+        yield from INTRODUCED[1:]
+
+    store.add_document("117/hr/3076/ih", introduced_chunks(), batch_size=1)
+    assert store.stats()["chunk_references"] == 3
+
+    store.remove_document("117/hr/3076/ih")
+    assert store.refcounts == {} and len(store.index) == 0
@@ -2,7 +2,7 @@
 Unit tests for chunking service.
 """
 
-from app.api.services.chunking import chunk_text
+from app.api.services.chunking import batch_token_spans, chunk_text, iter_chunks, token_spans
 import tiktoken
 
 def calculate_tokens(text):
@@ -22,3 +22,41 @@ def test_chunking_edge_case():
     assert len(chunks) == 1, "Chunking failed on short text"
     assert chunks[0] == "Short text.", "Chunking returned incorrect chunk"
     assert calculate_tokens(chunks[0]) < 4096, "Chunk exceeded token limit"
+
+def test_chunking_never_emits_empty_chunks():
+    chunks = chunk_text("supercalifragilistic is long", max_chunk_size=10)
+    assert chunks == ["supercalifragilistic", "is long"]
+
+def test_iter_chunks_matches_across_streamed_pieces():
+    text = " ".join(f"word{i % 97}" for i in range(5000))
+    pieces = [text[i:i + 333] for i in range(0, len(text), 333)]
+
+    chunks = list(iter_chunks(pieces, max_chunk_size=200))
+
+    assert chunks == chunk_text(text, max_chunk_size=200)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+
+BILL_TEXT = (
+    "SECTION 1. SHORT TITLE.\nThis Act may be cited as the Postal Service Reform Act of 2022.\n\n"
+    "SEC. 2. FINDINGS.\nCongress finds the following: the Postal Service is a fundamental service; "
+    "it delivers to every address in the United States. Retirees deserve integrated health benefits.\n\n"
+) * 40
+
+def test_token_spans_respect_token_limit_and_cover_text():
+    encoding = tiktoken.get_encoding("cl100k_base")
+    spans = token_spans(BILL_TEXT, max_tokens=120, overlap=20)
+
+    assert spans[0].start == 0 and spans[-1].end == len(BILL_TEXT)
+    for previous, span in zip(spans, spans[1:]):
+        assert span.start <= previous.end, "Chunks left a gap in the text"
+    for span in spans:
+        assert calculate_tokens(BILL_TEXT[span.start:span.end]) == span.tokens <= 120
+    assert sum(span.tokens for span in spans) > len(encoding.encode(BILL_TEXT))
+
+def test_token_spans_snap_to_sentence_and_section_ends():
+    spans = token_spans(BILL_TEXT, max_tokens=120, overlap=0)
+
+    assert sum(span.tokens for span in spans) == calculate_tokens(BILL_TEXT)
+    for span in spans[:-1]:
+        assert BILL_TEXT[:span.end].rstrip(" ").endswith((".", ";", ":", "\n")), "Chunk ended mid-sentence"
+    assert batch_token_spans([BILL_TEXT, "Short text."], max_tokens=120, overlap=0)[0] == spans
@@ -0,0 +1,144 @@
+"""
+Unit tests for the local SQLite store.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from app.api.services import bill_graph, congress_store, cosponsor_graph, facet_index, posting_index
+from app.api.services.congress_store import find_bills, get_stored_bill, sync_bill_resource
+
+def member(bioguide_id, name, party, state):
+    return {"bioguideId": bioguide_id, "fullName": name, "firstName": name.split()[0], "lastName": name.split()[-1],
+            "party": party, "state": state, "url": f"https://api.congress.gov/v3/member/{bioguide_id}"}
+
+def cosponsor(bioguide_id, name, party, state, date, original=True):
+    return {**member(bioguide_id, name, party, state), "sponsorshipDate": date, "isOriginalCosponsor": original}
+
+# Three bills of the 117th Congress: a postal reform bill, its Senate companion and an agriculture bill.
+SAMPLE_BILLS = {
+    (117, "hr", 3076): {
+        "details": {"bill": {
+            "title": "Postal Service Reform Act of 2022", "originChamber": "House", "introducedDate": "2021-05-11",
+            "policyArea": {"name": "Government Operations and Politics"}, "updateDate": "2022-04-07",
+            "latestAction": {"actionDate": "2022-04-06", "text": "Became Public Law No: 117-108."},
+            "sponsors": [{**member("M000087", "Carolyn B. Maloney", "D", "NY"), "isByRequest": "N"}],
+        }},
+        "actions": {"actions": [
+            {"actionDate": "2021-05-11", "type": "IntroReferral", "text": "Referred to the Committee on Oversight and Reform.",
+             "sourceSystem": {"name": "House floor actions"}},
+            {"actionDate": "2022-02-08", "type": "Floor", "text": "Passed/agreed to in House.",
+             "sourceSystem": {"name": "House floor actions"}},
+            {"actionDate": "2022-03-08", "type": "Floor", "text": "Passed Senate without amendment.",
+             "sourceSystem": {"name": "Senate"}},
+        ]},
+        "cosponsors": {"cosponsors": [
+            cosponsor("C001078", "Gerald E. Connolly", "D", "VA", "2021-05-11"),
+            cosponsor("C001108", "James Comer", "R", "KY", "2021-05-11"),
+        ]},
+        "committees": {"committees": [
+            {"systemCode": "hsgo00", "name": "Oversight and Reform Committee", "chamber": "House", "type": "Standing",
+             "url": "", "activities": [{"date": "2021-05-13", "name": "Markup by"}]},
+        ]},
+        "subjects": {"subjects": {
+            "legislativeSubjects": [{"name": "Postal service", "updateDate": ""}, {"name": "Retirement", "updateDate": ""}],
+            "policyArea": {"name": "Government Operations and Politics"},
+        }},
+        "related-bills": {"relatedBills": [
+            {"congress": 117, "type": "S", "number": 1720, "title": "Postal Service Reform Act of 2021", "url": "",
+             "latestAction": {}, "relationshipDetails": [{"type": "Related bill", "identifiedBy": "CRS"}]},
+        ]},
+    },
+    (117, "s", 1720): {
+        "details": {"bill": {
+            "title": "Postal Service Reform Act of 2021", "originChamber": "Senate", "introducedDate": "2021-05-19",
+            "policyArea": {"name": "Government Operations and Politics"}, "updateDate": "2022-01-01",
+            "latestAction": {"actionDate": "2021-05-19", "text": "Read twice and referred."},
+            "sponsors": [{**member("P000595", "Gary C. Peters", "D", "MI"), "isByRequest": "N"}],
+        }},
+        "actions": {"actions": [
+            {"actionDate": "2021-05-19", "type": "IntroReferral", "text": "Read twice and referred.",
+             "sourceSystem": {"name": "Senate"}},
+        ]},
+        "cosponsors": {"cosponsors": [
+            cosponsor("C001078", "Gerald E. Connolly", "D", "VA", "2021-06-01", original=False),
+            cosponsor("P000449", "Rob Portman", "R", "OH", "2021-05-19"),
+        ]},
+        "committees": {"committees": [
+            {"systemCode": "ssga00", "name": "Homeland Security and Governmental Affairs Committee", "chamber": "Senate",
+             "type": "Standing", "url": "", "activities": [{"date": "2021-05-19", "name": "Referred to"}]},
+        ]},
+        "subjects": {"subjects": {"legislativeSubjects": [{"name": "Postal service", "updateDate": ""}],
+                                  "policyArea": {"name": "Government Operations and Politics"}}},
+        "related-bills": {"relatedBills": [
+            {"congress": 117, "type": "HR", "number": 3076, "title": "Postal Service Reform Act of 2022", "url": "",
+             "latestAction": {}, "relationshipDetails": [{"type": "Related bill", "identifiedBy": "CRS"}]},
+        ]},
+    },
+    (117, "hr", 2820): {
+        "details": {"bill": {
+            "title": "Dairy Pricing Opportunity Act of 2021", "originChamber": "House", "introducedDate": "2021-04-26",
+            "policyArea": {"name": "Agriculture and Food"}, "updateDate": "2021-05-01",
+            "latestAction": {"actionDate": "2021-05-01", "text": "Referred to the Subcommittee on Livestock."},
+            "sponsors": [{**member("C001108", "James Comer", "R", "KY"), "isByRequest": "N"}],
+        }},
+        "actions": {"actions": [
+            {"actionDate": "2021-04-26", "type": "IntroReferral", "text": "Referred to the House Committee on Agriculture.",
+             "sourceSystem": {"name": "House floor actions"}},
+        ]},
+        "cosponsors": {"cosponsors": [cosponsor("C001078", "Gerald E. Connolly", "D", "VA", "2021-04-26")]},
+        "committees": {"committees": [
+            {"systemCode": "hsag00", "name": "Agriculture Committee", "chamber": "House", "type": "Standing", "url": "",
+             "activities": [{"date": "2021-04-26", "name": "Referred to"}],
+             "subcommittees": [{"systemCode": "hsag29", "name": "Livestock and Foreign Agriculture Subcommittee",
+                                "url": "", "activities": [{"date": "2021-05-01", "name": "Referred to"}]}]},
+        ]},
+        "subjects": {"subjects": {"legislativeSubjects": [{"name": "Dairy", "updateDate": ""}],
+                                  "policyArea": {"name": "Agriculture and Food"}}},
+        "related-bills": {"relatedBills": []},
+    },
+}
+
+def sync_sample_bills():
+    for (congress, bill_type, bill_number), resources in SAMPLE_BILLS.items():
+        for resource, response in resources.items():
+            sync_bill_resource(resource, congress, bill_type, bill_number, response)
+
+def test_cross_bill_queries_answer_from_the_store(store):
+    cosponsored = find_bills(cosponsor="C001078", action_since="2022-01-01", action_type="Floor")
+    assert [(b["bill_type"], b["bill_number"]) for b in cosponsored] == [("hr", 3076)]
+
+    assert [b["bill_number"] for b in find_bills(committee="hsag29")] == [2820]
+    assert [b["bill_number"] for b in find_bills(sponsor="C001108")] == [2820]
+    assert {b["bill_number"] for b in find_bills(subject="Postal service")} == {3076, 1720}
+    assert len(find_bills(congress=117, limit=2)) == 2
+
+def test_resync_replaces_previous_rows(store):
+    sync_bill_resource("cosponsors", 117, "HR", 3076, {"cosponsors": [
+        cosponsor("C001108", "James Comer", "R", "KY", "2021-05-11"),
+    ]})
+
+    bill = get_stored_bill(117, "hr", 3076)
+    assert [c["bioguide_id"] for c in bill["cosponsors"]] == ["C001108"]
+    assert bill["cosponsors"][0]["party"] == "R"
+    assert bill["actions"][0]["text"] == "Passed Senate without amendment."
+    assert bill["committees"] == [{"system_code": "hsgo00", "name": "Oversight and Reform Committee", "chamber": "House"}]
+    assert get_stored_bill(117, "hr", 9999) is None
+
+@pytest.mark.parametrize("get_index", [
+    cosponsor_graph.get_graph, facet_index.get_facet_index, posting_index.get_reverse_indexes, bill_graph.get_bill_graph,
+])
+def test_indexes_rebuild_only_for_syncs_of_other_processes(store, monkeypatch, get_index):
+    index = get_index()
+    index.watch.interval = 0
+    sync_bill_resource("cosponsors", 117, "hr", 2820, {"cosponsors": []})
+    assert get_index() is index, "Syncs of this process are applied by the on_sync listeners"
+
+    # A sync committed by the crawler process bumps its own row of store_writes.
+    crawler = sqlite3.connect(congress_store.DB_PATH)
+    crawler.execute("INSERT INTO store_writes (pid, writes) VALUES (?, 1)", (os.getpid() + 1,))
+    crawler.commit()
+    crawler.close()
+    assert get_index() is not index
@@ -0,0 +1,39 @@
+"""
+Unit tests for the co-sponsorship matrix.
+"""
+
+import pytest
+
+from app.api.services import congress_store, cosponsor_graph
+from app.api.services.congress_store import sync_bill_resource
+from app.api.services.cosponsor_graph import bipartisan_ranking, get_graph, top_collaborators
+from tests.test_congress_store import cosponsor
+
+def test_top_collaborators_and_bipartisan_scores(store):
+    comer = top_collaborators("C001108")
+    # On hr3076 with Maloney and Connolly, and on hr2820 with Connolly.
+    assert comer["bills"] == 2
+    assert comer["collaborators"][0] == {"bioguide_id": "C001078", "party": "D", "shared_bills": 2}
+    assert comer["bipartisan_score"] == 1.0
+    assert top_collaborators("Z000000") is None
+
+    # Connolly: hr3076 (Maloney D, Comer R), s1720 (Peters D, Portman R), hr2820 (Comer R).
+    ranking = {row["bioguide_id"]: row["bipartisan_score"] for row in bipartisan_ranking(party="D")}
+    assert ranking["C001078"] == pytest.approx(3 / 5)
+    assert "C001108" not in ranking
+
+def test_matrix_updates_incrementally_on_sync(store):
+    graph = get_graph()
+    sync_bill_resource("cosponsors", 117, "hr", 2820, {"cosponsors": [
+        cosponsor("P000449", "Rob Portman", "R", "OH", "2021-05-02"),
+    ]})
+    assert get_graph() is graph
+
+    comer = {row["bioguide_id"]: row["shared_bills"] for row in top_collaborators("C001108")["collaborators"]}
+    assert comer == {"C001078": 1, "M000087": 1, "P000449": 1}
+    rebuilt = cosponsor_graph.CosponsorGraph(congress_store.get_connection())
+    assert pairs(rebuilt) == pairs(graph)
+
+def pairs(graph):
+    matrix = graph.cooccurrence.tocoo()
+    return {(graph.member_ids[i], graph.member_ids[j]): v for i, j, v in zip(matrix.row, matrix.col, matrix.data)}
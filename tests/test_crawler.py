@@ -0,0 +1,88 @@
+"""
+Unit tests for the resumable bill crawler.
+"""
+
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.services import bill_search, congress_store, crawler
+from app.api.services.congress_store import find_bills, get_stored_bill, sync_bill_resource
+from app.api.services.crawler import RequestBudget, QuotaExhausted, WorkQueue, crawl
+
+BILLS = [{"type": "HR", "number": str(n)} for n in range(1, 6)]
+
+@pytest.fixture
+def fake_api(monkeypatch, tmp_path):
+    monkeypatch.setattr(congress_store, "DB_PATH", str(tmp_path / "congress.db"))
+    monkeypatch.setattr(crawler, "CRAWL_CACHE_DIR", str(tmp_path / "crawl"))
+    monkeypatch.setattr(crawler, "BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(bill_search, "BILL_INDEX_DIR", str(tmp_path / "bill_search"))
+    monkeypatch.setattr(bill_search, "_index", None)
+    monkeypatch.setattr(bill_search, "_last_merge", 0.0)
+    calls = []
+
+    def get_bills(congress, api_key, offset=0, limit=250):
+        page = BILLS[offset:offset + 2]
+        return {"bills": page, "pagination": {"next": "more"} if offset + 2 < len(BILLS) else {}}
+
+    def get_bill_details(congress, bill_type, bill_number, api_key):
+        calls.append(("details", bill_number))
+        if bill_number == 3 and calls.count(("details", 3)) == 1:
+            raise HTTPException(status_code=503, detail="Service unavailable")
+        return {"bill": {"title": f"Bill {bill_number}", "introducedDate": "2023-01-09"}}
+
+    def get_bill_titles(congress, bill_type, bill_number, api_key, offset=0, limit=250):
+        calls.append(("titles", bill_number))
+        return {"titles": [{"title": f"Bill {bill_number}"}], "pagination": {}}
+
+    monkeypatch.setattr(crawler.congress_api, "get_bills", get_bills)
+    monkeypatch.setattr(crawler, "RESOURCE_FETCHERS", {"details": get_bill_details, "titles": get_bill_titles})
+    return calls
+
+def test_crawl_resumes_after_quota_and_retries_transient_errors(fake_api, tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    # 3 listing pages and 5 requests for items, then stop.
+    counts = crawl(118, "key", workers=1, quota=8, queue=queue)
+    assert counts["pending"] > 0
+
+    counts = crawl(118, "key", workers=2, queue=WorkQueue(str(tmp_path / "queue.db")))
+    assert counts == {"pending": 0, "done": 10, "failed": 0}
+    assert fake_api.count(("details", 3)) == 2
+    assert len(fake_api) == 11
+    assert get_stored_bill(118, "hr", 3)["title"] == "Bill 3"
+    assert (tmp_path / "crawl" / "118" / "hr" / "5" / "titles.json").exists()
+    assert len(bill_search.search_bills("bill", congress=118)) == len(BILLS)
+    assert os.path.exists(bill_search.shard_path())
+
+def test_permanent_errors_fail_without_retry(fake_api, monkeypatch, tmp_path):
+    def missing(congress, bill_type, bill_number, api_key, **kwargs):
+        raise HTTPException(status_code=404, detail="Not found")
+    monkeypatch.setattr(crawler, "RESOURCE_FETCHERS", {"titles": missing})
+
+    counts = crawl(118, "key", queue=WorkQueue(str(tmp_path / "queue.db")))
+    assert counts == {"pending": 0, "done": 0, "failed": 5}
+
+def test_budget_enforces_quota():
+    budget = RequestBudget(rate_per_hour=3600, quota=2)
+    budget.acquire()
+    budget.acquire()
+    with pytest.raises(QuotaExhausted):
+        budget.acquire()
+
+def test_subjects_are_paged_and_stored_whole(fake_api, monkeypatch, tmp_path):
+    subjects = [{"name": f"Subject {n}"} for n in range(5)]
+
+    def get_bill_subjects(congress, bill_type, bill_number, api_key, offset=0, limit=250):
+        more = offset + 2 < len(subjects)
+        return {"subjects": {"legislativeSubjects": subjects[offset:offset + 2], "policyArea": {"name": "Taxation"}},
+                "pagination": {"count": len(subjects), "next": "more"} if more else {"count": len(subjects)}}
+
+    monkeypatch.setattr(crawler, "PAGE_SIZE", 2)
+    monkeypatch.setattr(crawler, "RESOURCE_FETCHERS", {"subjects": get_bill_subjects})
+    crawl(118, "key", queue=WorkQueue(str(tmp_path / "queue.db")))
+
+    assert len(find_bills(congress=118, subject="Subject 4")) == 5
+    with pytest.raises(ValueError):
+        sync_bill_resource("subjects", 118, "hr", 1, get_bill_subjects(118, "hr", 1, "key"))
@@ -73,6 +73,18 @@ def test_chat():
     assert "score" in response.json()
     assert calculate_tokens(response.text) < 4096, "Response exceeded token limit"
 
+def test_chat_batch():
+    questions = ["Tell me about the roles", "What is the member's name?"]
+    response = client.post("/chat/batch", json={"questions": questions, "member_id": "A000360"}, headers=headers)
+
+    # Validate the response
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(questions)
+    for result in results:
+        assert "response" in result
+        assert "passages" in result
+
 def test_get_bill_details():
     # Direct API call to get bill details
     response = client.get("/bill-details/", params={"congress": 117, "bill_type": "hr", "bill_number": 3076})
@@ -267,3 +279,29 @@ def test_senate_communications():
     assert "senateCommunications" in response.json()
     assert calculate_tokens(response.text) < 4096
 
+
+def test_bill_sync_skips_partial_pages_and_never_fails_the_request(monkeypatch):
+    from app.api.endpoints import members
+
+    monkeypatch.setattr(members, "SERVER_API_KEY", "test-key")
+    synced = []
+    cosponsor = {
+        "bioguideId": "A000360", "firstName": "Lamar", "lastName": "Alexander", "fullName": "Sen. Alexander, Lamar [R-TN]",
+        "isOriginalCosponsor": True, "party": "R", "state": "TN", "sponsorshipDate": "2021-05-11",
+        "url": "https://api.congress.gov/v3/member/A000360",
+    }
+    page = {"cosponsors": [cosponsor], "pagination": {"count": 300, "next": "https://api.congress.gov/v3/bill/117/hr/3076/cosponsors?offset=250"}}
+    monkeypatch.setattr(members, "get_bill_cosponsors", lambda *args: page)
+    monkeypatch.setattr(members, "sync_bill_resource", lambda *args: synced.append(args))
+
+    response = client.get("/bill-cosponsors/", params={"congress": 117, "bill_type": "hr", "bill_number": 3076}, headers={"X-API-Key": "test-key"})
+    assert response.status_code == 200
+    assert synced == [], "A first page of several should not replace the stored cosponsors"
+
+    def failing_sync(*args):
+        raise RuntimeError("database is locked")
+    page["pagination"] = {"count": 1}
+    monkeypatch.setattr(members, "sync_bill_resource", failing_sync)
+    response = client.get("/bill-cosponsors/", params={"congress": 117, "bill_type": "hr", "bill_number": 3076}, headers={"X-API-Key": "test-key"})
+    assert response.status_code == 200
+    assert response.json()["cosponsors"][0]["bioguideId"] == "A000360"
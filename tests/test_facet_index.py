@@ -0,0 +1,32 @@
+"""
+Unit tests for the facet bitmap index.
+"""
+
+from app.api.services.congress_store import get_bills_by_id, sync_bill_resource
+from app.api.services.facet_index import bill_status, search_facets
+
+def numbers(result):
+    return [bill["bill_number"] for bill in get_bills_by_id(result["ordinals"])]
+
+def test_and_or_filters_and_counts(store):
+    result = search_facets({"subject": ["Postal service", "Dairy"], "origin_chamber": ["House"]})
+    assert sorted(numbers(result)) == [2820, 3076]
+    assert result["counts"]["policy_area"] == {"Government Operations and Politics": 1, "Agriculture and Food": 1}
+    assert result["counts"]["status"] == {"enacted": 1, "introduced": 1}
+
+    both = search_facets({"subject": ["Postal service", "Retirement"]}, match_all=("subject",))
+    assert numbers(both) == [3076]
+    assert search_facets({"congress": [117], "subject": ["Unknown subject"]})["total"] == 0
+    assert search_facets({}, count_facets=("congress",))["counts"] == {"congress": {"117": 3}}
+
+def test_index_updates_on_sync(store):
+    assert search_facets({"status": ["passed"]})["total"] == 0
+    sync_bill_resource("details", 117, "s", 1720, {"bill": {
+        "title": "Postal Service Reform Act of 2021", "originChamber": "Senate",
+        "latestAction": {"actionDate": "2021-09-01", "text": "Passed Senate with an amendment by Voice Vote."},
+    }})
+    sync_bill_resource("subjects", 117, "hr", 9, {"subjects": {"legislativeSubjects": [{"name": "Dairy"}]}})
+
+    assert numbers(search_facets({"status": ["passed"]})) == [1720]
+    assert sorted(numbers(search_facets({"subject": ["Dairy"]}))) == [9, 2820]
+    assert bill_status("Vetoed by President.") == "vetoed"
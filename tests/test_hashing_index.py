@@ -0,0 +1,43 @@
+"""
+Unit tests for the incremental hashing index.
+"""
+
+import numpy as np
+
+from app.api.services.hashing_index import HashingIndex
+from app.api.services.semantic_search import TfidfIndex
+
+CHUNKS = ["The farm bill passed.", "A bill on roads.", "Farm subsidies and farm credit.", "Ports."]
+
+def test_hashing_index_matches_tfidf_scores():
+    index = HashingIndex()
+    index.append(CHUNKS[:2])
+    index.append(CHUNKS[2:])
+    for query in ["farm credit", "roads bill", "fourth"]:
+        assert np.allclose(index.scores(query), TfidfIndex(CHUNKS).scores(query), atol=1e-6)
+
+def test_hashing_index_tombstones_and_compacts():
+    index = HashingIndex()
+    index.append(CHUNKS, keys=["a", "b", "c", "d"])
+    index.delete_keys(["a", "d"])
+    assert len(index) == 2
+    assert [i for i, _ in index.search("farm")] == [2]
+    assert np.allclose(index.scores("farm credit")[[1, 2]], TfidfIndex(CHUNKS[1:3]).scores("farm credit"), atol=1e-6)
+
+    remap = index.maybe_compact()
+    assert list(remap) == [-1, 0, 1, -1]
+    assert index.chunks == CHUNKS[1:3]
+    assert index.key_to_id == {"b": 0, "c": 1}
+    assert [i for i, _ in index.search("farm")] == [1]
+
+def test_document_frequencies_stay_sparse_and_follow_deletes():
+    index = HashingIndex()
+    index.append(CHUNKS, keys=["a", "b", "c", "d"])
+    # "farm" is counted once per chunk, however often a chunk repeats it.
+    farm = index.hash_counts(["farm"]).indices
+    assert index.df_columns.size == 10 and index.idf(farm)[0] == np.float32(np.log(5 / 3) + 1)
+
+    index.delete_keys(["a"])
+    index.compact()
+    assert index.df_columns.size == 8
+    assert index.idf(farm)[0] == np.float32(np.log(4 / 2) + 1)
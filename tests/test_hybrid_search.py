@@ -0,0 +1,36 @@
+"""
+Unit tests for hybrid lexical + vector search.
+"""
+
+from app.api.services import hybrid_search as hybrid
+from app.api.services.hybrid_search import HybridIndex, hybrid_search, reciprocal_rank_fusion
+
+CHUNKS = [
+    "H.R. 1234 amends the Farm Credit Act to expand rural lending.",
+    "The senator supports agricultural loan programs for rural families.",
+    "A bill to rename a post office in Springfield.",
+    "Highway safety grants for states.",
+]
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([[(1, 9.0), (2, 5.0)], [(2, 0.9), (3, 0.8)]], k=60)
+    assert [item for item, _ in fused] == [2, 1, 3], "Items in both rankings should rise to the top"
+    assert fused[0][1] == 1 / 62 + 1 / 61
+
+def test_hybrid_search_matches_bill_numbers_and_reports_timings():
+    results, timings = hybrid_search("What does HR 1234 do?", CHUNKS, k=2)
+    assert results[0][0] == 0, "Exact bill number should be found by the lexical pass"
+    assert set(timings) == {"lexical_ms", "vector_ms", "fusion_ms", "total_ms"}
+    assert hybrid_search("quantum chromodynamics", CHUNKS)[0] == []
+
+def test_hybrid_index_is_flushed_before_it_is_shared():
+    index = HybridIndex(["Farm credit for rural families.", "Highway safety grants."])
+    assert index.lexical.pending == {} and index.lexical.pending_docs == []
+    assert len(index.lexical.doc_lengths) == 2
+
+def test_large_corpora_probe_the_ann_index(monkeypatch):
+    monkeypatch.setattr(hybrid, "ANN_MIN_CHUNKS", len(CHUNKS))
+    index = HybridIndex(CHUNKS, n_components=3)
+    assert index.ann is not None and index.vectors is None
+    results, _ = index.search("rural lending under the Farm Credit Act", k=1)
+    assert results[0][0] == 0
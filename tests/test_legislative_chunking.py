@@ -0,0 +1,50 @@
+"""
+Unit tests for the structure-aware legislative chunker.
+"""
+
+from app.api.services.legislative_chunking import iter_section_chunks, section_mask, section_spans
+
+BILL_TEXT = (
+    "An Act to improve the Postal Service.\n"
+    "SECTION 1. SHORT TITLE.\n"
+    "This Act may be cited as the Postal Service Reform Act of 2022.\n"
+    "TITLE I--FINANCIAL REFORMS\n"
+    "SEC. 101. POSTAL SERVICE HEALTH BENEFITS PROGRAM.\n"
+    + "".join(f"({letter}) In general.--The Office shall establish the program. {'Text. ' * 20}\n" for letter in "abcdef")
+    + "SEC. 102. USPS FAIRNESS.\n"
+    "Section 8348(h) of title 5 is amended by striking paragraph (2).\n"
+    "TITLE II--OPERATIONAL REFORMS\n"
+    "SEC. 201. TRANSPARENCY.\n"
+    "(a) Weekly data.--The Postal Service shall publish delivery data.\n"
+)
+
+def test_chunks_align_to_sections_and_carry_metadata():
+    spans = section_spans(BILL_TEXT, max_chunk_size=400)
+
+    assert [(s.title, s.section) for s in spans if s.section in ("1", "102", "201")] == [
+        (None, "1"), ("I", "102"), ("II", "201")
+    ]
+    for span in spans:
+        assert span.end - span.start <= 400
+        if span.section:
+            # No chunk runs into the next section's header.
+            assert "SEC." not in BILL_TEXT[span.start + 1:span.end]
+
+    long_section = [s for s in spans if s.section == "101"]
+    assert len(long_section) > 1
+    assert all(BILL_TEXT[s.start] == "(" for s in long_section[1:]), "Long sections should split at subsections"
+    assert long_section[0].heading == "POSTAL SERVICE HEALTH BENEFITS PROGRAM"
+
+def test_streamed_chunks_match_whole_text_spans():
+    pieces = [BILL_TEXT[i:i + 53] for i in range(0, len(BILL_TEXT), 53)]
+    streamed = list(iter_section_chunks(pieces, max_chunk_size=200))
+
+    assert [span for _, span in streamed] == section_spans(BILL_TEXT, max_chunk_size=200)
+    assert all(text == BILL_TEXT[span.start:span.end] for text, span in streamed)
+
+def test_section_mask_filters_by_title_and_section():
+    spans = section_spans(BILL_TEXT, max_chunk_size=400)
+
+    in_title_one = section_mask(spans, title="i")
+    assert in_title_one.sum() == len([s for s in spans if s.title == "I"])
+    assert [spans[i].section for i in section_mask(spans, title="II", section="201").nonzero()[0]] == ["201"]
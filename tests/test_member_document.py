@@ -0,0 +1,92 @@
+"""
+Unit tests for the member knowledge document.
+"""
+
+import requests
+
+from app.api.services import congress_store, member_document
+from app.api.services.congress_store import store_member_details, sync_bill_resource
+from app.api.services.member_document import get_member_document, invalidate_member_document
+from app.api.services.result_cache import member_source, result_cache
+from tests.test_congress_store import sync_sample_bills
+
+MEMBER = {
+    "bioguideId": "A000360",
+    "directOrderName": "Lamar Alexander",
+    "invertedOrderName": "Alexander, Lamar",
+    "honorificName": "Mr.",
+    "firstName": "Lamar",
+    "lastName": "Alexander",
+    "state": "Tennessee",
+    "birthYear": "1940",
+    "currentMember": False,
+    "partyHistory": [{"partyName": "Republican", "partyAbbreviation": "R", "startYear": 2003}],
+    "leadership": [{"congress": 113, "type": "Conference Chair"}],
+    "terms": [{"chamber": "Senate", "congress": 116, "startYear": 2019, "endYear": 2021, "stateName": "Tennessee"}],
+    "sponsoredLegislation": {"count": 1, "url": "https://api.congress.gov/v3/member/A000360/sponsored-legislation"},
+}
+SPONSORED = [{
+    "congress": 116, "type": "S", "number": "1895", "title": "Lower Health Care Costs Act",
+    "policyArea": {"name": "Health"}, "introducedDate": "2019-06-19",
+    "latestAction": {"actionDate": "2019-07-08", "text": "Placed on Senate Legislative Calendar."},
+}]
+
+RELATED = [{
+    "congress": 116, "bill_type": "s", "bill_number": 1895, "related_congress": 116, "related_type": "hr",
+    "related_number": 2328, "relationship_type": "Related bill", "related_title": "Reauthorizing Health Programs Act",
+}]
+
+def fake_sources(calls):
+    def fetch(member_id, api_key):
+        calls.append(member_id)
+        return MEMBER, SPONSORED, [], RELATED
+    return fetch
+
+def test_member_document_renders_searchable_passages(monkeypatch):
+    monkeypatch.setattr(member_document, "fetch_member_sources", fake_sources([]))
+    invalidate_member_document("A000360")
+    document = get_member_document("A000360", api_key=None)
+
+    assert "Party affiliation history: Republican since 2003." in document.passages
+    assert "Leadership role: Conference Chair in the 113th Congress." in document.passages
+    best, _ = document.index.search("health care costs bill", k=1)[0]
+    assert "Lower Health Care Costs Act" in document.chunks[best]
+    best, _ = document.index.search("What party is he?", k=1)[0]
+    assert "Republican" in document.chunks[best]
+    assert ("Related bill of S 1895 (116th Congress): HR 2328 (116th Congress), "
+            "Reauthorizing Health Programs Act (Related bill).") in document.passages
+
+def test_member_document_is_cached_per_member(monkeypatch):
+    calls = []
+    monkeypatch.setattr(member_document, "fetch_member_sources", fake_sources(calls))
+    invalidate_member_document("A000360")
+    first = get_member_document("A000360", api_key=None)
+    assert get_member_document("A000360", api_key=None) is first
+    assert calls == ["A000360"], "Cached document should not be fetched again"
+    invalidate_member_document("A000360")
+    get_member_document("A000360", api_key=None)
+    assert calls == ["A000360", "A000360"]
+
+def test_member_sync_invalidates_document_and_optional_fetches_tolerate_errors(monkeypatch, tmp_path):
+    monkeypatch.setattr(congress_store, "DB_PATH", str(tmp_path / "congress.db"))
+    monkeypatch.setattr(member_document, "fetch_member_sources", fake_sources([]))
+    first = get_member_document("A000360", api_key=None)
+    store_member_details({"member": MEMBER})
+    assert get_member_document("A000360", api_key=None) is not first
+
+    def unreachable():
+        raise requests.ConnectionError("connection reset")
+    assert member_document._optional_list(member_document._executor.submit(unreachable), "bills") == []
+
+def test_bill_syncs_invalidate_member_documents_and_results(monkeypatch, tmp_path):
+    monkeypatch.setattr(congress_store, "DB_PATH", str(tmp_path / "congress.db"))
+    sync_sample_bills()
+    for member_id in ("M000087", "C001108", "P000595"):
+        result_cache.bind(member_source(member_id), f"corpus-{member_id}")
+
+    store_member_details({"member": {"bioguideId": "P000595", "directOrderName": "Gary C. Peters"}})
+    assert result_cache.fingerprint_for(member_source("P000595")) is None
+
+    sync_bill_resource("related-bills", 117, "hr", 3076, {"relatedBills": []})
+    assert result_cache.fingerprint_for(member_source("M000087")) is None
+    assert result_cache.fingerprint_for(member_source("C001108")) is None
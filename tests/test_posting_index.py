@@ -0,0 +1,38 @@
+"""
+Unit tests for the committee and member reverse indexes.
+"""
+
+import numpy as np
+
+from app.api.services.congress_store import get_bills_by_id, sync_bill_resource
+from app.api.services.posting_index import PostingIndex, committee_bills, member_bills, page
+from tests.test_congress_store import cosponsor
+
+def numbers(ordinals):
+    return sorted(bill["bill_number"] for bill in get_bills_by_id(ordinals))
+
+def test_cursor_pagination_is_stable_under_inserts():
+    index = PostingIndex([("hsag00", n) for n in (9, 3, 5, 7)])
+    ordinals, cursor = page(index.posting("hsag00"), limit=2)
+    assert ordinals.tolist() == [3, 5] and cursor == 5
+
+    index.update_bill(1, ["hsag00"])
+    index.update_bill(9, [])
+    ordinals, cursor = page(index.posting("hsag00"), cursor, limit=2)
+    assert ordinals.tolist() == [7] and cursor is None
+    assert index.posting("hsag00").tolist() == [1, 3, 5, 7]
+    assert np.all(np.diff(index.posting("hsag00")) > 0)
+
+def test_reverse_lookups_follow_syncs(store):
+    total, ordinals, cursor = committee_bills("HSAG29")
+    assert (total, numbers(ordinals), cursor) == (1, [2820], None)
+
+    total, ordinals, _ = member_bills("C001108")
+    assert numbers(ordinals) == [2820, 3076]
+    assert numbers(member_bills("C001108", role="sponsor")[1]) == [2820]
+
+    sync_bill_resource("cosponsors", 117, "hr", 3076, {"cosponsors": [
+        cosponsor("P000449", "Rob Portman", "R", "OH", "2021-05-11"),
+    ]})
+    assert numbers(member_bills("C001108", role="cosponsor")[1]) == []
+    assert numbers(member_bills("P000449")[1]) == [1720, 3076]
@@ -0,0 +1,36 @@
+"""
+Unit tests for the query-result cache.
+"""
+
+from app.api.services.result_cache import QueryResultCache, normalize_query
+
+def test_normalized_questions_share_an_entry():
+    cache = QueryResultCache()
+    cache.put("What party is X?", "fp1", {"response": "Democratic"}, variant=3)
+    assert normalize_query("  what PARTY is x ") == "what party is x"
+    assert cache.get("what party is x", "fp1", variant=3) == {"response": "Democratic"}
+    assert cache.get("what party is x", "fp1", variant=5) is None
+    assert cache.get("what party is x", "fp2", variant=3) is None
+
+def test_changed_source_invalidates_old_results():
+    cache = QueryResultCache(max_entries=2)
+    cache.bind("member:A1", "fp1")
+    cache.put("q1", "fp1", "a1")
+    assert cache.fingerprint_for("member:A1") == "fp1"
+
+    cache.bind("member:A1", "fp2")
+    assert cache.get("q1", "fp1") is None, "Results for the old corpus should be dropped"
+
+    cache.put("q2", "fp2", "a2")
+    cache.invalidate_source("member:A1")
+    assert cache.get("q2", "fp2") is None
+    assert cache.fingerprint_for("member:A1") is None
+
+def test_stale_source_binding_expires_and_lru_evicts():
+    cache = QueryResultCache(max_entries=2, source_ttl=0)
+    cache.bind("member:A1", "fp1")
+    assert cache.fingerprint_for("member:A1") is None
+    for query in ["q1", "q2", "q3"]:
+        cache.put(query, "fp1", query)
+    assert cache.get("q1", "fp1") is None
+    assert cache.get("q3", "fp1") == "q3"
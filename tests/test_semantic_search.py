@@ -2,7 +2,14 @@
 Unit tests for semantic search service.
 """
 
-from app.api.services.semantic_search import semantic_search
+from app.api.services import semantic_search as semantic_search_module
+from app.api.services.semantic_search import (
+    semantic_search, get_index, clear_index_cache, corpus_fingerprint,
+    densify, estimate_dense_bytes, top_k, semantic_search_top_k,
+    batch_semantic_search
+)
+import pytest
+from scipy import sparse
 
 def test_semantic_search():
     chunks = ["This is the first chunk.", "This is the second chunk.", "This is the third chunk."]
@@ -18,3 +25,49 @@ def test_semantic_search_no_match():
     assert relevant_chunk == "", "Semantic search should return empty string when no match"
     assert score == 0.0, "Semantic search should return 0.0 score when no match"
 
+def test_index_is_reused_for_same_corpus():
+    chunks = ["Alpha bill on farms.", "Beta bill on roads.", "Gamma bill on ports."]
+    first = get_index(chunks)
+    second = get_index(list(chunks))
+    assert first is second, "Index should be cached by corpus content"
+    assert get_index(chunks + ["Delta bill on rail."]) is not first
+
+def test_index_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(semantic_search_module, "INDEX_CACHE_SIZE", 2)
+    clear_index_cache()
+    a = get_index(["corpus a"])
+    get_index(["corpus b"])
+    get_index(["corpus a"])
+    get_index(["corpus c"])
+    assert get_index(["corpus a"]) is a, "Recently used index was evicted"
+    assert corpus_fingerprint(["corpus b"]) not in semantic_search_module._index_cache
+
+def test_densify_refuses_oversized_matrix():
+    matrix = sparse.csr_matrix((10_000, 50_000), dtype="float32")
+    assert estimate_dense_bytes(matrix) == 10_000 * 50_000 * 4
+    with pytest.raises(MemoryError):
+        densify(matrix, max_bytes=1024 * 1024)
+    assert densify(sparse.csr_matrix((2, 3)), max_bytes=1024).shape == (2, 3)
+
+def test_top_k_orders_and_thresholds():
+    scores = [0.2, 0.9, 0.0, 0.5, 0.9, 0.05]
+    assert top_k(scores, 3) == [(1, 0.9), (4, 0.9), (3, 0.5)]
+    assert top_k(scores, 10, threshold=0.1) == [(1, 0.9), (4, 0.9), (3, 0.5), (0, 0.2)]
+    assert top_k(scores, 0) == []
+
+def test_semantic_search_top_k():
+    chunks = ["The farm bill passed.", "A bill on roads.", "Farm subsidies and farm credit.", "Ports."]
+    results = semantic_search_top_k("farm", chunks, k=2)
+    assert [i for i, _ in results] == [2, 0], "Top-k ranking failed"
+    assert results[0][1] >= results[1][1]
+    assert semantic_search_top_k("fourth", chunks) == []
+
+def test_batch_semantic_search_matches_single_queries():
+    chunks = ["The farm bill passed.", "A bill on roads.", "Farm subsidies and farm credit.", "Ports."]
+    queries = ["farm", "roads", "fourth"]
+    results = batch_semantic_search(queries, chunks, k=2)
+    assert len(results) == 3
+    for query, batch_result in zip(queries, results):
+        single = semantic_search_top_k(query, chunks, k=2)
+        assert [i for i, _ in batch_result] == [i for i, _ in single]
+        assert [s for _, s in batch_result] == pytest.approx([s for _, s in single])
@@ -0,0 +1,58 @@
+"""
+Unit tests for the memory-mapped vector store.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from app.api.services import semantic_search as semantic_search_module
+from app.api.services import vector_store
+from app.api.services.semantic_search import TfidfIndex, get_index, clear_index_cache
+
+CHUNKS = ["The farm bill passed.", "A bill on roads.", "Farm subsidies and farm credit.", "Ports."]
+
+def test_write_and_read_index_is_memory_mapped(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VECTOR_DIR", str(tmp_path))
+    index = TfidfIndex(CHUNKS)
+    vector_store.write_index("members", index.chunks, index.vectorizer, index.matrix)
+
+    chunks, vectorizer, matrix = vector_store.read_index("members")
+    assert list(chunks) == CHUNKS
+    for array in (matrix.data, matrix.indices, matrix.indptr):
+        assert not array.flags.owndata and not array.flags.writeable, "Matrix should map the file, not copy it"
+    loaded = TfidfIndex(chunks, vectorizer=vectorizer, matrix=matrix)
+    assert np.allclose(loaded.scores("farm credit"), index.scores("farm credit"))
+
+def test_get_index_reuses_persisted_corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VECTOR_DIR", str(tmp_path))
+    monkeypatch.setattr(semantic_search_module, "PERSIST_MIN_CHUNKS", 2)
+    clear_index_cache()
+    get_index(CHUNKS)
+    clear_index_cache()
+
+    reopened = get_index(CHUNKS)
+    assert isinstance(reopened.chunks, vector_store.MmapChunks), "Second worker should map the stored index"
+    assert reopened.scores("roads").argmax() == 1
+
+def test_publish_keeps_concurrent_version_and_collects_old_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VECTOR_DIR", str(tmp_path))
+    index = TfidfIndex(CHUNKS)
+    vector_store.write_index("bills", index.chunks, index.vectorizer, index.matrix)
+    root = tmp_path / "bills"
+    # Another writer's version, built but not yet published, must survive this publish.
+    pending = root / f"v{time.time_ns()}"
+    pending.mkdir()
+    vector_store.write_index("bills", index.chunks, index.vectorizer, index.matrix)
+    assert pending.exists()
+    monkeypatch.setattr(vector_store, "VERSION_GRACE_SECONDS", 0)
+    vector_store.write_index("bills", index.chunks, index.vectorizer, index.matrix)
+    assert sorted(entry.name for entry in root.iterdir() if entry.name.startswith("v")) == [
+        os.path.basename(vector_store.current_version("bills"))]
+
+    monkeypatch.setattr(vector_store, "VECTOR_STORE_LIMIT", 2)
+    for name in ("a", "b", "c"):
+        vector_store.write_index(name, index.chunks, index.vectorizer, index.matrix)
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ["b", "c"]
+    assert vector_store.read_index("bills") is None